@@ -1,26 +1,51 @@
-import tempfile, os, json
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
-from fastapi.responses import Response
+import tempfile, os, re, json
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request, Query
+from fastapi.responses import Response, StreamingResponse, FileResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import Optional, Literal, Dict
-from datetime import datetime, timezone
+from typing import Optional, Literal, Tuple
+from datetime import datetime
 from dotenv import load_dotenv
 from pathlib import Path
-from langchain_core.messages import AIMessage
 
-from .services.ai_service import GRAPH
+from .services.ai_service import GRAPH, ai_service
+from .services.health import ProviderUnavailable
+from .services.history import SUMMARY_REF
+from .services.metrics import MetricsMiddleware, record_cache, render as render_metrics, timed
+from .services.usage import CURRENT_SESSION, aggregate
+from .services.blobs import BlobStore
+from .services.cache import AudioCache
+from .services.audit_log import AuditLogWriter
+from .services.log_index import LogIndex
+from .services.log_archive import LogArchive, iter_logs
 
 # Read .env file
 load_dotenv()
 
 # Paths definition
 BASE_DIR = Path(__file__).resolve().parent
-LOG_DIR = (BASE_DIR / ".." / "data" / "logs").resolve()
+LOG_DIR = Path(os.getenv("LOG_DIR") or BASE_DIR / ".." / "data" / "logs").resolve()
 LOG_DIR.mkdir(parents=True, exist_ok=True)
+AUDIO_DIR = (BASE_DIR / ".." / "data" / "audio").resolve()
+
+# Audit log writer (drained in the background while the app runs)
+LOG_INDEX = LogIndex.from_env(LOG_DIR)
+LOG_ARCHIVE = LogArchive.from_env(LOG_DIR)
+AUDIT_LOG = AuditLogWriter.from_env(LOG_DIR, index=LOG_INDEX)
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    AUDIT_LOG.start()
+    ai_service.health.start()
+    yield
+    await ai_service.health.stop()
+    await AUDIT_LOG.stop()
+
 
 # API initialization
-app = FastAPI(title="Consent App Backend.")
+app = FastAPI(title="Consent App Backend.", lifespan=lifespan)
 
 # CORS configuration
 ALLOWED_ORIGINS = os.getenv(
@@ -34,11 +59,22 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"]
 )
+app.add_middleware(MetricsMiddleware)
 
-# Define session memory
-SESSIONS: Dict[str, dict] = {}  # Key: 'session_id', Value: 'state'
+@app.exception_handler(ProviderUnavailable)
+async def provider_unavailable(_: Request, e: ProviderUnavailable):
+    return JSONResponse(status_code=503, content={"detail": str(e)},
+                        headers={"Retry-After": str(int(ai_service.health.breaker.reset_s))})
 
 
+# Audio media types by TTS output format
+AUDIO_MEDIA_TYPES = {"wav": "audio/wav", "mp3": "audio/mpeg", "opus": "audio/ogg", "aac": "audio/aac",
+                     "flac": "audio/flac", "pcm": "audio/pcm"}
+
+# Synthesized audio lives outside graph state, addressed by content hash
+AUDIO_STORE = BlobStore(AUDIO_DIR)
+AUDIO_CACHE = AudioCache.from_env(AUDIO_STORE)
+
 # Classes definition
 class ChatRequest(BaseModel):
     session_id: str
@@ -53,6 +89,16 @@ class ChatResponse(BaseModel):
     stage: Literal["welcome", "summary", "qa"]
 
 
+class TTSRequest(ChatRequest):
+    format: Literal["wav", "mp3", "opus", "aac", "flac", "pcm"] = "wav"
+
+
+class AudioHandle(BaseModel):
+    handle: str
+    media_type: str
+    size: int
+
+
 class ConsentRecord(BaseModel):
     patient_name: str
     session_id: Optional[str] = None
@@ -61,58 +107,220 @@ class ConsentRecord(BaseModel):
 
 
 # Functions definition
-def log_event(kind: str, payload: dict):
-    now = datetime.now(timezone.utc)
-    record = {"kind": kind, "ts": now.isoformat(), **payload}
-    path = LOG_DIR / f"{now.date()}.jsonl"
-    with open(path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+async def log_event(kind: str, payload: dict):
+    with timed("log_event"):
+        await AUDIT_LOG.log(kind, payload)
+
+
+# Provider usage is written to the audit log as 'usage' records
+ai_service.usage.sink = log_event
+
+
+def last_answer(state: dict) -> str:
+    """Answer of the last turn (the summary is kept in the state by reference)"""
+    answer = state.get("answer", "")
+    if answer == SUMMARY_REF:
+        return str(state.get("summary"))
+    return answer
+
+
+def cached_audio(key: str) -> Optional[Tuple[str, Path, int]]:
+    """
+    (handle, path, size) of the audio cached for 'key', or None. A blob deleted since the lookup
+    (evicted by another worker) is a miss, and its cache entry is dropped.
+    """
+    handle = AUDIO_CACHE.get(key) if AUDIO_CACHE else None
+    if handle is None:
+        return None
+    path = AUDIO_STORE.path(handle)
+    try:
+        size = path.stat().st_size if path else None
+    except OSError:
+        size = None
+    if size is None:
+        AUDIO_CACHE.discard(key)
+        return None
+    return handle, path, size
+
+
+def audio_response(request: Request, path: Path) -> Response:
+    """
+    Serve a stored audio blob with a strong ETag (its content hash) and single byte-range support.
+    """
+    media_type = AUDIO_MEDIA_TYPES[path.suffix.lstrip(".")]
+    etag = f'"{path.stem}"'
+    headers = {"ETag": etag, "Accept-Ranges": "bytes", "Cache-Control": "public, max-age=31536000, immutable"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    # Full content
+    m = re.match(r"^bytes=(\d*)-(\d*)$", request.headers.get("range", "").strip())
+    if not m or not (m[1] or m[2]):
+        return FileResponse(path, media_type=media_type, headers=headers)
+
+    # Partial content
+    size = path.stat().st_size
+    if m[1]:
+        start, end = int(m[1]), min(int(m[2]) if m[2] else size - 1, size - 1)
+    else:
+        start, end = max(size - int(m[2]), 0), size - 1
+    if start > end:
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start + 1)
+    return Response(data, status_code=206, media_type=media_type,
+                    headers={**headers, "Content-Range": f"bytes {start}-{end}/{size}"})
+
+
+def tts_cache_key(req: "TTSRequest") -> str:
+    return AudioCache.key(ai_service._tts_request(req.text_input, req.language, req.format))
+
+
+def sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
 
 # Functions definition
 @app.get("/health")
-def health():
-    return{"status": "ok"}
+async def health(deep: bool = False):
+    """
+    Liveness. With '?deep=1' also the AI provider status cached by the background prober (probed
+    inline only before its first run), the circuit breaker state, per-operation call statistics
+    (retries, timeouts, hedges, latency percentiles) and per-model-tier calls, fallbacks and latency.
+    """
+    if not deep:
+        return {"status": "ok"}
 
+    if ai_service.health.status == "unknown":
+        await ai_service.health.check()
+    provider = ai_service.health.snapshot()
+    return {"status": "ok" if provider["available"] else "degraded", "provider": provider,
+            "calls": ai_service.resilience.stats()["operations"], "models": ai_service.models.snapshot()}
 
-@app.post("/chat", response_model=ChatResponse)
-def chat(req: ChatRequest):
-    # Get session id
-    state = SESSIONS.get(req.session_id, {"session_id": req.session_id, "language": req.language})
-    state.update({"user_text": req.text_input, "language": req.language})
 
+@app.get("/metrics")
+def metrics():
+    """Prometheus metrics (latency histograms per route and stage; token, cache, audio and error counters)"""
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    exact, semantic = ai_service.summary_cache, ai_service.semantic_cache
+    return {"summary": exact.stats() if exact else None,
+            "semantic_summary": semantic.stats() if semantic else None,
+            "audio": AUDIO_CACHE.stats() if AUDIO_CACHE else None}
+
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat(req: ChatRequest):
     # Check if procedure given
     if not req.text_input.strip():
         raise HTTPException(status_code=400, detail="No procedure given.")
 
-    # Call agent
-    result = GRAPH.invoke({"user_text": req.text_input, "language": req.language},
-                          config={"configurable": {"thread_id": req.session_id}})
+    # Call agent (session state lives in the checkpointer, shared by all workers)
+    CURRENT_SESSION.set(req.session_id)
+    with timed("graph"):
+        result = await GRAPH.ainvoke({"user_text": req.text_input, "language": req.language},
+                                     config={"configurable": {"thread_id": req.session_id}})
 
     # Extract content
     state = dict(result)
-    answer = ""
-    for msg in state.get("messages", []):
-        if isinstance(msg, AIMessage):
-            answer = msg.content
+    answer = last_answer(state)
 
     # Save log    
-    log_event("audit_log",  {"session_id":req.session_id,
-                            "user_text": req.text_input,
-                            "answer": answer})
+    await log_event("audit_log",  {"session_id":req.session_id,
+                                  "user_text": req.text_input,
+                                  "answer": answer})
 
     return {"answer": answer, "summary": state.get("summary"), "stage": state.get("stage")}
 
 
+@app.post("/chat/stream")
+async def chat_stream(req: ChatRequest):
+    """
+    Streaming variant of '/chat' (Server-Sent Events). Emits 'delta' events with LLM tokens,
+    'section' events as soon as each summary heading closes and a final 'done' event
+    carrying the same payload as '/chat'.
+    """
+    # Check if procedure given
+    if not req.text_input.strip():
+        raise HTTPException(status_code=400, detail="No procedure given.")
+
+    async def events():
+        state = {}
+        CURRENT_SESSION.set(req.session_id)
+        try:
+            # Call agent
+            with timed("graph"):
+                async for mode, chunk in GRAPH.astream({"user_text": req.text_input, "language": req.language},
+                                                       config={"configurable": {"thread_id": req.session_id,
+                                                                                "stream": True}},
+                                                       stream_mode=["custom", "values"]):
+                    if mode == "custom":
+                        yield sse(chunk["event"], chunk["data"])
+                    else:
+                        state = dict(chunk)
+
+        except Exception as e:
+            yield sse("error", {"detail": str(e)})
+            return
+
+        # Save log
+        answer = last_answer(state)
+        await log_event("audit_log", {"session_id": req.session_id,
+                                      "user_text": req.text_input,
+                                      "answer": answer})
+
+        yield sse("done", {"answer": answer, "summary": state.get("summary"), "stage": state.get("stage")})
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
 @app.post("/consent")
-def save_consent(cons: ConsentRecord):
-    # Save log
-    log_event("consent_captured", cons.dict())
+async def save_consent(cons: ConsentRecord):
+    # Save log (on disk before the patient sees the confirmation)
+    await log_event("consent_captured", cons.dict())
 
     # Return response
     return {"ok": True}
 
 
+@app.get("/logs")
+def query_logs(session_id: Optional[str] = None,
+               kind: Optional[str] = None,
+               since: Optional[datetime] = None,
+               until: Optional[datetime] = None,
+               limit: Optional[int] = Query(None, ge=1)):
+    """
+    Audit log records (NDJSON, in append order) filtered by session, kind and time range, over
+    live and archived days alike. Naive timestamps are taken as UTC.
+    """
+    records = iter_logs(LOG_INDEX, LOG_ARCHIVE, session_id=session_id, kind=kind, since=since, until=until,
+                        limit=limit)
+    return StreamingResponse((json.dumps(r, ensure_ascii=False) + "\n" for r in records),
+                             media_type="application/x-ndjson")
+
+
+@app.get("/usage")
+def usage(session_id: Optional[str] = None,
+          since: Optional[datetime] = None,
+          until: Optional[datetime] = None,
+          group_by: Optional[Literal["session", "day", "operation", "model", "tier"]] = "day",
+          top: Optional[int] = Query(None, ge=1)):
+    """
+    Provider usage (tokens, cached tokens, TTS characters, STT seconds) and estimated cost from the
+    'usage' audit log records, in total and per group (highest cost first; 'top' keeps the first N).
+    """
+    records = iter_logs(LOG_INDEX, LOG_ARCHIVE, session_id=session_id, kind="usage", since=since, until=until)
+    result = aggregate(records, group_by)
+    result["groups"] = result["groups"][:top]
+    return {"group_by": group_by, **result}
+
+
 @app.post("/transcribe")
 async def transcribe(session_id: str = Form(...),
                      language: Literal["English", "Svenska"] = Form("English"),
@@ -127,13 +335,14 @@ async def transcribe(session_id: str = Form(...),
         tmp.write(await file.read())
         tmp_path = tmp.name
     try:
-        with open(tmp_path, "rb") as f:
-            # Call agent
-            result = GRAPH.invoke({"stage": "input", "user_text": "",
-                                   "path_recording": tmp_path,"language": language},
-                                  config={"configurable": {"thread_id": session_id}})
+        # Call agent
+        CURRENT_SESSION.set(session_id)
+        with timed("graph"):
+            result = await GRAPH.ainvoke({"stage": "input", "user_text": "",
+                                          "path_recording": tmp_path, "language": language},
+                                         config={"configurable": {"thread_id": session_id}})
 
-            transcription = result.get("user_text")
+        transcription = result.get("user_text")
 
     finally:
         try:
@@ -145,19 +354,81 @@ async def transcribe(session_id: str = Form(...),
 
 
 @app.post("/tts")
-async def tts(req: ChatRequest):
+async def tts(req: TTSRequest, request: Request):
+    """
+    Stream synthesized speech to the client as soon as the provider produces the first chunk.
+    Repeated requests are served from the audio cache.
+    """
     # Check if text given
     if req.text_input is None:
         raise HTTPException(status_code=400, detail="Text to generate voice not found.")
 
+    # Serve from cache
+    CURRENT_SESSION.set(req.session_id)
+    key = tts_cache_key(req)
+    cached = cached_audio(key)
+    if AUDIO_CACHE:
+        record_cache("audio", cached is not None)
+    if cached:
+        return audio_response(request, cached[1])
+
+    # Wait for the first chunk so provider errors are still reported with a status code
+    stream = ai_service._tts_stream(req.text_input, req.language, response_format=req.format)
     try:
-        # Call agent
-        result = GRAPH.invoke({"user_text": req.text_input,
-                               "type": "audio",
-                               "language": req.language},
-                              config={"configurable": {"thread_id": req.session_id}})
+        first_chunk = await anext(stream)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Failed to generate voice.")
 
-        return Response(result["audio_bytes"], media_type="audio/wav")
+    async def audio():
+        yield first_chunk
+        async for chunk in stream:
+            yield chunk
 
+    # Save to cache while streaming
+    body = audio()
+    if AUDIO_CACHE:
+        body = AUDIO_STORE.tee(body, req.format, lambda handle, size: AUDIO_CACHE.put(key, handle, size))
+
+    return StreamingResponse(body, media_type=AUDIO_MEDIA_TYPES[req.format])
+
+
+@app.post("/audio", response_model=AudioHandle)
+async def create_audio(req: TTSRequest):
+    """
+    Synthesize speech into the audio blob store and return its handle (fetch it from '/audio/{handle}').
+    """
+    # Check if text given
+    if not req.text_input:
+        raise HTTPException(status_code=400, detail="Text to generate voice not found.")
+
+    # Serve from cache
+    CURRENT_SESSION.set(req.session_id)
+    key = tts_cache_key(req)
+    cached = cached_audio(key)
+    if AUDIO_CACHE:
+        record_cache("audio", cached is not None)
+    if cached:
+        handle, _, size = cached
+        return {"handle": handle, "media_type": AUDIO_MEDIA_TYPES[req.format], "size": size}
+
+    try:
+        handle, size = await AUDIO_STORE.put_stream(
+            ai_service._tts_stream(req.text_input, req.language, response_format=req.format), req.format)
     except Exception:
         raise HTTPException(status_code=400, detail="Failed to generate voice.")
+
+    # Save to cache
+    if AUDIO_CACHE:
+        AUDIO_CACHE.put(key, handle, size)
+
+    return {"handle": handle, "media_type": AUDIO_MEDIA_TYPES[req.format], "size": size}
+
+
+@app.get("/audio/{handle}")
+def get_audio(handle: str, request: Request):
+    # Check if audio exists
+    path = AUDIO_STORE.path(handle)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Audio not found.")
+
+    return audio_response(request, path)
@@ -1,43 +1,68 @@
 from langgraph.graph import StateGraph, START, END
-from langgraph.graph.message import add_messages
-from langgraph.checkpoint.memory import MemorySaver
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
-from typing import TypedDict, Annotated, Literal, Dict, List
+from langgraph.config import get_stream_writer
+from langchain_core.runnables import RunnableConfig
+from typing import TypedDict, Literal, Dict, List, Optional, Callable
 
 # Import functions
-from .tools import AIService
+from .tools import AIService, SummaryStreamParser
+from .checkpoint import make_checkpointer
+from .health import ProviderUnavailable, UNAVAILABLE_MESSAGE
+from .metrics import INTENTS, instrument, timed
+from .history import History, SUMMARY_REF
+from .intents import IntentClassifier
 
 # Create AI object
 ai_service = AIService()
+history = History.from_env()
+intents = IntentClassifier.from_env()
 
 # Define classes
 class State(TypedDict, total=False):
-    messages: Annotated[List[BaseMessage], add_messages]
+    turns: List[Dict[str, str]]
+    recap: str
+    answer: str
     user_text: str
-    type: str
     path_recording: str
-    audio_bytes: bytes
     language: Literal["English", "Swedish"]
     summary: Dict[str, object]
     stage: str
 
 # Define functions
-def history2text(history_msgs: List[BaseMessage], max_history: int) -> str:
-    pairs = []
-    for msg in history_msgs[-2*max_history:]:
-        role = getattr(msg, "type", "")
-        content = getattr(msg, "content", "")
-        if role == "human":
-            pairs.append(f"Q: {content}")
-        elif role == "ai":
-            pairs.append(f"A: {content}")
-    return "\n".join(pairs)
-
-
-def transcribe_audio(state:State) -> State:
+def add_turn(state: State, question: str, answer: str) -> State:
+    """State update appending a turn to the bounded history"""
+    turns, recap = history.add(state.get("turns"), state.get("recap"), question, answer)
+    return {"turns": turns, "recap": recap, "answer": answer}
+
+
+def stream_deltas(config: RunnableConfig,
+                  parser: Optional[SummaryStreamParser] = None) -> Optional[Callable[[str], None]]:
+    """Return a callback forwarding LLM tokens (and closed summary sections) to the graph stream"""
+    if not config.get("configurable", {}).get("stream"):
+        return None
+
+    writer = get_stream_writer()
+
+    def on_delta(delta: str):
+        writer({"event": "delta", "data": {"text": delta}})
+        for name, value in parser.feed(delta) if parser else []:
+            writer({"event": "section", "data": {"name": name, "value": value}})
+
+    return on_delta
+
+
+def unavailable(language: str, on_delta: Optional[Callable[[str], None]] = None) -> str:
+    """Fallback answer while the provider is unavailable"""
+    message = UNAVAILABLE_MESSAGE.get(language, UNAVAILABLE_MESSAGE["English"])
+    if on_delta:
+        on_delta(message)
+    return message
+
+
+@instrument("node:TranscribeAudio")
+async def transcribe_audio(state:State) -> State:
     path_recording = state.get("path_recording")
     if path_recording:
-        transcription = ai_service._transcribe(path_recording)
+        transcription = await ai_service._transcribe(path_recording)
     else:
         raise Exception("No recording path found.")
 
@@ -45,80 +70,108 @@ def transcribe_audio(state:State) -> State:
             "stage": "input"}
 
 
-def generate_audio(state:State) -> State:
-    tts_text = state.get("user_text")
-    language = state.get("language")
-    if tts_text:
-        audio_bytes = ai_service._tts(tts_text, language)
-    else:
-        raise Exception("Text not found.")
-
-    return {"audio_bytes": audio_bytes,
-            "stage": state.get("stage")}
-
-
-def build_summary(state: State) -> State:
+@instrument("node:BuildSummary")
+async def build_summary(state: State, config: RunnableConfig) -> State:
     user_query = state.get("user_text")
     language = state.get("language", "English")
+    parser = SummaryStreamParser()
+    on_delta = stream_deltas(config, parser)
 
     # Call LLM
     if user_query:
-        response = ai_service._summary(user_query=user_query,
-                                       language=language)
+        try:
+            response = await ai_service._summary(user_query=user_query,
+                                                 language=language,
+                                                 on_delta=on_delta)
+        except ProviderUnavailable:
+            return {**add_turn(state, user_query, unavailable(language, on_delta)),
+                    "stage": "welcome"}
 
         summary = ai_service._parse_summary(response)
 
+        # Emit the sections still open when the stream ended
+        if on_delta:
+            writer = get_stream_writer()
+            for name, value in parser.close():
+                writer({"event": "section", "data": {"name": name, "value": value}})
+
         if len(summary) == 0:
-            return {"messages": [HumanMessage(content=user_query), AIMessage(content=str(response))],
+            return {**add_turn(state, user_query, str(response)),
                     "stage": "welcome"}
         else:
-            return {"messages": [HumanMessage(content=user_query), AIMessage(content=str(summary))],
+            # The summary is stored once; the turn only refers to it
+            return {**add_turn(state, user_query, SUMMARY_REF),
                     "summary": summary,
                     "stage": "summary"}
 
 
-def answer_qa(state: State) -> State:
-    question = state.get("user_text", "Question")
+@instrument("node:QuickReply")
+async def quick_reply(state: State, config: RunnableConfig) -> State:
+    """Fixed answer to greetings, thanks and consent phrases (no LLM call, not kept in the history)"""
     language = state.get("language", "English")
-    history = history2text(state.get("messages") or [], max_history=3)
+    has_summary = "summary" in state
+    answer = intents.reply(intents.classify(state.get("user_text")), language, has_summary)
 
-    # Call LLM
-    ai_service.check_availability()
-    answer = ai_service._answer_qa(question=question,
-                                   language=language,
-                                   summary=state.get("summary"),
-                                   history=history)
+    on_delta = stream_deltas(config)
+    if on_delta:
+        on_delta(answer)
+
+    return {"answer": answer,
+            "stage": "qa" if has_summary else "welcome"}
 
-    return {"messages": [HumanMessage(content=question), AIMessage(content=str(answer))],
+
+@instrument("node:AnswerQA")
+async def answer_qa(state: State, config: RunnableConfig) -> State:
+    question = state.get("user_text", "Question")
+    language = state.get("language", "English")
+    summary = state.get("summary")
+    recent = history.render(state.get("turns"), state.get("recap"))
+
+    # Call LLM (the provider status is cached by the background prober)
+    on_delta = stream_deltas(config)
+    try:
+        answer = await ai_service._answer_qa(question=question,
+                                             language=language,
+                                             summary=summary,
+                                             history=recent,
+                                             on_delta=on_delta)
+    except ProviderUnavailable:
+        answer = unavailable(language, on_delta)
+
+    return {**add_turn(state, question, str(answer)),
             "stage": "qa"}
 
 
 def router(state: State) -> str:
-    if state.get("type", "") == "audio":
-        return "GenerateAudio"
-    elif state.get("stage") == "input" and not state.get("user_text"):
-        return "TranscribeAudio"
-    elif not "summary" in state:
-        return "BuildSummary"
-    else:
-        return "AnswerQA"
+    with timed("route"):
+        if state.get("stage") == "input" and not state.get("user_text"):
+            return "TranscribeAudio"
+
+        intent = intents.classify(state.get("user_text"))
+        INTENTS.labels(intent or "llm").inc()
+        if intent:
+            return "QuickReply"
+        elif not "summary" in state:
+            return "BuildSummary"
+        else:
+            return "AnswerQA"
 
 # Define flow
 workflow = StateGraph(State)
 workflow.add_node("TranscribeAudio", transcribe_audio)
-workflow.add_node("GenerateAudio", generate_audio)
 workflow.add_node("BuildSummary", build_summary)
 workflow.add_node("AnswerQA", answer_qa)
+workflow.add_node("QuickReply", quick_reply)
 
 workflow.add_conditional_edges(START, router, {"TranscribeAudio": "TranscribeAudio",
-                                               "GenerateAudio": "GenerateAudio",
                                                "BuildSummary": "BuildSummary",
-                                               "AnswerQA": "AnswerQA"})
+                                               "AnswerQA": "AnswerQA",
+                                               "QuickReply": "QuickReply"})
 
 workflow.add_edge("TranscribeAudio", END)
-workflow.add_edge("GenerateAudio", END)
 workflow.add_edge("BuildSummary", END)
 workflow.add_edge("AnswerQA", END)
+workflow.add_edge("QuickReply", END)
 
-memory = MemorySaver()
+memory = make_checkpointer()
 GRAPH = workflow.compile(checkpointer=memory)
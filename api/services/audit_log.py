@@ -0,0 +1,206 @@
+"""
+Buffered, asynchronous writer for the daily audit/consent logs ('data/logs/<date>.jsonl').
+
+Records are queued in-process and drained by a background task that writes them in batches to the
+daily file, which stays open until the (UTC) date changes. Each batch is appended with a single
+write under an exclusive file lock, so several uvicorn workers can share the same file without
+interleaving lines. Kinds listed in 'fsync_kinds' (consent_captured by default) are fsynced before
+their caller returns; everything else is fsynced at most every 'fsync_interval_s'.
+"""
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from .log_index import LogIndex
+
+# Define logger
+logger = logging.getLogger(__name__)
+
+
+class AuditLogWriter:
+    """
+    Queue-backed JSONL log writer.
+
+    Args:
+        log_dir: Directory holding one '<YYYY-MM-DD>.jsonl' file per day.
+        fsync_kinds: Record kinds made durable before 'log' returns.
+        fsync_interval_s: Maximum delay before other records are fsynced (0: every batch).
+        max_batch: Maximum records written per batch.
+        max_queue: Queue size beyond which 'log' waits for the writer (backpressure).
+        index: Sidecar index caught up after every batch.
+    """
+
+    def __init__(self, log_dir: str | Path, *, fsync_kinds: Iterable[str] = ("consent_captured",),
+                 fsync_interval_s: float = 1.0, max_batch: int = 512, max_queue: int = 10000,
+                 index: Optional[LogIndex] = None):
+        self.log_dir = Path(log_dir)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.fsync_kinds = frozenset(fsync_kinds)
+        self.fsync_interval_s = fsync_interval_s
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self.index = index
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._day: Optional[str] = None
+        self._fd: Optional[int] = None
+        self._dirty = False
+        self._last_fsync = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, log_dir: str | Path, index: Optional[LogIndex] = None) -> "AuditLogWriter":
+        kinds = os.getenv("AUDIT_LOG_FSYNC_KINDS", "consent_captured")
+        return cls(log_dir,
+                   fsync_kinds=[k.strip() for k in kinds.split(",") if k.strip()],
+                   fsync_interval_s=float(os.getenv("AUDIT_LOG_FSYNC_INTERVAL_S", 1.0)),
+                   max_batch=int(os.getenv("AUDIT_LOG_MAX_BATCH", 512)),
+                   index=index)
+
+    # Lifecycle
+    def start(self):
+        """Start the background writer on the running event loop"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(self.max_queue)
+        self._task = self._loop.create_task(self._drain(), name="audit-log-writer")
+
+    async def stop(self):
+        """Write everything still queued, fsync and close the daily file"""
+        if self._task is not None:
+            if not self._task.done():
+                await self._queue.join()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self._close)
+
+    @property
+    def running(self) -> bool:
+        if self._task is None or self._task.done():
+            return False
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    # Writing
+    async def log(self, kind: str, payload: Dict[str, Any]):
+        """Queue a record; records of an fsync kind are on disk when this returns"""
+        now = datetime.now(timezone.utc)
+        record = {"kind": kind, "ts": now.isoformat(), **payload}
+
+        # No writer on this loop (scripts, tests): write through
+        if not self.running:
+            await asyncio.to_thread(self._write, [(record, None)])
+            return
+
+        durable = kind in self.fsync_kinds
+        done = self._loop.create_future() if durable else None
+        await self._queue.put((record, done))
+        if done is not None:
+            await done
+
+    async def _drain(self):
+        while True:
+            # Wake up for the batched fsync even when no new records arrive
+            try:
+                first = await asyncio.wait_for(self._queue.get(), self.fsync_interval_s if self._dirty else None)
+            except asyncio.TimeoutError:
+                await asyncio.to_thread(self._fsync)
+                continue
+
+            batch = [first]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            error = None
+            try:
+                await asyncio.to_thread(self._write, batch)
+                if self._dirty and time.monotonic() - self._last_fsync >= self.fsync_interval_s:
+                    await asyncio.to_thread(self._fsync)
+            except Exception as e:
+                logger.error(f"Audit log write failed: {e}")
+                error = e
+
+            for _, done in batch:
+                if done is not None and not done.done():
+                    if error:
+                        done.set_exception(error)
+                    else:
+                        done.set_result(None)
+                self._queue.task_done()
+
+    def _write(self, batch: List[Tuple[Dict[str, Any], Optional[asyncio.Future]]]):
+        """Append a batch (grouped per day) and fsync when required; runs in a worker thread"""
+        by_day: Dict[str, List[str]] = {}
+        durable = False
+        for record, done in batch:
+            by_day.setdefault(record["ts"][:10], []).append(json.dumps(record, ensure_ascii=False) + "\n")
+            durable = durable or record["kind"] in self.fsync_kinds
+
+        with self._lock:
+            for day, lines in by_day.items():
+                self._append(day, "".join(lines).encode("utf-8"))
+            if durable or self.fsync_interval_s <= 0:
+                self._sync()
+
+        # Index the new lines (queries catch up on their own if this fails)
+        if self.index is not None:
+            try:
+                self.index.refresh(by_day)
+            except Exception as e:
+                logger.warning(f"Audit log index refresh failed: {e}")
+
+    def _append(self, day: str, data: bytes):
+        if day != self._day:
+            if self._fd is not None:
+                self._sync()
+                os.close(self._fd)
+            self._fd = os.open(self.log_dir / f"{day}.jsonl", os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._day = day
+
+        if fcntl:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(self._fd, view):]
+        finally:
+            if fcntl:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._dirty = True
+
+    def _fsync(self):
+        with self._lock:
+            self._sync()
+
+    def _sync(self):
+        if self._fd is not None and self._dirty:
+            os.fsync(self._fd)
+        self._dirty = False
+        self._last_fsync = time.monotonic()
+
+    def _close(self):
+        with self._lock:
+            if self._fd is not None:
+                self._sync()
+                os.close(self._fd)
+            self._fd, self._day = None, None
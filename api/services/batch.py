@@ -0,0 +1,168 @@
+"""
+Offline consent summary generation through the provider Batch API.
+
+The '_summary' prompts for every (procedure, language) pair are written to one JSONL request file,
+submitted as a single batch job and polled until it finishes. Completed responses are parsed with
+'_parse_summary' and stored in the summary cache, where '/chat' serves them without a provider call.
+"""
+import json
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .cache import normalize_query
+from .usage import llm_usage
+from .tools import AIService, SUMMARY_PROMPT_VERSION
+from .prompts import SUMMARY
+
+# Define logger
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/responses"
+FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+def response_text(body: Dict[str, Any]) -> str:
+    """Output text of a Responses API body as returned in batch output files"""
+    if isinstance(body.get("output_text"), str) and body["output_text"].strip():
+        return body["output_text"].strip()
+
+    chunks = []
+    for item in body.get("output") or []:
+        if item.get("type") == "message":
+            for c in item.get("content") or []:
+                if c.get("type") in ("output_text", "input_text", "text") and c.get("text"):
+                    chunks.append(c["text"])
+    return "\n".join(chunks).strip()
+
+
+class SummaryBatch:
+    """
+    Consent summary generation for many procedures in one provider batch job.
+
+    Args:
+        service: AIService providing the client, prompts, parser and summary cache.
+        poll_interval_s: Seconds between batch status checks.
+    """
+
+    def __init__(self, service: AIService, poll_interval_s: float = 30.0):
+        if not service.client:
+            raise ValueError("OPENAI_API_KEY is required for batch generation.")
+        if service.summary_cache is None:
+            raise ValueError("SUMMARY_CACHE is disabled: batch summaries would not be stored.")
+        self.service = service
+        self.poll_interval_s = poll_interval_s
+
+    def pending(self, pairs: Iterable[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """Drop pairs already cached and duplicates differing only by normalization"""
+        seen, todo = set(), []
+        for procedure, language in pairs:
+            key = (normalize_query(procedure), language)
+            if key in seen:
+                continue
+            seen.add(key)
+            if self.service.summary_cache.get(procedure, language, self.service.models.largest.cache_model,
+                                              SUMMARY_PROMPT_VERSION) is None:
+                todo.append((procedure, language))
+        return todo
+
+    def build_requests(self, pairs: Iterable[Tuple[str, str]]) -> bytes:
+        """JSONL request file with one '/v1/responses' call per (procedure, language)"""
+        # Summaries always use the largest tier, as in '_summary'
+        tier, lines = self.service.models.largest, []
+        for procedure, language in pairs:
+            system_prompt, user_prompt = self.service._summary_prompts(procedure, language)
+            lines.append(json.dumps({
+                "custom_id": json.dumps([procedure, language], ensure_ascii=False),
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": {"model": tier.model, "instructions": system_prompt, "input": user_prompt,
+                         "prompt_cache_key": SUMMARY.cache_key(language), **tier.request_args},
+            }, ensure_ascii=False))
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    async def submit(self, pairs: List[Tuple[str, str]]) -> str:
+        """Upload the request file, create the batch job and return its id"""
+        client = self.service.client
+        input_file = await client.files.create(file=("summaries.jsonl", self.build_requests(pairs)),
+                                               purpose="batch")
+        batch = await client.batches.create(input_file_id=input_file.id, endpoint=BATCH_ENDPOINT,
+                                            completion_window="24h",
+                                            metadata={"job": "consent-summaries",
+                                                      "prompt_version": SUMMARY_PROMPT_VERSION})
+        logger.info(f"Submitted batch {batch.id} with {len(pairs)} requests")
+        return batch.id
+
+    async def wait(self, batch_id: str):
+        """Poll the batch job until it reaches a final status"""
+        while True:
+            batch = await self.service.client.batches.retrieve(batch_id)
+            if batch.status in FINAL_STATUSES:
+                return batch
+            counts = batch.request_counts
+            logger.info(f"Batch {batch_id} {batch.status}: "
+                        f"{counts.completed if counts else 0}/{counts.total if counts else '?'} done")
+            await asyncio.sleep(self.poll_interval_s)
+
+    async def ingest(self, batch) -> List[Dict[str, Any]]:
+        """Parse the batch output and error files into the summary cache; return per-item results"""
+        results = []
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            content = await self.service.client.files.content(file_id)
+            for line in content.text.splitlines():
+                if line.strip():
+                    results.append(await self._ingest_line(json.loads(line)))
+        return results
+
+    async def _ingest_line(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        procedure, language = json.loads(record["custom_id"])
+        result = {"procedure": procedure, "language": language, "ok": False}
+
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            error = record.get("error") or (response.get("body") or {}).get("error")
+            result["error"] = f"HTTP {response.get('status_code')}: {error}"
+            return result
+
+        # Billed whether or not the output is usable
+        body = response.get("body") or {}
+        tier = self.service.models.largest
+        await self.service.usage.record("summary", body.get("model") or tier.model, tier=tier.name, batch=True,
+                                        **llm_usage(body.get("usage")))
+
+        text = response_text(body)
+        if not self.service._parse_summary(text):
+            result["error"] = "Response is not a consent summary."
+            return result
+
+        # Same stores '_summary' reads from
+        cache_args = (procedure, language, self.service.models.largest.cache_model, SUMMARY_PROMPT_VERSION)
+        self.service.summary_cache.put(*cache_args, text)
+        if self.service.semantic_cache:
+            try:
+                _, vec = await self.service.semantic_cache.lookup(*cache_args)
+                await self.service.semantic_cache.put(*cache_args, text, vec)
+            except Exception as e:
+                logger.error(f"Semantic cache lookup failed for '{procedure}' ({language}): {e!r}")
+
+        result["ok"] = True
+        return result
+
+    async def run(self, pairs: Iterable[Tuple[str, str]], batch_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Submit (or resume 'batch_id'), wait and ingest; already cached pairs are not requested again"""
+        cached = []
+        if batch_id is None:
+            pairs = list(pairs)
+            todo = self.pending(pairs)
+            cached = [{"procedure": p, "language": l, "ok": True, "cached": True}
+                      for p, l in pairs if (p, l) not in todo]
+            if not todo:
+                return cached
+            batch_id = await self.submit(todo)
+
+        batch = await self.wait(batch_id)
+        if batch.status != "completed":
+            raise RuntimeError(f"Batch {batch_id} ended with status '{batch.status}': {batch.errors}")
+        return cached + await self.ingest(batch)
@@ -0,0 +1,80 @@
+"""
+Content-addressed blob store for binary artifacts (e.g. synthesized audio) kept out of graph state.
+
+Blobs are addressed by a handle '<sha256>.<ext>' and sharded on disk as '<root>/<2 hex>/<handle>'.
+"""
+import os
+import re
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import AsyncIterator, Callable, Optional, Tuple
+
+HANDLE_RE = re.compile(r"^[0-9a-f]{64}\.[a-z0-9]{1,8}$")
+
+
+class BlobStore:
+    """Content-addressed store on the local filesystem"""
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _file(self, handle: str) -> Path:
+        return self.root / handle[:2] / handle
+
+    def path(self, handle: str) -> Optional[Path]:
+        """Return the file holding 'handle', or None if unknown or malformed"""
+        if not HANDLE_RE.match(handle):
+            return None
+        path = self._file(handle)
+        return path if path.is_file() else None
+
+    def put(self, data: bytes, ext: str) -> str:
+        """Store 'data' and return its handle"""
+        handle = f"{hashlib.sha256(data).hexdigest()}.{ext}"
+        if self.path(handle) is None:
+            self._commit(self._spill(data), handle)
+        return handle
+
+    async def put_stream(self, chunks: AsyncIterator[bytes], ext: str) -> Tuple[str, int]:
+        """Store a stream chunk by chunk (never buffering it whole) and return (handle, size)"""
+        committed = {}
+        async for _ in self.tee(chunks, ext, lambda handle, size: committed.update(handle=handle, size=size)):
+            pass
+        return committed["handle"], committed["size"]
+
+    async def tee(self, chunks: AsyncIterator[bytes], ext: str,
+                  on_commit: Callable[[str, int], None]) -> AsyncIterator[bytes]:
+        """Yield a stream through while storing it; 'on_commit(handle, size)' runs once it completed"""
+        digest, size = hashlib.sha256(), 0
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                async for chunk in chunks:
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+                    yield chunk
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+        handle = f"{digest.hexdigest()}.{ext}"
+        self._commit(tmp, handle)
+        on_commit(handle, size)
+
+    def delete(self, handle: str):
+        if path := self.path(handle):
+            path.unlink(missing_ok=True)
+
+    def _spill(self, data: bytes) -> str:
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".part")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        return tmp
+
+    def _commit(self, tmp: str, handle: str):
+        target = self._file(handle)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp, target)
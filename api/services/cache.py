@@ -0,0 +1,203 @@
+"""
+Caches in front of the AI provider.
+
+DiskCache is a small SQLite key/value store with TTL expiry, LRU eviction and hit/miss counters.
+SummaryCache keys consent summaries by (normalized procedure, language, model, prompt version).
+AudioCache maps synthesized speech requests to blobs in a BlobStore, bounded by total size.
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .blobs import BlobStore
+
+# Paths definition
+DATA_DIR = (Path(__file__).resolve().parent / ".." / ".." / "data").resolve()
+
+
+def normalize_query(text: str) -> str:
+    """Normalize free-text procedure names so trivial variations share a cache entry"""
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    text = re.sub(r"[\s ]+", " ", text)
+    return text.strip(" \t\n.,;:!?¿¡\"'()[]")
+
+
+class DiskCache:
+    """
+    SQLite key/value store with TTL expiry and LRU eviction.
+
+    Args:
+        path: SQLite database file (shared by several caches, one table each).
+        table: Table name for this cache.
+        ttl_s: Entries older than this are treated as missing.
+        max_entries: Least recently used entries beyond this size are evicted.
+    """
+
+    def __init__(self, path: str | Path, table: str, *, ttl_s: float, max_entries: int):
+        if not re.match(r"^[a-z_]+$", table):
+            raise ValueError(f"Invalid cache table name '{table}'.")
+        self.table = table
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA busy_timeout=5000")
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                          "created_at REAL NOT NULL, accessed_at REAL NOT NULL)")
+        self.conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed_at ON {table} (accessed_at)")
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl_s:
+                self.misses += 1
+                return None
+            self.conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Any):
+        now = time.time()
+        with self.lock:
+            self.conn.execute(f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?, ?)",
+                              (key, json.dumps(value, ensure_ascii=False), now, now))
+            self.conn.execute(f"DELETE FROM {self.table} WHERE created_at < ?", (now - self.ttl_s,))
+            self.conn.execute(f"DELETE FROM {self.table} WHERE key IN (SELECT key FROM {self.table} "
+                              "ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            size = self.conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "entries": size,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0}
+
+
+class SummaryCache:
+    """Consent summary cache keyed by normalized procedure text, language, model and prompt version"""
+
+    def __init__(self, store: DiskCache):
+        self.store = store
+
+    @classmethod
+    def from_env(cls) -> Optional["SummaryCache"]:
+        """Build the cache from environment settings, or None when 'SUMMARY_CACHE' is disabled"""
+        if os.getenv("SUMMARY_CACHE", "1").strip().lower() in ("0", "false", "no", "off"):
+            return None
+        return cls(DiskCache(os.getenv("CACHE_PATH", str(DATA_DIR / "cache.sqlite")), "summaries",
+                             ttl_s=float(os.getenv("SUMMARY_CACHE_TTL_S", 7 * 24 * 3600)),
+                             max_entries=int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", 5000))))
+
+    @staticmethod
+    def key(user_query: str, language: str, model: str, prompt_version: str) -> str:
+        raw = "\x1f".join((normalize_query(user_query), language, model, prompt_version))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, user_query: str, language: str, model: str, prompt_version: str) -> Optional[str]:
+        return self.store.get(self.key(user_query, language, model, prompt_version))
+
+    def put(self, user_query: str, language: str, model: str, prompt_version: str, response: str):
+        self.store.put(self.key(user_query, language, model, prompt_version), response)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.store.stats()
+
+
+class AudioCache:
+    """
+    Text-to-Speech cache: request key -> audio blob handle, with size-bounded LRU eviction.
+
+    Args:
+        store: Blob store holding the audio files.
+        path: SQLite database file for the key index.
+        max_bytes: Least recently used audio is deleted once the cache exceeds this size.
+    """
+
+    def __init__(self, store: BlobStore, path: str | Path, *, max_bytes: int):
+        self.store = store
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA busy_timeout=5000")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS audio (key TEXT PRIMARY KEY, handle TEXT NOT NULL, "
+                          "size INTEGER NOT NULL, accessed_at REAL NOT NULL)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS audio_accessed_at ON audio (accessed_at)")
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, store: BlobStore) -> Optional["AudioCache"]:
+        """Build the cache from environment settings, or None when 'AUDIO_CACHE' is disabled"""
+        if os.getenv("AUDIO_CACHE", "1").strip().lower() in ("0", "false", "no", "off"):
+            return None
+        return cls(store, os.getenv("CACHE_PATH", str(DATA_DIR / "cache.sqlite")),
+                   max_bytes=int(os.getenv("AUDIO_CACHE_MAX_MB", 512)) * 1024 * 1024)
+
+    @staticmethod
+    def key(request: Dict[str, Any]) -> str:
+        """Hash a Text-to-Speech request (normalized text, voice, model, instructions, format)"""
+        request = {**request, "input": re.sub(r"\s+", " ", request.get("input", "")).strip()}
+        raw = json.dumps(request, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the audio handle cached for 'key', or None"""
+        with self.lock:
+            row = self.conn.execute("SELECT handle FROM audio WHERE key = ?", (key,)).fetchone()
+            if row is None or self.store.path(row[0]) is None:
+                # Blob deleted by another worker's eviction: drop the stale row
+                if row is not None:
+                    self.conn.execute("DELETE FROM audio WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            self.conn.execute("UPDATE audio SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+        return row[0]
+
+    def discard(self, key: str):
+        """Drop 'key' whose blob disappeared after 'get' returned it (counted as a miss)"""
+        with self.lock:
+            self.conn.execute("DELETE FROM audio WHERE key = ?", (key,))
+            self.hits -= 1
+            self.misses += 1
+
+    def put(self, key: str, handle: str, size: int):
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO audio VALUES (?, ?, ?, ?)", (key, handle, size, time.time()))
+            self._evict()
+
+    def _evict(self):
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM audio").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, handle, size in self.conn.execute(
+                "SELECT key, handle, size FROM audio ORDER BY accessed_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            self.conn.execute("DELETE FROM audio WHERE key = ?", (key,))
+            if not self.conn.execute("SELECT 1 FROM audio WHERE handle = ?", (handle,)).fetchone():
+                self.store.delete(handle)
+            total -= size
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            entries, size = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM audio").fetchone()
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0}
@@ -0,0 +1,361 @@
+"""
+Checkpointers for the LangGraph agent.
+
+'memory' keeps the original unbounded MemorySaver (debugging only). 'sqlite' persists checkpoints
+in a local SQLite file with TTL eviction of idle sessions, a cap on the checkpoints kept per thread
+and an LRU in-memory hot tier holding the latest checkpoint of the most recently used sessions.
+The SQLite file can be shared by several worker processes: in 'shared' mode the hot tier is only
+served after checking that no other process wrote a newer checkpoint for the session.
+"""
+import os
+import time
+import random
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    copy_checkpoint,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import MemorySaver
+
+# Paths definition
+DATA_DIR = (Path(__file__).resolve().parent / ".." / ".." / "data").resolve()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS threads_updated_at ON threads (updated_at);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+
+class SQLiteSaver(BaseCheckpointSaver[str]):
+    """
+    Bounded, persistent checkpointer backed by a local SQLite file.
+
+    Args:
+        path: SQLite database file.
+        ttl_s: Sessions idle for longer than this are deleted.
+        max_per_thread: Number of most recent checkpoints kept per thread and namespace.
+        hot_size: Number of sessions whose latest checkpoint is kept deserialized in memory.
+        evict_every_s: Minimum interval between two TTL eviction passes.
+        shared: Other processes may write to the same file (validate the hot tier before serving it).
+    """
+
+    def __init__(self, path: str | Path, *, ttl_s: float = 24 * 3600, max_per_thread: int = 2,
+                 hot_size: int = 256, evict_every_s: float = 60.0, shared: bool = True, serde=None):
+        super().__init__(serde=serde)
+        self.path = Path(path)
+        self.shared = shared
+        self.ttl_s = ttl_s
+        self.max_per_thread = max(1, max_per_thread)
+        self.hot_size = hot_size
+        self.evict_every_s = evict_every_s
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA busy_timeout=5000")
+        self.conn.executescript(SCHEMA)
+
+        self.lock = threading.RLock()
+        self.hot: "OrderedDict[Tuple[str, str], CheckpointTuple]" = OrderedDict()
+        self.last_eviction = 0.0
+
+    # --- Hot tier ---
+    def _hot_get(self, key: Tuple[str, str]) -> Optional[CheckpointTuple]:
+        with self.lock:
+            saved = self.hot.get(key)
+            if saved is None:
+                return None
+            self.hot.move_to_end(key)
+        return saved._replace(checkpoint=copy_checkpoint(saved.checkpoint))
+
+    def _hot_put(self, key: Tuple[str, str], saved: CheckpointTuple):
+        if self.hot_size <= 0:
+            return
+        with self.lock:
+            self.hot[key] = saved
+            self.hot.move_to_end(key)
+            while len(self.hot) > self.hot_size:
+                self.hot.popitem(last=False)
+
+    def _hot_current(self, saved: CheckpointTuple) -> bool:
+        """True when 'saved' is still the latest checkpoint on disk, without pending writes"""
+        cfg = saved.config["configurable"]
+        with self.lock:
+            latest = self.conn.execute(
+                "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                "ORDER BY checkpoint_id DESC LIMIT 1", (cfg["thread_id"], cfg["checkpoint_ns"])).fetchone()
+            if latest is None or latest[0] != cfg["checkpoint_id"]:
+                return False
+            return self.conn.execute(
+                "SELECT 1 FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? LIMIT 1",
+                (cfg["thread_id"], cfg["checkpoint_ns"], cfg["checkpoint_id"])).fetchone() is None
+
+    def _hot_drop(self, thread_id: str):
+        with self.lock:
+            for key in [k for k in self.hot if k[0] == thread_id]:
+                del self.hot[key]
+
+    # --- Storage helpers ---
+    def _row_to_tuple(self, row) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id, parent_id, type_, checkpoint, metadata_type, metadata = row
+        writes = self.conn.execute(
+            "SELECT task_id, channel, type, value FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id)).fetchall()
+
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id,
+                                     "checkpoint_ns": checkpoint_ns,
+                                     "checkpoint_id": checkpoint_id}},
+            checkpoint=self.serde.loads_typed((type_, checkpoint)),
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=({"configurable": {"thread_id": thread_id,
+                                             "checkpoint_ns": checkpoint_ns,
+                                             "checkpoint_id": parent_id}}
+                           if parent_id else None),
+            pending_writes=[(task_id, channel, self.serde.loads_typed((t, v)))
+                            for task_id, channel, t, v in writes],
+        )
+
+    def _touch(self, thread_id: str):
+        now = time.time()
+        self.conn.execute("INSERT INTO threads (thread_id, updated_at) VALUES (?, ?) "
+                          "ON CONFLICT(thread_id) DO UPDATE SET updated_at = excluded.updated_at",
+                          (thread_id, now))
+        if now - self.last_eviction >= self.evict_every_s:
+            self.last_eviction = now
+            self.evict_idle(now)
+
+    def _trim(self, thread_id: str, checkpoint_ns: str):
+        keep = ("SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                "ORDER BY checkpoint_id DESC LIMIT ?")
+        args = (thread_id, checkpoint_ns, thread_id, checkpoint_ns, self.max_per_thread)
+        self.conn.execute("DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                          f"AND checkpoint_id NOT IN ({keep})", args)
+        self.conn.execute("DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? "
+                          f"AND checkpoint_id NOT IN ({keep})", args)
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Delete every session idle for longer than 'ttl_s'. Returns the number of sessions deleted."""
+        cutoff = (now or time.time()) - self.ttl_s
+        with self.lock:
+            expired = [r[0] for r in self.conn.execute("SELECT thread_id FROM threads WHERE updated_at < ?",
+                                                       (cutoff,))]
+            for thread_id in expired:
+                self.delete_thread(thread_id)
+        return len(expired)
+
+    # --- BaseCheckpointSaver interface ---
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+
+        # Serve the latest checkpoint of active sessions from memory (skips deserialization)
+        if not checkpoint_id and (saved := self._hot_get((thread_id, checkpoint_ns))):
+            if not self.shared or self._hot_current(saved):
+                return saved
+
+        query = ("SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+                 "metadata_type, metadata FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?")
+        with self.lock:
+            if checkpoint_id:
+                row = self.conn.execute(query + " AND checkpoint_id = ?",
+                                        (thread_id, checkpoint_ns, checkpoint_id)).fetchone()
+            else:
+                row = self.conn.execute(query + " ORDER BY checkpoint_id DESC LIMIT 1",
+                                        (thread_id, checkpoint_ns)).fetchone()
+            if row is None:
+                return None
+            saved = self._row_to_tuple(row)
+
+        if not checkpoint_id and not saved.pending_writes:
+            self._hot_put((thread_id, checkpoint_ns), saved._replace(checkpoint=copy_checkpoint(saved.checkpoint)))
+        return saved
+
+    def list(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+             before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        query = ("SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+                 "metadata_type, metadata FROM checkpoints")
+        where, args = [], []
+        if config:
+            where.append("thread_id = ?")
+            args.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                where.append("checkpoint_ns = ?")
+                args.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                where.append("checkpoint_id = ?")
+                args.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            where.append("checkpoint_id < ?")
+            args.append(before_id)
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY checkpoint_id DESC"
+
+        matches = []
+        with self.lock:
+            for row in self.conn.execute(query, args).fetchall():
+                if limit is not None and len(matches) >= limit:
+                    break
+                saved = self._row_to_tuple(row)
+                if filter and not all(saved.metadata.get(k) == v for k, v in filter.items()):
+                    continue
+                matches.append(saved)
+        yield from matches
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        parent_id = config["configurable"].get("checkpoint_id")
+        metadata = get_checkpoint_metadata(config, metadata)
+        type_, payload = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_payload = self.serde.dumps_typed(metadata)
+
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute("INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                  (thread_id, checkpoint_ns, checkpoint["id"], parent_id, type_, payload,
+                                   metadata_type, metadata_payload))
+                self._trim(thread_id, checkpoint_ns)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            self._touch(thread_id)
+
+        next_config = {"configurable": {"thread_id": thread_id,
+                                        "checkpoint_ns": checkpoint_ns,
+                                        "checkpoint_id": checkpoint["id"]}}
+        self._hot_put((thread_id, checkpoint_ns), CheckpointTuple(
+            config=next_config,
+            checkpoint=copy_checkpoint(checkpoint),
+            metadata=metadata,
+            parent_config=({"configurable": {"thread_id": thread_id,
+                                             "checkpoint_ns": checkpoint_ns,
+                                             "checkpoint_id": parent_id}}
+                           if parent_id else None),
+            pending_writes=[],
+        ))
+        return next_config
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                   task_path: str = "") -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+
+        # Regular writes are only stored once, special writes (errors, interrupts) are replaced
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, payload = self.serde.dumps_typed(value)
+            rows.append((thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx),
+                         channel, type_, payload, task_path))
+        verb = "INSERT OR REPLACE" if all(channel in WRITES_IDX_MAP for channel, _ in writes) else "INSERT OR IGNORE"
+
+        with self.lock:
+            self.conn.executemany(f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self.hot.pop((thread_id, checkpoint_ns), None)
+            self._touch(thread_id)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self.lock:
+            for table in ("checkpoints", "writes", "threads"):
+                self.conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            self._hot_drop(thread_id)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        if not self.shared and not get_checkpoint_id(config):
+            key = (config["configurable"]["thread_id"], config["configurable"].get("checkpoint_ns", ""))
+            if saved := self._hot_get(key):
+                return saved
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+                    before: Optional[RunnableConfig] = None,
+                    limit: Optional[int] = None) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: [*self.list(config, filter=filter, before=before, limit=limit)])
+        for item in items:
+            yield item
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                          task_path: str = "") -> None:
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+
+def make_checkpointer() -> BaseCheckpointSaver:
+    """
+    Build the checkpointer selected by the 'CHECKPOINTER' environment variable ('sqlite' | 'memory').
+    'CHECKPOINT_SHARED=0' skips the cross-process hot tier check when a single process owns the file.
+    """
+    kind = os.getenv("CHECKPOINTER", "sqlite").strip().lower()
+    shared = os.getenv("CHECKPOINT_SHARED", "1").strip().lower() not in ("0", "false", "no", "off")
+    if kind == "memory":
+        return MemorySaver()
+    if kind == "sqlite":
+        return SQLiteSaver(os.getenv("CHECKPOINT_PATH", str(DATA_DIR / "checkpoints.sqlite")),
+                           ttl_s=float(os.getenv("CHECKPOINT_TTL_S", 24 * 3600)),
+                           max_per_thread=int(os.getenv("CHECKPOINT_MAX_PER_THREAD", 2)),
+                           hot_size=int(os.getenv("CHECKPOINT_HOT_SIZE", 256)),
+                           shared=shared)
+    raise ValueError(f"Unknown checkpointer '{kind}'. Use 'sqlite' or 'memory'.")
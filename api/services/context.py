@@ -0,0 +1,151 @@
+"""
+Token-budgeted consent context for Q&A prompts.
+
+Each consent context section and the conversation recap gets a token budget. List sections (risks,
+alternatives) are ranked by BM25 relevance to the question and filled with the best-scoring bullets
+that fit, so a question about bleeding keeps the bleeding risk in view however long the other bullets
+are; text sections are cut at the budget and the recap keeps its most recent lines.
+
+Tokens are counted locally with a regex approximation of the provider's BPE tokenizer (words of up to
+eight characters count as one token, longer ones as one per eight characters, punctuation as one),
+which errs on the high side for English and Swedish prose.
+"""
+import os
+import re
+import math
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence
+
+from .prompts import QA_CONTEXT
+
+_PIECE = re.compile(r"\w+|[^\w\s]")
+_TERM = re.compile(r"\w{2,}")
+
+# Function words ignored by the ranking (English and Swedish)
+STOPWORDS = frozenset("""
+a an and are as at be but by can do does for from have how i if in is it my of on or so that the there this
+to was what when where which who why will with would you your
+att av de den det detta du eller en ett för har hur i jag kan med min mitt när och om på som till vad var
+vilka vill är
+""".split())
+
+# Tokens per section (the title is always kept)
+DEFAULT_BUDGETS = {"overview": 100, "common_risks": 80, "rare_risks": 50, "alternatives": 40, "passages": 250,
+                   "history": 150}
+
+
+def count_tokens(text: str) -> int:
+    """Approximate provider token count of 'text'"""
+    return sum(1 + (len(piece) - 1) // 8 for piece in _PIECE.findall(text))
+
+
+def terms(text: str) -> List[str]:
+    """Lowercased search terms, cut to 6 characters as a crude stemmer ("infections" ~ "infection")"""
+    return [t[:6] for t in _TERM.findall(text.lower()) if t not in STOPWORDS]
+
+
+def bm25_scores(query: str, docs: Sequence[str], k1: float = 1.2, b: float = 0.75) -> List[float]:
+    """BM25 score of every document for 'query', with statistics taken from 'docs' itself"""
+    tokenized = [terms(doc) for doc in docs]
+    if not tokenized:
+        return []
+    avg_len = sum(len(t) for t in tokenized) / len(tokenized) or 1.0
+    df = Counter(term for t in tokenized for term in set(t))
+    query_terms = set(terms(query))
+    scores = []
+    for t in tokenized:
+        tf, score = Counter(t), 0.0
+        for term in query_terms & tf.keys():
+            idf = math.log(1 + (len(docs) - df[term] + 0.5) / (df[term] + 0.5))
+            score += idf * tf[term] * (k1 + 1) / (tf[term] + k1 * (1 - b + b * len(t) / avg_len))
+        scores.append(score)
+    return scores
+
+
+def truncate(text: str, budget: int) -> str:
+    """Longest prefix of 'text' (whole words) within 'budget' tokens"""
+    if count_tokens(text) <= budget:
+        return text
+    words, used = [], 0
+    for word in text.split():
+        cost = count_tokens(word)
+        if used + cost > budget - 1:
+            break
+        words.append(word)
+        used += cost
+    return " ".join(words) + "…" if words else ""
+
+
+class ContextBuilder:
+    """
+    Builds the Q&A consent context fields and recap within per-section token budgets.
+
+    Args:
+        budgets: Tokens per section ('overview', 'common_risks', 'rare_risks', 'alternatives', 'passages',
+            'history').
+    """
+
+    def __init__(self, budgets: Optional[Dict[str, int]] = None):
+        self.budgets = {**DEFAULT_BUDGETS, **(budgets or {})}
+
+    @classmethod
+    def from_env(cls) -> "ContextBuilder":
+        return cls({section: int(os.getenv(f"QA_BUDGET_{section.upper()}", default))
+                    for section, default in DEFAULT_BUDGETS.items()})
+
+    def select(self, question: str, bullets: Sequence[str], budget: int) -> List[str]:
+        """Most relevant bullets that fit in 'budget', in summary order (summary order breaks ties)"""
+        scores = bm25_scores(question, bullets)
+        ranked = sorted(range(len(bullets)), key=lambda i: (-scores[i], i))
+        chosen, used = [], 0
+        for i in ranked:
+            cost = count_tokens(bullets[i]) + 1
+            if used + cost <= budget:
+                chosen.append(i)
+                used += cost
+        if not chosen and ranked:
+            # Not even one bullet fits: keep the best one, cut
+            return [truncate(bullets[ranked[0]], budget)]
+        return [bullets[i] for i in sorted(chosen)]
+
+    def passages(self, passages: Sequence[Dict[str, Any]]) -> str:
+        """Retrieved leaflet passages, best first, within the passages budget"""
+        lines, used = [], 0
+        for passage in passages:
+            line = f"- [{passage['title']}] {passage['text']}"
+            cost = count_tokens(line) + 1
+            if used + cost > self.budgets["passages"]:
+                if not lines:
+                    lines.append(truncate(line, self.budgets["passages"]))
+                break
+            lines.append(line)
+            used += cost
+        return "\n".join(lines)
+
+    def history(self, history: str) -> str:
+        """Most recent lines of the recap within the history budget"""
+        lines, used = [], 0
+        for line in reversed(history.splitlines()):
+            cost = count_tokens(line) + 1
+            if used + cost > self.budgets["history"]:
+                if not lines:
+                    lines.append(truncate(line, self.budgets["history"]))
+                break
+            lines.append(line)
+            used += cost
+        return "\n".join(reversed(lines))
+
+    def fields(self, summary: Optional[Dict[str, Any]], language: str, question: str) -> Dict[str, str]:
+        """Consent context fields of a parsed summary for 'question'"""
+        summary = summary or {}
+        fields = {}
+        for field, section in QA_CONTEXT.get(language, {}).items():
+            value = summary.get(section, "")
+            budget = self.budgets.get(field)
+            if isinstance(value, list):
+                value = self.select(question, value, budget) if budget else value
+                value = (" " if field in ("title", "overview") else ", ").join(value)
+            elif budget:
+                value = truncate(str(value), budget)
+            fields[field] = value
+        return fields
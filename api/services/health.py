@@ -0,0 +1,154 @@
+"""
+Provider health: a background prober with cached status and a circuit breaker.
+
+The prober calls a cheap provider endpoint every 'interval_s' in the background and caches the
+outcome. Graph nodes consult the cached status ('available') before calling the LLM, which never adds
+a network round-trip to the request path; while the provider is down they fail fast instead of
+waiting for a timeout. While the breaker is not closed the next probe runs after 'reset_s' rather
+than 'interval_s', so it is the half-open trial and recovery takes no longer than 'Retry-After'.
+"""
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# Define logger
+logger = logging.getLogger(__name__)
+
+# Answer given instead of calling the provider while it is unavailable
+UNAVAILABLE_MESSAGE = {
+    "English": "The assistant is temporarily unavailable. Please try again in a moment or ask the staff for help.",
+    "Svenska": "Assistenten är tillfälligt otillgänglig. Försök igen om en stund eller be personalen om hjälp.",
+}
+
+
+class ProviderUnavailable(RuntimeError):
+    """Raised instead of calling the provider while its circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after 'failure_threshold' consecutive failures; open -> half-open after 'reset_s',
+    where the next outcome closes it again or re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_s: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_s = reset_s
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_s else "open"
+
+    def allow(self) -> bool:
+        """Whether a call may be attempted (half-open lets calls probe the provider again)"""
+        return self.state != "open"
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold or self.opened_at is not None:
+            self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"state": self.state, "failures": self.failures,
+                "open_for_s": round(time.monotonic() - self.opened_at, 1) if self.opened_at else None}
+
+
+class HealthProber:
+    """
+    Cached provider status refreshed by a background task.
+
+    Args:
+        probe: Async callable returning "available" when the provider answered.
+        interval_s: Seconds between probes.
+        timeout_s: Probe deadline; slower answers count as failures.
+        breaker: Circuit breaker fed by the probe outcomes.
+    """
+
+    def __init__(self, probe: Optional[Callable[[], Awaitable[str]]], *, interval_s: float = 30.0,
+                 timeout_s: float = 5.0, breaker: Optional[CircuitBreaker] = None):
+        self.probe = probe
+        self.interval_s = interval_s
+        self.timeout_s = timeout_s
+        self.breaker = breaker or CircuitBreaker()
+        self.status = "unknown" if probe else "unavailable"
+        self.checked_at: Optional[float] = None
+        self.latency_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls, probe: Optional[Callable[[], Awaitable[str]]]) -> "HealthProber":
+        return cls(probe,
+                   interval_s=float(os.getenv("HEALTH_PROBE_INTERVAL_S", 30)),
+                   timeout_s=float(os.getenv("HEALTH_PROBE_TIMEOUT_S", 5)),
+                   breaker=CircuitBreaker(failure_threshold=int(os.getenv("BREAKER_FAILURE_THRESHOLD", 3)),
+                                          reset_s=float(os.getenv("BREAKER_RESET_S", 30))))
+
+    @property
+    def available(self) -> bool:
+        """Cached verdict for the hot path (no network call)"""
+        return self.status != "unavailable" and self.breaker.allow()
+
+    def ensure_available(self):
+        if not self.available:
+            raise ProviderUnavailable(f"AI provider unavailable ({self.error or self.status}).")
+
+    async def check(self) -> str:
+        """Probe the provider once and update the cached status"""
+        if self.probe is None:
+            return self.status
+
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(self.probe(), self.timeout_s)
+            self.error = None if result == "available" else f"probe returned '{result}'"
+        except asyncio.TimeoutError:
+            result, self.error = "timeout", f"no answer within {self.timeout_s}s"
+        except Exception as e:
+            result, self.error = "error", f"{type(e).__name__}: {e}"
+
+        self.latency_ms = round((time.perf_counter() - start) * 1000, 1)
+        self.checked_at = time.time()
+        if result == "available":
+            self.breaker.record_success()
+            self.status = "available"
+        else:
+            self.breaker.record_failure()
+            self.status = "degraded" if self.breaker.allow() else "unavailable"
+            logger.warning(f"Provider health probe failed: {self.error}")
+        return self.status
+
+    # Lifecycle
+    def start(self):
+        if self.probe is not None and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="health-prober")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await self.check()
+            closed = self.breaker.state == "closed"
+            await asyncio.sleep(self.interval_s if closed else min(self.interval_s, self.breaker.reset_s))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"status": self.status, "available": self.available, "checked_at": self.checked_at,
+                "latency_ms": self.latency_ms, "error": self.error, "breaker": self.breaker.snapshot(),
+                "probe_interval_s": self.interval_s}
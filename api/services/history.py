@@ -0,0 +1,73 @@
+"""
+Bounded conversation history for Q&A.
+
+The graph state keeps the last 'HISTORY_TURNS' question/answer turns in a ring ('turns') and folds
+every turn that drops out of it into a rolling recap ('recap'): one compressed line per turn (the
+question and the first sentence of the answer), oldest lines dropped beyond 'HISTORY_RECAP_CHARS'.
+The consent summary is stored once in the state and turns only refer to it, so prompt and checkpoint
+size stay constant however long the session runs.
+"""
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Turn whose answer is the consent summary stored in the state
+SUMMARY_REF = "@summary"
+
+_SENTENCE = re.compile(r"(?<=[.!?])\s")
+
+
+def shorten(text: str, limit: int) -> str:
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+class History:
+    """
+    Ring of recent turns plus a rolling recap of older ones.
+
+    Args:
+        max_turns: Turns kept verbatim.
+        recap_chars: Maximum length of the recap.
+        line_chars: Maximum length of one compressed turn in the recap.
+    """
+
+    def __init__(self, max_turns: int = 3, recap_chars: int = 600, line_chars: int = 160):
+        self.max_turns = max(1, max_turns)
+        self.recap_chars = recap_chars
+        self.line_chars = line_chars
+
+    @classmethod
+    def from_env(cls) -> "History":
+        return cls(max_turns=int(os.getenv("HISTORY_TURNS", 3)),
+                   recap_chars=int(os.getenv("HISTORY_RECAP_CHARS", 600)))
+
+    def compress(self, turn: Dict[str, str]) -> str:
+        """One recap line: the question and the first sentence of the answer"""
+        answer = turn.get("a", "")
+        if answer == SUMMARY_REF:
+            answer = "consent summary given"
+        else:
+            answer = _SENTENCE.split(" ".join(answer.split()), 1)[0]
+        return shorten(f"{shorten(turn.get('q', ''), self.line_chars // 2)} -> {answer}", self.line_chars)
+
+    def add(self, turns: Optional[List[Dict[str, str]]], recap: Optional[str],
+            question: str, answer: str) -> Tuple[List[Dict[str, str]], str]:
+        """Append a turn, folding the turns that leave the ring into the recap"""
+        turns = [*(turns or []), {"q": question, "a": answer}]
+        lines = (recap or "").splitlines()
+        while len(turns) > self.max_turns:
+            lines.append(self.compress(turns.pop(0)))
+        while lines and len("\n".join(lines)) > self.recap_chars:
+            lines.pop(0)
+        return turns, "\n".join(lines)
+
+    @staticmethod
+    def render(turns: Optional[List[Dict[str, str]]], recap: Optional[str]) -> str:
+        """History as prompt text (the summary itself is part of the prompt's context)"""
+        parts = [f"Earlier: {line}" for line in (recap or "").splitlines()]
+        for turn in turns or []:
+            answer = turn.get("a", "")
+            parts.append(f"Q: {turn.get('q', '')}")
+            parts.append("A: (the consent summary above)" if answer == SUMMARY_REF else f"A: {answer}")
+        return "\n".join(parts)
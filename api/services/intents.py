@@ -0,0 +1,139 @@
+"""
+Deterministic fast path for inputs that are not a procedure or a question.
+
+Greetings, thanks and consent phrases (English and Swedish, whatever the session language) are
+recognized by anchored regular expressions over the whole normalized input and answered with a fixed
+reply in the session language, without calling the LLM. Anything else, including a greeting followed
+by a procedure ("Hi, I'm having a knee arthroscopy"), goes to the LLM as before.
+
+Optionally ('INTENT_MODEL=1') short inputs the lexicon missed ("helloo there", "thx a lot!!") are
+matched against example phrases with the local hashing embedding; the threshold is high on purpose,
+as sending a procedure to the fast path is worse than one unneeded LLM call.
+"""
+import os
+import re
+import unicodedata
+from typing import Optional
+
+import numpy as np
+
+from .semantic_cache import hashing_embedding
+
+INTENTS = ("greeting", "thanks", "consent")
+
+_LEAD = r"(?:(?:ok(?:ay)?|okej|yes|yeah|ja|great|perfect|bra|toppen|super)\s+)?"
+
+LEXICON = {
+    "greeting": [
+        r"(?:hi+|hel+o+|hey+|hiya|howdy|greetings|good\s+(?:morning|afternoon|evening|day))"
+        r"(?:\s+(?:there|again|everyone|doctor|doc))*(?:\s+how\s+are\s+you(?:\s+doing)?(?:\s+today)?)?",
+        r"(?:hej+|hejsan|hallå+|tjena|tja|tjenare|goddag|god\s+(?:morgon|middag|kväll|dag))"
+        r"(?:\s+(?:hej|svejsan|där|på\s+dig|igen))*(?:\s+hur\s+mår\s+du(?:\s+idag)?)?",
+    ],
+    "thanks": [
+        r"(?:thanks|thank\s+you|thx|ty|many\s+thanks|cheers)(?:\s+(?:so|very)\s+much|\s+a\s+lot)?"
+        r"(?:\s+for\s+(?:your|the|this)\s+(?:help|information|info|explanation|answer))?",
+        r"(?:tack|tackar|tack\s+så\s+mycket|tusen\s+tack|stort\s+tack|tack\s+ska\s+du\s+ha)"
+        r"(?:\s+för\s+(?:hjälpen|informationen|förklaringen|svaret))?",
+    ],
+    "consent": [
+        r"(?:i\s*)?(?:consent|agree|accept|give\s+(?:my\s+)?consent|(?:am|'m)\s+ready\s+to\s+(?:sign|consent)"
+        r"|want\s+to\s+(?:sign|consent|give\s+(?:my\s+)?consent))(?:\s+to\s+(?:the|this)\s+(?:procedure|operation|surgery))?",
+        r"(?:jag\s+)?(?:samtycker|godkänner|accepterar|ger\s+mitt\s+samtycke|vill\s+(?:samtycka|ge\s+mitt\s+samtycke"
+        r"|skriva\s+under)|är\s+redo\s+att\s+(?:samtycka|skriva\s+under))"
+        r"(?:\s+till\s+(?:ingreppet|operationen|behandlingen))?",
+    ],
+}
+_PATTERNS = {intent: re.compile(rf"{_LEAD}(?:{'|'.join(patterns)})") for intent, patterns in LEXICON.items()}
+
+# Example phrases for the optional embedding match
+EXAMPLES = {
+    "greeting": ["hello", "hi there", "good morning", "hey", "hej", "hejsan", "hallå", "god morgon"],
+    "thanks": ["thank you", "thanks a lot", "thank you very much", "tack", "tack så mycket", "tusen tack"],
+    "consent": ["i consent", "i agree", "i give my consent", "jag samtycker", "jag godkänner"],
+}
+
+REPLIES = {
+    "English": {
+        "greeting": "Hello! I'm your consent assistant. Tell me which procedure you are going to have (for example "
+                    "\"knee arthroscopy\") and I will explain in plain language what it involves, its benefits, "
+                    "risks and alternatives. You can ask me questions at any time.",
+        "greeting_after": "Hello again! Do you have any more questions about your procedure? Just ask. When you "
+                          "feel confident with the information, click the 'Save consent' button.",
+        "thanks": "You're welcome! Tell me which procedure you are going to have and I will explain it.",
+        "thanks_after": "You're welcome! If you have more questions, just ask. When you feel confident with the "
+                        "information, click the 'Save consent' button.",
+        "consent": "Before giving your consent, tell me which procedure you are going to have so I can explain it "
+                   "first.",
+        "consent_after": "Thank you. To record your consent, click the 'Save consent' button and choose how you "
+                         "want to confirm it.",
+    },
+    "Svenska": {
+        "greeting": "Hej! Jag är din samtyckesassistent. Berätta vilket ingrepp du ska genomgå (till exempel "
+                    "\"knäartroskopi\") så förklarar jag med enkla ord vad det innebär, dess fördelar, risker och "
+                    "alternativ. Du kan ställa frågor när som helst.",
+        "greeting_after": "Hej igen! Har du fler frågor om ditt ingrepp? Det är bara att fråga. När du känner dig "
+                          "trygg med informationen kan du klicka på knappen 'Spara samtycke'.",
+        "thanks": "Varsågod! Berätta vilket ingrepp du ska genomgå så förklarar jag det.",
+        "thanks_after": "Varsågod! Om du har fler frågor är det bara att fråga. När du känner dig trygg med "
+                        "informationen kan du klicka på knappen 'Spara samtycke'.",
+        "consent": "Innan du ger ditt samtycke, berätta vilket ingrepp du ska genomgå så att jag kan förklara det "
+                   "först.",
+        "consent_after": "Tack. För att registrera ditt samtycke, klicka på knappen 'Spara samtycke' och välj hur "
+                         "du vill bekräfta det.",
+    },
+}
+
+
+def normalize(text: str) -> str:
+    """Lowercase, without punctuation, emoji or repeated whitespace"""
+    text = unicodedata.normalize("NFC", text).lower().replace("’", "'")
+    text = "".join(c if c.isalnum() or c in " '" else " " for c in text)
+    return " ".join(text.split())
+
+
+class IntentClassifier:
+    """
+    Recognizes inputs answered without the LLM.
+
+    Args:
+        enabled: Whether the fast path is used at all.
+        model: Also match short inputs against 'EXAMPLES' by embedding similarity.
+        threshold: Minimum cosine similarity of the embedding match.
+        max_words: Longer inputs are never matched by embedding.
+    """
+
+    def __init__(self, enabled: bool = True, model: bool = False, threshold: float = 0.8, max_words: int = 5):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.max_words = max_words
+        self.examples = None
+        if model:
+            self.examples = [(intent, hashing_embedding(example)) for intent, examples in EXAMPLES.items()
+                             for example in examples]
+
+    @classmethod
+    def from_env(cls) -> "IntentClassifier":
+        flag = lambda name, default: os.getenv(name, default).strip().lower() not in ("0", "false", "no", "off")
+        return cls(enabled=flag("INTENT_FAST_PATH", "1"), model=flag("INTENT_MODEL", "0"),
+                   threshold=float(os.getenv("INTENT_MODEL_THRESHOLD", 0.8)))
+
+    def classify(self, text: Optional[str]) -> Optional[str]:
+        """'greeting', 'thanks', 'consent' or None (procedure text or a question: needs the LLM)"""
+        if not self.enabled or not text:
+            return None
+        text = normalize(text)
+        for intent, pattern in _PATTERNS.items():
+            if pattern.fullmatch(text):
+                return intent
+        if self.examples and text and len(text.split()) <= self.max_words:
+            vec = hashing_embedding(text)
+            intent, score = max(((i, float(np.dot(vec, e))) for i, e in self.examples), key=lambda x: x[1])
+            if score >= self.threshold:
+                return intent
+        return None
+
+    @staticmethod
+    def reply(intent: str, language: str, has_summary: bool) -> str:
+        replies = REPLIES.get(language, REPLIES["English"])
+        return replies.get(f"{intent}_after" if has_summary else intent, replies[intent])
@@ -0,0 +1,185 @@
+"""
+Compressed, columnar archive of closed audit log days.
+
+A closed day ('data/logs/<day>.jsonl' whose UTC day ended more than a grace period ago) is rewritten
+as '<archive_dir>/<day>.parquet': fixed typed columns for the keys every record repeats, zstd
+compression, and row groups in append order so timestamp statistics prune time-range scans. Keys
+outside the schema are kept in a JSON 'extra' column, so records round-trip without loss.
+
+'iter_logs' reads archived and live days uniformly (live days through the LogIndex).
+"""
+import os
+import json
+import time
+import itertools
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from .log_index import DAY_RE, LogIndex, to_utc
+
+SCHEMA_VERSION = "1"
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+TS_TYPE = pa.timestamp("us", tz="UTC")
+TEXT_COLUMNS = ["session_id", "user_text", "answer", "patient_name", "method", "timestamp"]
+SCHEMA = pa.schema([("kind", pa.string()), ("ts", TS_TYPE)] + [(c, pa.string()) for c in TEXT_COLUMNS]
+                   + [("extra", pa.string())], metadata={"schema_version": SCHEMA_VERSION})
+
+
+def to_row(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Split a log record into schema columns and a JSON 'extra' remainder"""
+    rest = dict(record)
+    row = {"kind": str(rest.pop("kind", "")), "ts": datetime.fromisoformat(rest.pop("ts"))}
+    for column in TEXT_COLUMNS:
+        if isinstance(rest.get(column), str):
+            row[column] = rest.pop(column)
+    row["extra"] = json.dumps(rest, ensure_ascii=False) if rest else None
+    return row
+
+
+def from_batch(batch: pa.RecordBatch) -> Iterator[Dict[str, Any]]:
+    """Rebuild log records column by column (per-row conversion of tz-aware timestamps is slow)"""
+    columns = {name: batch.column(name).to_pylist() for name in ["kind"] + TEXT_COLUMNS + ["extra"]}
+    micros = batch.column("ts").cast(pa.int64()).to_pylist()
+    for i, us in enumerate(micros):
+        record = {"kind": columns["kind"][i], "ts": (EPOCH + timedelta(microseconds=us)).isoformat()}
+        record.update((c, columns[c][i]) for c in TEXT_COLUMNS if columns[c][i] is not None)
+        if columns["extra"][i]:
+            record.update(json.loads(columns["extra"][i]))
+        yield record
+
+
+class LogArchive:
+    """
+    Parquet archive of daily audit logs.
+
+    Args:
+        log_dir: Directory holding the live '<day>.jsonl' files.
+        archive_dir: Directory for '<day>.parquet' files (defaults to 'archive' inside 'log_dir').
+        row_group_size: Records per row group (unit of time-range pruning).
+    """
+
+    def __init__(self, log_dir: str | Path, archive_dir: Optional[str | Path] = None, *,
+                 row_group_size: int = 65536, compression_level: int = 9):
+        self.log_dir = Path(log_dir)
+        self.archive_dir = Path(archive_dir) if archive_dir else self.log_dir / "archive"
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        self.row_group_size = row_group_size
+        self.compression_level = compression_level
+
+    @classmethod
+    def from_env(cls, log_dir: str | Path) -> "LogArchive":
+        return cls(log_dir, os.getenv("LOG_ARCHIVE_DIR") or None)
+
+    def days(self) -> List[str]:
+        """Archived days, oldest first"""
+        return sorted(p.stem for p in self.archive_dir.glob("*.parquet") if DAY_RE.match(p.stem))
+
+    def closed_days(self, older_than: timedelta = timedelta(hours=1)) -> List[str]:
+        """Live days whose UTC day ended more than 'older_than' ago (no writer appends to them any more)"""
+        cutoff = (datetime.now(timezone.utc) - older_than).date().isoformat()
+        return sorted(p.stem for p in self.log_dir.glob("*.jsonl") if DAY_RE.match(p.stem) and p.stem < cutoff)
+
+    # Archiving
+    def archive(self, day: str, *, keep_source: bool = False) -> Dict[str, Any]:
+        """
+        Convert one closed day to Parquet and (unless 'keep_source') delete the JSONL file. Late records
+        merged into an earlier archive always have their JSONL file deleted, as it no longer holds the
+        whole day.
+        """
+        source = self.log_dir / f"{day}.jsonl"
+        target = self.archive_dir / f"{day}.parquet"
+        tmp = target.with_suffix(".parquet.part")
+        keep_source = keep_source and not (target.is_file() and not self.source_kept(day))
+        schema = SCHEMA.with_metadata({**SCHEMA.metadata, b"source_kept": b"1" if keep_source else b"0"})
+        start = time.perf_counter()
+
+        # Records appended after a previous archive whose source was deleted are merged into it
+        merge = target.is_file() and not self.source_kept(day)
+        rows, rejected = 0, []
+        try:
+            with pq.ParquetWriter(tmp, schema, compression="zstd", compression_level=self.compression_level) as writer, \
+                    open(source, encoding="utf-8") as f:
+                if merge:
+                    for batch in pq.ParquetFile(target).iter_batches(batch_size=self.row_group_size):
+                        writer.write_table(pa.Table.from_batches([batch]).cast(schema), self.row_group_size)
+                        rows += batch.num_rows
+
+                for lines in iter(lambda: list(itertools.islice(f, self.row_group_size)), []):
+                    chunk = []
+                    for line in lines:
+                        try:
+                            chunk.append(to_row(json.loads(line)))
+                        except (ValueError, KeyError, TypeError):
+                            if line.strip():
+                                rejected.append(line if line.endswith("\n") else line + "\n")
+                    if chunk:
+                        writer.write_table(pa.Table.from_pylist(chunk, schema=schema), self.row_group_size)
+                        rows += len(chunk)
+            os.replace(tmp, target)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+
+        # Lines that do not fit the schema are kept verbatim next to the archive (rewritten when the
+        # whole day was read again, appended for merged late records)
+        rejected_path = self.archive_dir / f"{day}.rejected.jsonl"
+        if rejected:
+            with open(rejected_path, "a" if merge else "w", encoding="utf-8") as f:
+                f.writelines(rejected)
+        elif not merge:
+            rejected_path.unlink(missing_ok=True)
+
+        stats = {"day": day, "records": rows, "rejected": len(rejected), "jsonl_bytes": source.stat().st_size,
+                 "parquet_bytes": target.stat().st_size, "source_kept": keep_source,
+                 "seconds": round(time.perf_counter() - start, 3)}
+        if not keep_source:
+            source.unlink()
+        return stats
+
+    # Reading
+    def source_kept(self, day: str) -> bool:
+        """Whether the JSONL file of an archived day was kept (then it still holds every archived record)"""
+        metadata = pq.read_schema(self.archive_dir / f"{day}.parquet").metadata or {}
+        return metadata.get(b"source_kept") != b"0"
+
+    def read(self, day: str, session_id: Optional[str] = None, kind: Optional[str] = None,
+             since: Optional[datetime] = None, until: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        """Yield the records of an archived day in append order, pushing filters down to Parquet"""
+        condition = None
+        for expr in (ds.field("session_id") == session_id if session_id is not None else None,
+                     ds.field("kind") == kind if kind is not None else None,
+                     ds.field("ts") >= pa.scalar(to_utc(since), type=TS_TYPE) if since else None,
+                     ds.field("ts") <= pa.scalar(to_utc(until), type=TS_TYPE) if until else None):
+            if expr is not None:
+                condition = expr if condition is None else condition & expr
+
+        dataset = ds.dataset(self.archive_dir / f"{day}.parquet", format="parquet")
+        for batch in dataset.to_batches(filter=condition, batch_size=self.row_group_size):
+            yield from from_batch(batch)
+
+
+def iter_logs(index: LogIndex, archive: Optional[LogArchive] = None, *, session_id: Optional[str] = None,
+              kind: Optional[str] = None, since: Optional[datetime] = None, until: Optional[datetime] = None,
+              limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Records of archived and live days alike, day by day in append order"""
+    lo = to_utc(since).date().isoformat() if since else None
+    hi = to_utc(until).date().isoformat() if until else None
+    live = set(index.days())
+    archived = set(archive.days()) if archive else set()
+
+    def records():
+        for day in sorted(live | archived):
+            if (lo and day < lo) or (hi and day > hi):
+                continue
+            # A live file next to an archive holds either every record (source kept) or only late ones
+            if day in archived and not (day in live and archive.source_kept(day)):
+                yield from archive.read(day, session_id=session_id, kind=kind, since=since, until=until)
+            if day in live:
+                yield from index.query(session_id=session_id, kind=kind, since=since, until=until, days=[day])
+
+    return itertools.islice(records(), limit)
@@ -0,0 +1,211 @@
+"""
+Sidecar index over the daily JSONL audit logs.
+
+Every record is indexed by (day, byte offset, length) together with its session_id, kind and
+timestamp in a SQLite file next to the logs. The index is caught up incrementally: each refresh
+only parses the bytes appended since the previous one, so it can run after every log batch. Queries
+filter on the index and then read just the matching lines, streaming them without loading whole files.
+"""
+import os
+import re
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+DAY_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+READ_CHUNK = 8 * 1024 * 1024
+
+
+def to_utc(value: datetime) -> datetime:
+    """Timestamps without timezone are taken as UTC, like the log records"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+class LogIndex:
+    """
+    Index of 'data/logs/<day>.jsonl' files by session, kind and time.
+
+    Args:
+        log_dir: Directory holding the daily log files.
+        path: SQLite index file (defaults to 'index.sqlite' inside 'log_dir').
+    """
+
+    def __init__(self, log_dir: str | Path, path: Optional[str | Path] = None):
+        self.log_dir = Path(log_dir)
+        self.path = Path(path) if path else self.log_dir / "index.sqlite"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Days and session ids are stored once and referenced by integer to keep the index small
+        self.conn = self._connect()
+        self.conn.execute("CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, day TEXT UNIQUE NOT NULL, "
+                          "size INTEGER NOT NULL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS sessions (id INTEGER PRIMARY KEY, "
+                          "session_id TEXT UNIQUE NOT NULL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS records (file INTEGER NOT NULL, offset INTEGER NOT NULL, "
+                          "length INTEGER NOT NULL, ts REAL NOT NULL, kind TEXT NOT NULL, session INTEGER)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS records_session ON records (session, ts)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS records_ts ON records (ts)")
+        self.sessions: Dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, log_dir: str | Path) -> "LogIndex":
+        return cls(log_dir, os.getenv("LOG_INDEX_PATH") or None)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    def days(self) -> List[str]:
+        """Days with a live log file, oldest first"""
+        return sorted(p.stem for p in self.log_dir.glob("*.jsonl") if DAY_RE.match(p.stem))
+
+    # Indexing
+    def refresh(self, days: Optional[Iterable[str]] = None) -> int:
+        """Index the records appended since the last refresh; return how many were added"""
+        added = 0
+        for day in (self.days() if days is None else days):
+            with self.lock:
+                added += self._refresh_day(day)
+        return added
+
+    def _refresh_day(self, day: str) -> int:
+        path = self.log_dir / f"{day}.jsonl"
+        if not path.is_file():
+            return 0
+
+        # Exclusive transaction: concurrent workers never index the same bytes twice
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute("INSERT OR IGNORE INTO files (day, size) VALUES (?, 0)", (day,))
+            file_id, indexed = self.conn.execute("SELECT id, size FROM files WHERE day = ?", (day,)).fetchone()
+            size = path.stat().st_size
+            if size < indexed:
+                # File replaced or truncated: index it again from scratch
+                self.conn.execute("DELETE FROM records WHERE file = ?", (file_id,))
+                indexed = 0
+            if size == indexed:
+                self.conn.execute("COMMIT")
+                return 0
+
+            added, offset = 0, indexed
+            with open(path, "rb") as f:
+                f.seek(offset)
+                pending = b""
+                while chunk := f.read(READ_CHUNK):
+                    pending += chunk
+                    *lines, pending = pending.split(b"\n")
+                    rows = []
+                    for line in lines:
+                        length = len(line) + 1
+                        if row := self._row(file_id, offset, length, line):
+                            rows.append(row)
+                        offset += length
+                    self.conn.executemany("INSERT INTO records VALUES (?, ?, ?, ?, ?, ?)", rows)
+                    added += len(rows)
+
+            # A trailing partial line is indexed once it is complete
+            self.conn.execute("UPDATE files SET size = ? WHERE id = ?", (offset, file_id))
+            self.conn.execute("COMMIT")
+            return added
+
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            self.sessions.clear()
+            raise
+
+    def _row(self, file_id: int, offset: int, length: int, line: bytes) -> Optional[tuple]:
+        if not line.strip():
+            return None
+        try:
+            record = json.loads(line)
+            ts = datetime.fromisoformat(record["ts"]).timestamp()
+        except (ValueError, KeyError, TypeError):
+            return None
+        return file_id, offset, length, ts, record.get("kind", ""), self._session(record.get("session_id"))
+
+    def _session(self, session_id: Optional[str]) -> Optional[int]:
+        if session_id is None:
+            return None
+        session_id = str(session_id)
+        if session_id not in self.sessions:
+            self.conn.execute("INSERT OR IGNORE INTO sessions (session_id) VALUES (?)", (session_id,))
+            self.sessions[session_id] = self.conn.execute(
+                "SELECT id FROM sessions WHERE session_id = ?", (session_id,)).fetchone()[0]
+        return self.sessions[session_id]
+
+    def rebuild(self) -> int:
+        """Drop the index and build it again from the log files"""
+        with self.lock:
+            self.conn.execute("DELETE FROM records")
+            self.conn.execute("DELETE FROM files")
+        added = self.refresh()
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return added
+
+    def forget(self, day: str):
+        """Drop a day from the index (e.g. once its log file was archived)"""
+        with self.lock:
+            self.conn.execute("DELETE FROM records WHERE file = (SELECT id FROM files WHERE day = ?)", (day,))
+            self.conn.execute("DELETE FROM files WHERE day = ?", (day,))
+
+    # Querying
+    def query(self, session_id: Optional[str] = None, kind: Optional[str] = None,
+              since: Optional[datetime] = None, until: Optional[datetime] = None,
+              limit: Optional[int] = None, days: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+        """Yield matching records in append order, reading only their lines"""
+        since = to_utc(since) if since else None
+        until = to_utc(until) if until else None
+        live = self.days()
+        days = [d for d in (live if days is None else sorted(set(days) & set(live)))
+                if (since is None or d >= since.date().isoformat())
+                and (until is None or d <= until.date().isoformat())]
+        if not days:
+            return
+        self.refresh(days)
+
+        sql = ("SELECT files.day, records.offset, records.length FROM records "
+               "JOIN files ON files.id = records.file WHERE files.day >= ? AND files.day <= ?")
+        params: list = [days[0], days[-1]]
+        if session_id is not None:
+            sql, params = sql + " AND records.session = (SELECT id FROM sessions WHERE session_id = ?)", \
+                params + [session_id]
+        if kind is not None:
+            sql, params = sql + " AND records.kind = ?", params + [kind]
+        if since is not None:
+            sql, params = sql + " AND records.ts >= ?", params + [since.timestamp()]
+        if until is not None:
+            sql, params = sql + " AND records.ts <= ?", params + [until.timestamp()]
+        sql += " ORDER BY files.day, records.offset"
+        if limit is not None:
+            sql, params = sql + " LIMIT ?", params + [limit]
+
+        # Own connection: the cursor stays open while the caller consumes the generator
+        conn = self._connect()
+        f, current = None, None
+        try:
+            cursor = conn.execute(sql, params)
+            while rows := cursor.fetchmany(1000):
+                for day, offset, length in rows:
+                    if day != current:
+                        if f:
+                            f.close()
+                        f, current = open(self.log_dir / f"{day}.jsonl", "rb"), day
+                    f.seek(offset)
+                    yield json.loads(f.read(length))
+        finally:
+            if f:
+                f.close()
+            conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            records = self.conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+            sessions = self.conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+            files = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM files").fetchone()
+        return {"records": records, "sessions": sessions, "files": files[0], "bytes": files[1]}
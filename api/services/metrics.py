@@ -0,0 +1,126 @@
+"""
+Prometheus metrics for the backend (served at '/metrics').
+
+Latency histograms per HTTP route and per pipeline stage (graph nodes, routing, prompt building,
+provider calls, parsing, logging), and counters for LLM tokens, cache lookups, audio bytes and errors
+by stage. Label children are resolved once per stage, so timing a stage costs a few microseconds.
+
+With several worker processes, set 'PROMETHEUS_MULTIPROC_DIR' to an empty directory shared by the
+workers (main.py does this) so '/metrics' aggregates all of them.
+"""
+import os
+import time
+import functools
+from typing import Any, Callable, Dict, Tuple
+
+from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, REGISTRY,
+                               generate_latest, multiprocess)
+
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0)
+
+HTTP_LATENCY = Histogram("consent_http_request_duration_seconds", "HTTP request latency (until the body is sent)",
+                         ["method", "route", "status"], buckets=BUCKETS)
+STAGE_LATENCY = Histogram("consent_stage_duration_seconds", "Latency of pipeline stages", ["stage"], buckets=BUCKETS)
+TOKENS = Counter("consent_llm_tokens_total", "LLM tokens by operation and kind (input, cached_input, output, "
+                 "reasoning)", ["operation", "kind"])
+CACHED_RATIO = Histogram("consent_llm_cached_token_ratio", "Share of input tokens served from the provider's "
+                         "prompt cache, per call", ["operation"], buckets=(0.0, 0.1, 0.25, 0.5, 0.75, 0.9, 1.0))
+TIER_LATENCY = Histogram("consent_llm_tier_duration_seconds", "LLM call latency by operation and model tier",
+                         ["operation", "tier"], buckets=BUCKETS)
+TIER_CALLS = Counter("consent_llm_tier_calls_total", "LLM calls by operation and model tier", ["operation", "tier"])
+TIER_FALLBACKS = Counter("consent_llm_tier_fallbacks_total", "Answers of a smaller model tier asked again to the "
+                         "largest tier", ["operation", "tier"])
+COST = Counter("consent_llm_cost_usd_total", "Estimated LLM cost in USD by operation and model tier",
+               ["operation", "tier"])
+CACHE_LOOKUPS = Counter("consent_cache_lookups_total", "Cache lookups by cache and result", ["cache", "result"])
+AUDIO_BYTES = Counter("consent_audio_bytes_total", "Audio bytes sent to STT (in) and produced by TTS (out)",
+                      ["direction"])
+INTENTS = Counter("consent_intents_total", "Chat inputs by route: answered by the fast path (greeting, thanks, "
+                  "consent) or sent to the LLM (llm)", ["intent"])
+ERRORS = Counter("consent_errors_total", "Errors by stage and exception type", ["stage", "error"])
+
+_stage_children: Dict[str, Any] = {}
+
+
+class timed:
+    """Context manager observing the duration of 'stage' (and counting its errors)"""
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.stage, time.perf_counter() - self.start)
+        if exc_type is not None and not issubclass(exc_type, GeneratorExit):
+            ERRORS.labels(self.stage, exc_type.__name__).inc()
+        return False
+
+
+def observe(stage: str, seconds: float):
+    """Record the duration of a stage timed by the caller"""
+    child = _stage_children.get(stage)
+    if child is None:
+        child = _stage_children[stage] = STAGE_LATENCY.labels(stage)
+    child.observe(seconds)
+
+
+def instrument(stage: str) -> Callable:
+    """Decorator timing an async function as 'stage'"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with timed(stage):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_tokens(operation: str, counts: Dict[str, int]):
+    """Count LLM tokens ('input_tokens', 'cached_input_tokens', ... as returned by 'usage.llm_usage')"""
+    for key, value in counts.items():
+        if value:
+            TOKENS.labels(operation, key[:-len("_tokens")]).inc(value)
+    if counts.get("input_tokens"):
+        CACHED_RATIO.labels(operation).observe(counts.get("cached_input_tokens", 0) / counts["input_tokens"])
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def render() -> Tuple[bytes, str]:
+    """Metrics in Prometheus text format (aggregated over workers in multiprocess mode)"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each request by method, route template and status code"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_LATENCY.labels(scope["method"], route, str(status[0])).observe(time.perf_counter() - start)
@@ -0,0 +1,203 @@
+"""
+Deadlines, retries, circuit breaking and hedging for AI provider calls.
+
+Every provider call runs through 'Resilience.call' under a per-operation deadline (the total budget,
+retries included). Transient failures (timeouts, connection errors, 408/409/429/5xx) are retried with
+full-jitter exponential backoff, waiting at least the provider's Retry-After. A call that still fails
+opens the shared circuit breaker, after which calls fail fast with 'ProviderUnavailable' until the
+breaker lets traffic through again. Optionally a second, hedged attempt is raced against a slow first
+one. Per-operation counters and latency percentiles are kept in memory ('stats').
+"""
+import os
+import time
+import random
+import asyncio
+import logging
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+import openai
+
+from .health import CircuitBreaker, ProviderUnavailable
+
+# Define logger
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Total budget per operation in seconds (retries included)
+DEFAULT_DEADLINES = {"summary": 60.0, "qa": 20.0, "transcribe": 30.0, "tts": 30.0, "embed": 10.0}
+RETRY_STATUS = {408, 409, 429}
+
+
+def is_transient(error: BaseException) -> bool:
+    """Whether retrying the same request may succeed"""
+    if isinstance(error, (asyncio.TimeoutError, openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRY_STATUS or error.status_code >= 500
+    return False
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the provider asked us to wait (Retry-After / retry-after-ms headers), if any"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class OperationStats:
+    """Counters and a window of recent latencies for one operation"""
+
+    def __init__(self, window: int = 1024):
+        self.counts = {"calls": 0, "succeeded": 0, "failed": 0, "retries": 0, "timeouts": 0,
+                       "rejected": 0, "hedged": 0, "hedge_wins": 0}
+        self.latencies = deque(maxlen=window)
+
+    def snapshot(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+        pct = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 1) if ordered else None
+        return {**self.counts, "p50_ms": pct(0.50), "p95_ms": pct(0.95), "p99_ms": pct(0.99),
+                "max_ms": round(ordered[-1] * 1000, 1) if ordered else None}
+
+
+class Resilience:
+    """
+    Resilience policy shared by all provider calls.
+
+    Args:
+        breaker: Circuit breaker (shared with the health prober).
+        deadlines: Total seconds allowed per operation.
+        max_attempts: Attempts per call, the first one included.
+        base_delay_s, max_delay_s: Backoff before retry n is uniform in [0, min(max, base * 2**n)].
+        hedge_after_s: Per operation, seconds after which a hedged attempt is started (operations
+            absent from the mapping are never hedged).
+    """
+
+    def __init__(self, breaker: CircuitBreaker, *, deadlines: Optional[Dict[str, float]] = None,
+                 max_attempts: int = 3, base_delay_s: float = 0.5, max_delay_s: float = 8.0,
+                 hedge_after_s: Optional[Dict[str, float]] = None):
+        self.breaker = breaker
+        self.deadlines = {**DEFAULT_DEADLINES, **(deadlines or {})}
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay_s = base_delay_s
+        self.max_delay_s = max_delay_s
+        self.hedge_after_s = hedge_after_s or {}
+        self.operations: Dict[str, OperationStats] = {}
+
+    @classmethod
+    def from_env(cls, breaker: CircuitBreaker) -> "Resilience":
+        deadlines = {op: float(os.getenv(f"PROVIDER_DEADLINE_{op.upper()}_S", default))
+                     for op, default in DEFAULT_DEADLINES.items()}
+        hedge_qa = float(os.getenv("PROVIDER_HEDGE_QA_S", 0))
+        return cls(breaker, deadlines=deadlines,
+                   max_attempts=int(os.getenv("PROVIDER_MAX_ATTEMPTS", 3)),
+                   base_delay_s=float(os.getenv("PROVIDER_BACKOFF_BASE_S", 0.5)),
+                   max_delay_s=float(os.getenv("PROVIDER_BACKOFF_MAX_S", 8)),
+                   hedge_after_s={"qa": hedge_qa} if hedge_qa > 0 else None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"breaker": self.breaker.snapshot(),
+                "operations": {op: s.snapshot() for op, s in sorted(self.operations.items())}}
+
+    def _stats(self, operation: str) -> OperationStats:
+        if operation not in self.operations:
+            self.operations[operation] = OperationStats()
+        return self.operations[operation]
+
+    def backoff(self, attempt: int, error: BaseException) -> float:
+        delay = random.uniform(0, min(self.max_delay_s, self.base_delay_s * 2 ** attempt))
+        return max(delay, retry_after(error) or 0.0)
+
+    async def call(self, operation: str, fn: Callable[[], Awaitable[T]], *,
+                   retryable: Callable[[], bool] = lambda: True, hedge: bool = True,
+                   trips_breaker: bool = True) -> T:
+        """
+        Run 'fn' (a factory of fresh attempts) under the policy of 'operation'. 'retryable' is asked
+        before each retry, so streaming callers can stop retrying once output reached the consumer;
+        they also pass 'hedge=False', as two attempts would both forward output. Calls with
+        'trips_breaker=False' are still rejected while the breaker is open but never change its state.
+        """
+        stats = self._stats(operation)
+        stats.counts["calls"] += 1
+        if not self.breaker.allow():
+            stats.counts["rejected"] += 1
+            raise ProviderUnavailable(f"AI provider circuit open ({operation}).")
+
+        start = time.monotonic()
+        deadline = start + self.deadlines.get(operation, 30.0)
+        attempt = 0
+        while True:
+            try:
+                result = await self._attempt(operation, fn, deadline - time.monotonic(), stats, hedge)
+            except Exception as e:
+                remaining = deadline - time.monotonic()
+                if isinstance(e, asyncio.TimeoutError):
+                    stats.counts["timeouts"] += 1
+                delay = self.backoff(attempt, e) if is_transient(e) else None
+                attempt += 1
+                if delay is None or attempt >= self.max_attempts or delay >= remaining or not retryable():
+                    stats.counts["failed"] += 1
+                    stats.latencies.append(time.monotonic() - start)
+                    if not is_transient(e):
+                        raise
+                    if trips_breaker:
+                        self.breaker.record_failure()
+                    logger.warning(f"Provider call '{operation}' failed after {attempt} attempt(s): {e!r}")
+                    raise ProviderUnavailable(f"AI provider call '{operation}' failed: {e!r}") from e
+
+                stats.counts["retries"] += 1
+                logger.info(f"Retrying provider call '{operation}' in {delay:.2f}s after {e!r}")
+                await asyncio.sleep(delay)
+                continue
+
+            if trips_breaker:
+                self.breaker.record_success()
+            stats.counts["succeeded"] += 1
+            stats.latencies.append(time.monotonic() - start)
+            return result
+
+    async def _attempt(self, operation: str, fn: Callable[[], Awaitable[T]], timeout: float,
+                       stats: OperationStats, hedge: bool) -> T:
+        """One attempt within 'timeout', raced against a hedged copy when it is slow"""
+        hedge_after = self.hedge_after_s.get(operation) if hedge else None
+        if not hedge_after or hedge_after >= timeout:
+            return await asyncio.wait_for(fn(), timeout)
+
+        primary = asyncio.ensure_future(fn())
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+        if done:
+            return primary.result()
+
+        stats.counts["hedged"] += 1
+        second = asyncio.ensure_future(fn())
+        pending = {primary, second}
+        try:
+            end = time.monotonic() + timeout - hedge_after
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=max(0.0, end - time.monotonic()),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise asyncio.TimeoutError()
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            stats.counts["hedge_wins"] += 1
+                        return task.result()
+            # Both attempts failed: report the first one's error
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,237 @@
+"""
+Local retrieval index of approved procedure leaflets, used to ground Q&A answers.
+
+Leaflets are Markdown or text files (one directory per language, e.g. 'leaflets/English/knee.md';
+files elsewhere match every language). 'build_index' splits them into chunks of about 'chunk_tokens'
+tokens along headings and paragraphs and writes an index directory of flat NumPy arrays:
+
+    meta.json        vocabulary, leaflets, BM25 parameters
+    *.npy            postings in CSR layout (term -> chunks, term frequencies), chunk lengths, IDF
+    texts.bin        chunk texts (UTF-8), sliced by 'text_ptr.npy'
+    embeddings.npy   optional local hashing embeddings of the chunks
+
+'LeafletIndex' memory-maps the arrays, so opening the index is instant, workers share the pages
+and only the postings of the query terms are read. A query scores chunks with BM25 and, when the
+index has embeddings, fuses BM25 and cosine rankings with reciprocal rank fusion. Rebuild the index
+offline with 'build_leaflet_index.py' and restart the API to pick it up.
+"""
+import os
+import re
+import json
+import time
+import shutil
+import logging
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .cache import DATA_DIR
+from .context import count_tokens, terms
+from .semantic_cache import hashing_embedding
+
+# Define logger
+logger = logging.getLogger(__name__)
+
+LANGUAGES = ("English", "Svenska")
+LEAFLET_SUFFIXES = (".md", ".txt")
+RRF_K = 60
+
+_HEADING = re.compile(r"^#{1,6}\s*(.+?)\s*#*\s*$")
+
+
+def chunk_leaflet(text: str, chunk_tokens: int = 120) -> Tuple[str, List[str]]:
+    """(title, chunks) of a leaflet; each chunk is prefixed with its section heading"""
+    title, section, chunks = "", "", []
+    buf: List[str] = []
+
+    def flush():
+        if buf:
+            chunks.append((f"{section}: " if section and section != title else "") + " ".join(buf))
+            buf.clear()
+
+    paragraphs = re.split(r"\n\s*\n", text.replace("\r\n", "\n"))
+    for paragraph in paragraphs:
+        lines = [line.strip() for line in paragraph.strip().splitlines() if line.strip()]
+        while lines and _HEADING.match(lines[0]):
+            flush()
+            section = _HEADING.match(lines.pop(0))[1]
+            title = title or section
+        if not lines:
+            continue
+
+        # Paragraphs longer than a chunk are split on sentences
+        pieces = [" ".join(lines)]
+        if count_tokens(pieces[0]) > chunk_tokens:
+            pieces = re.split(r"(?<=[.!?])\s+", pieces[0])
+        for piece in pieces:
+            used = sum(count_tokens(b) for b in buf)
+            if buf and used + count_tokens(piece) > chunk_tokens:
+                flush()
+            buf.append(piece)
+    flush()
+    return title, chunks
+
+
+def leaflet_files(root: Path) -> Iterable[Tuple[Path, Optional[str]]]:
+    """(path, language) of the leaflets under 'root' (language None when not in a language directory)"""
+    for path in sorted(root.rglob("*")):
+        if path.is_file() and path.suffix.lower() in LEAFLET_SUFFIXES:
+            language = next((part for part in path.relative_to(root).parts[:-1] if part in LANGUAGES), None)
+            yield path, language
+
+
+def build_index(source: Path, out_dir: Path, *, chunk_tokens: int = 120, embeddings: bool = False,
+                k1: float = 1.2, b: float = 0.75) -> Dict[str, Any]:
+    """Build the index of the leaflets under 'source' into 'out_dir' (replaced when complete)"""
+    start = time.perf_counter()
+    source, out_dir = Path(source), Path(out_dir)
+    docs, texts, chunk_doc = [], [], []
+    for path, language in leaflet_files(source):
+        title, chunks = chunk_leaflet(path.read_text(encoding="utf-8"), chunk_tokens)
+        docs.append({"path": str(path.relative_to(source)), "title": title or path.stem, "language": language})
+        texts.extend(chunks)
+        chunk_doc.extend([len(docs) - 1] * len(chunks))
+    if not texts:
+        raise ValueError(f"No leaflets ({', '.join(LEAFLET_SUFFIXES)}) found under {source}.")
+
+    # Postings (term -> chunk, tf) in CSR layout; leaflet titles count as part of every chunk
+    vocab: Dict[str, int] = {}
+    postings: List[List[Tuple[int, int]]] = []
+    lengths = np.zeros(len(texts), dtype=np.float32)
+    for i, text in enumerate(texts):
+        tf = Counter(terms(f"{docs[chunk_doc[i]]['title']} {text}"))
+        lengths[i] = sum(tf.values())
+        for term, n in tf.items():
+            if term not in vocab:
+                vocab[term] = len(postings)
+                postings.append([])
+            postings[vocab[term]].append((i, n))
+
+    term_ptr = np.zeros(len(postings) + 1, dtype=np.int64)
+    term_ptr[1:] = np.cumsum([len(p) for p in postings])
+    post_chunk = np.fromiter((c for p in postings for c, _ in p), dtype=np.int32, count=term_ptr[-1])
+    post_tf = np.fromiter((n for p in postings for _, n in p), dtype=np.float32, count=term_ptr[-1])
+    df = np.diff(term_ptr).astype(np.float32)
+    idf = np.log(1 + (len(texts) - df + 0.5) / (df + 0.5)).astype(np.float32)
+    avg_len = float(lengths.mean()) or 1.0
+
+    encoded = [t.encode("utf-8") for t in texts]
+    text_ptr = np.zeros(len(texts) + 1, dtype=np.int64)
+    text_ptr[1:] = np.cumsum([len(e) for e in encoded])
+    languages = [None, *LANGUAGES]
+
+    # Write next to the target, then swap
+    tmp = out_dir.with_name(out_dir.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    arrays = {"term_ptr": term_ptr, "post_chunk": post_chunk, "post_tf": post_tf, "idf": idf,
+              "chunk_norm": (k1 * (1 - b + b * lengths / avg_len)).astype(np.float32),
+              "chunk_doc": np.asarray(chunk_doc, dtype=np.int32), "text_ptr": text_ptr,
+              "chunk_lang": np.asarray([languages.index(docs[d]["language"]) for d in chunk_doc], dtype=np.int8)}
+    if embeddings:
+        arrays["embeddings"] = np.stack([hashing_embedding(t) for t in texts]).astype(np.float32)
+    for name, array in arrays.items():
+        np.save(tmp / f"{name}.npy", array)
+    (tmp / "texts.bin").write_bytes(b"".join(encoded))
+    meta = {"version": 1, "k1": k1, "b": b, "chunk_tokens": chunk_tokens, "chunks": len(texts),
+            "embeddings": embeddings, "languages": languages, "docs": docs, "vocab": vocab}
+    (tmp / "meta.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+    shutil.rmtree(out_dir, ignore_errors=True)
+    tmp.rename(out_dir)
+
+    return {"leaflets": len(docs), "chunks": len(texts), "terms": len(vocab), "postings": int(term_ptr[-1]),
+            "bytes": sum(f.stat().st_size for f in out_dir.iterdir()),
+            "seconds": round(time.perf_counter() - start, 3)}
+
+
+class LeafletIndex:
+    """
+    Read-only, memory-mapped leaflet index.
+
+    Args:
+        path: Index directory written by 'build_index'.
+        top_k: Passages returned per query by default.
+        budget_ms: Once BM25 scoring has used this budget, the embedding stage is skipped.
+        embedding_weight: Weight of the embedding ranking in the fusion (BM25 weighs 1).
+    """
+
+    def __init__(self, path: Path, top_k: int = 3, budget_ms: float = 5.0, embedding_weight: float = 0.1):
+        self.path = Path(path)
+        self.top_k = top_k
+        self.budget_ms = budget_ms
+        self.embedding_weight = embedding_weight
+        meta = json.loads((self.path / "meta.json").read_text(encoding="utf-8"))
+        self.k1 = meta["k1"]
+        self.docs = meta["docs"]
+        self.vocab = meta["vocab"]
+        self.languages = meta["languages"]
+        self.size = meta["chunks"]
+        load = lambda name: np.load(self.path / f"{name}.npy", mmap_mode="r")
+        self.term_ptr, self.post_chunk, self.post_tf = load("term_ptr"), load("post_chunk"), load("post_tf")
+        self.idf, self.chunk_norm, self.chunk_doc = load("idf"), load("chunk_norm"), load("chunk_doc")
+        self.chunk_lang, self.text_ptr = load("chunk_lang"), load("text_ptr")
+        self.embeddings = load("embeddings") if meta["embeddings"] else None
+        self.texts = np.memmap(self.path / "texts.bin", dtype=np.uint8, mode="r")
+
+    @classmethod
+    def from_env(cls) -> Optional["LeafletIndex"]:
+        """The configured index, or None when retrieval is disabled or no index was built"""
+        if os.getenv("RETRIEVAL", "1").strip().lower() in ("0", "false", "no", "off"):
+            return None
+        path = Path(os.getenv("RETRIEVAL_INDEX", str(DATA_DIR / "leaflets_index")))
+        if not (path / "meta.json").exists():
+            return None
+        try:
+            return cls(path, top_k=int(os.getenv("RETRIEVAL_TOP_K", 3)),
+                       budget_ms=float(os.getenv("RETRIEVAL_BUDGET_MS", 5)),
+                       embedding_weight=float(os.getenv("RETRIEVAL_EMBEDDING_WEIGHT", 0.1)))
+        except Exception as e:
+            logger.error(f"Failed to open leaflet index {path}: {e}")
+            return None
+
+    def __len__(self) -> int:
+        return self.size
+
+    def text(self, i: int) -> str:
+        return bytes(self.texts[self.text_ptr[i]:self.text_ptr[i + 1]]).decode("utf-8")
+
+    def bm25(self, query: str) -> np.ndarray:
+        """BM25 score of every chunk"""
+        scores = np.zeros(self.size, dtype=np.float32)
+        for term in set(terms(query)):
+            t = self.vocab.get(term)
+            if t is None:
+                continue
+            lo, hi = self.term_ptr[t], self.term_ptr[t + 1]
+            chunks, tf = self.post_chunk[lo:hi], self.post_tf[lo:hi]
+            scores[chunks] += self.idf[t] * tf * (self.k1 + 1) / (tf + self.chunk_norm[chunks])
+        return scores
+
+    def search(self, query: str, language: Optional[str] = None, k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Top 'k' passages for 'query' (leaflets of 'language' and language-neutral ones)"""
+        start = time.perf_counter()
+        k = k or self.top_k
+        scores = self.bm25(query)
+        if language is not None:
+            allowed = [self.languages.index(l) for l in (None, language) if l in self.languages]
+            scores[~np.isin(self.chunk_lang, allowed)] = 0.0
+        matched = np.flatnonzero(scores > 0)
+        if not len(matched):
+            return []
+        top = matched[np.argsort(-scores[matched], kind="stable")][:max(k * 10, 50)]
+
+        # Fuse with the embedding ranking of the same candidates, budget permitting
+        ranking = top
+        if self.embeddings is not None and (time.perf_counter() - start) * 1000 < self.budget_ms:
+            cosine = np.asarray(self.embeddings[np.sort(top)] @ hashing_embedding(query))
+            by_cosine = np.sort(top)[np.argsort(-cosine, kind="stable")]
+            fused = {int(c): 1 / (RRF_K + r) for r, c in enumerate(top)}
+            for r, c in enumerate(by_cosine):
+                fused[int(c)] += self.embedding_weight / (RRF_K + r)
+            ranking = sorted(fused, key=fused.get, reverse=True)
+
+        return [{"text": self.text(i), "title": self.docs[self.chunk_doc[i]]["title"],
+                 "source": self.docs[self.chunk_doc[i]]["path"], "score": round(float(scores[i]), 3)}
+                for i in ranking[:k]]
@@ -0,0 +1,333 @@
+"""
+Semantic (embedding-based) consent summary cache.
+
+Queries are embedded and matched against previously summarized procedures with cosine similarity,
+so "knee arthroscopy" can reuse the summary generated for "arthroscopic knee surgery". Entries are
+partitioned by (language, model, prompt version) and persisted in SQLite; the vector index lives in
+memory, is rebuilt from disk at startup and picks up entries added by other worker processes. Only
+namespaces of the current summary prompt version are loaded. Entries expire after 'ttl_s'; once the
+cache exceeds 'max_entries' the oldest are deleted in one batch down to 'EVICT_TO' of it. Rows deleted
+here or by another worker are dropped from the in-memory index without reloading it. Disk access and
+index updates run in a worker thread, off the event loop.
+
+Default similarity thresholds per embedder ('DEFAULT_THRESHOLDS'), from 'benchmarks/semantic_cache_eval.py'
+on 'benchmarks/data/procedure_queries.jsonl' (45 queries, 32 possible hits):
+
+    hashing   0.64: 22% hits, 10% false hits    0.66: 20%, 0%    0.70: 18%, 0%    >= 0.90: 0%
+
+The hashing default 0.70 keeps a margin above the first false hit. The OpenAI default 0.93 is not
+backed by a committed measurement (it needs the provider); it is deliberately strict, so before
+enabling the cache run the evaluation with '--embedder openai' and set 'SEMANTIC_CACHE_THRESHOLD'.
+"""
+import os
+import re
+import time
+import asyncio
+import zlib
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .cache import DATA_DIR, normalize_query
+from .prompts import SUMMARY
+
+# Define logger
+logger = logging.getLogger(__name__)
+
+Embedder = Callable[[str], Awaitable[np.ndarray]]
+
+# Minimum cosine similarity per embedder (see the module docstring for the measurements)
+DEFAULT_THRESHOLDS = {"hashing": 0.70, "openai": 0.93}
+
+# Share of 'max_entries' kept after an eviction batch
+EVICT_TO = 0.9
+
+
+def hashing_embedding(text: str, dim: int = 512) -> np.ndarray:
+    """Local, deterministic embedding from hashed character 3-grams and words (no network call)"""
+    vec = np.zeros(dim, dtype=np.float32)
+    text = normalize_query(text)
+    for word in re.findall(r"\w+", text):
+        padded = f" {word} "
+        vec[zlib.crc32(word.encode("utf-8")) % dim] += 2.0
+        for i in range(len(padded) - 2):
+            vec[zlib.crc32(padded[i:i + 3].encode("utf-8")) % dim] += 1.0
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+class VectorIndex:
+    """
+    In-memory cosine-similarity index over unit vectors.
+
+    Small sets are searched exactly with one NumPy matrix product. Once the index holds 'ivf_min_size'
+    vectors it is partitioned into k-means buckets (IVF) and only the 'nprobe' closest buckets are scanned.
+    """
+
+    def __init__(self, dim: int, ivf_min_size: int = 4096, nprobe: int = 8):
+        self.dim = dim
+        self.ivf_min_size = ivf_min_size
+        self.nprobe = nprobe
+        self.vectors = np.empty((64, dim), dtype=np.float32)
+        self.alive = np.zeros(64, dtype=bool)
+        self.size = 0
+        self.removed = 0
+        self.centroids: Optional[np.ndarray] = None
+        self.buckets: List[List[int]] = []
+        self.trained_size = 0
+
+    def __len__(self) -> int:
+        return self.size - self.removed
+
+    def add(self, vec: np.ndarray) -> int:
+        if self.size == len(self.vectors):
+            self.vectors = np.concatenate([self.vectors, np.empty_like(self.vectors)])
+            self.alive = np.concatenate([self.alive, np.zeros_like(self.alive)])
+        idx = self.size
+        self.vectors[idx] = vec
+        self.alive[idx] = True
+        self.size += 1
+
+        if self.size >= self.ivf_min_size and self.size >= 2 * self.trained_size:
+            self._train()
+        elif self.centroids is not None:
+            self.buckets[int(np.argmax(self.centroids @ vec))].append(idx)
+        return idx
+
+    def search(self, vec: np.ndarray, k: int = 1) -> List[Tuple[int, float]]:
+        if self.size == 0:
+            return []
+
+        if self.centroids is None:
+            candidates = np.arange(self.size)
+        else:
+            probe = np.argsort(self.centroids @ vec)[::-1][:self.nprobe]
+            candidates = np.fromiter((i for b in probe for i in self.buckets[b]), dtype=np.int64)
+            if candidates.size == 0:
+                return []
+
+        scores = np.where(self.alive[candidates], self.vectors[candidates] @ vec, -np.inf)
+        top = np.argsort(scores)[::-1][:k]
+        return [(int(candidates[i]), float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+    def remove(self, idx: int):
+        """Exclude a vector from searches (its position stays taken until 'compact')"""
+        if self.alive[idx]:
+            self.alive[idx] = False
+            self.removed += 1
+
+    def compact(self) -> np.ndarray:
+        """Drop removed vectors (buckets are retrained if needed); return the old positions kept"""
+        keep = np.flatnonzero(self.alive[:self.size])
+        vectors = np.empty((max(64, 2 * len(keep)), self.dim), dtype=np.float32)
+        vectors[:len(keep)] = self.vectors[keep]
+        self.vectors, self.alive = vectors, np.zeros(len(vectors), dtype=bool)
+        self.alive[:len(keep)] = True
+        self.size, self.removed = len(keep), 0
+        self.centroids, self.buckets, self.trained_size = None, [], 0
+        if self.size >= self.ivf_min_size:
+            self._train()
+        return keep
+
+    def _train(self, iterations: int = 10):
+        """Cluster the stored vectors into ~sqrt(n) buckets with spherical k-means"""
+        data = self.vectors[:self.size]
+        nlist = max(1, int(np.sqrt(self.size)))
+        rng = np.random.default_rng(0)
+        centroids = data[rng.choice(self.size, nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(data @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = data[assign == c]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    centroids[c] = centroid / (np.linalg.norm(centroid) or 1.0)
+
+        assign = np.argmax(data @ centroids.T, axis=1)
+        self.centroids = centroids
+        self.buckets = [np.flatnonzero(assign == c).tolist() for c in range(nlist)]
+        self.trained_size = self.size
+
+
+class SemanticCache:
+    """
+    Consent summary cache matched by embedding similarity.
+
+    Args:
+        path: SQLite database file holding the cached entries.
+        embed: Async function returning a unit vector for a text.
+        threshold: Minimum cosine similarity for a cached summary to be reused.
+        ttl_s: Entries older than this are treated as missing.
+        max_entries: Once the cache is larger, the oldest entries are evicted down to 'EVICT_TO' of it.
+        prompt_version: Only namespaces of this prompt version are loaded (None: all).
+    """
+
+    def __init__(self, path: str | Path, embed: Embedder, *, threshold: float = 0.93,
+                 ttl_s: float = 7 * 24 * 3600, max_entries: int = 5000, prompt_version: Optional[str] = None,
+                 ivf_min_size: int = 4096, nprobe: int = 8):
+        self.embed = embed
+        self.threshold = threshold
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.prompt_version = prompt_version
+        self.ivf_min_size = ivf_min_size
+        self.nprobe = nprobe
+        self.hits = 0
+        self.misses = 0
+        self.indexes: Dict[str, VectorIndex] = {}
+        self.responses: Dict[str, List[str]] = {}
+        self.created: Dict[str, List[float]] = {}
+        self.ids: Dict[str, List[int]] = {}
+        self.heads: Dict[str, int] = {}
+        self.first_id: Optional[int] = None
+        self.last_id = 0
+        self.lock = threading.Lock()
+        self.load_lock = threading.Lock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA busy_timeout=5000")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS semantic_summaries (id INTEGER PRIMARY KEY, "
+                          "namespace TEXT NOT NULL, query TEXT NOT NULL, vector BLOB NOT NULL, "
+                          "response TEXT NOT NULL, created_at REAL NOT NULL)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS semantic_summaries_created_at "
+                          "ON semantic_summaries (created_at)")
+        self._load()
+
+    @classmethod
+    def from_env(cls, embed_remote: Optional[Embedder] = None) -> Optional["SemanticCache"]:
+        """Build the cache from environment settings, or None unless 'SEMANTIC_CACHE' is enabled"""
+        if os.getenv("SEMANTIC_CACHE", "0").strip().lower() not in ("1", "true", "yes", "on"):
+            return None
+
+        embedder = os.getenv("SEMANTIC_CACHE_EMBEDDER", "openai").strip().lower()
+        if embedder == "openai" and embed_remote is not None:
+            embed = embed_remote
+        else:
+            embedder = "hashing"
+
+            async def embed(text: str) -> np.ndarray:
+                return hashing_embedding(text)
+
+        threshold = os.getenv("SEMANTIC_CACHE_THRESHOLD")
+        if not threshold and embedder == "openai":
+            logger.warning("SEMANTIC_CACHE_THRESHOLD is not set: using the unvalidated OpenAI embedder default "
+                           f"{DEFAULT_THRESHOLDS['openai']} (see benchmarks/semantic_cache_eval.py).")
+
+        return cls(os.getenv("CACHE_PATH", str(DATA_DIR / "cache.sqlite")), embed,
+                   threshold=float(threshold or DEFAULT_THRESHOLDS[embedder]),
+                   ttl_s=float(os.getenv("SUMMARY_CACHE_TTL_S", 7 * 24 * 3600)),
+                   max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", 5000)),
+                   prompt_version=SUMMARY.version)
+
+    @staticmethod
+    def namespace(language: str, model: str, prompt_version: str) -> str:
+        return "\x1f".join((language, model, prompt_version))
+
+    def _add(self, namespace: str, row_id: int, vec: np.ndarray, response: str, created_at: float):
+        with self.lock:
+            if namespace not in self.indexes:
+                self.indexes[namespace] = VectorIndex(len(vec), self.ivf_min_size, self.nprobe)
+                self.responses[namespace], self.created[namespace], self.ids[namespace] = [], [], []
+                self.heads[namespace] = 0
+            self.indexes[namespace].add(vec)
+            self.responses[namespace].append(response)
+            self.created[namespace].append(created_at)
+            self.ids[namespace].append(row_id)
+
+    def _drop_before(self, first_id: int):
+        """Remove the entries with an id below 'first_id' (deleted oldest rows) from the index"""
+        with self.lock:
+            for namespace, index in self.indexes.items():
+                ids, head = self.ids[namespace], self.heads[namespace]
+                while head < len(ids) and ids[head] < first_id:
+                    index.remove(head)
+                    head += 1
+                self.heads[namespace] = head
+
+                # Reclaim the space once most positions are removed
+                if index.removed and 2 * index.removed >= index.size:
+                    keep = index.compact().tolist()
+                    self.responses[namespace] = [self.responses[namespace][i] for i in keep]
+                    self.created[namespace] = [self.created[namespace][i] for i in keep]
+                    self.ids[namespace] = [ids[i] for i in keep]
+                    self.heads[namespace] = 0
+
+    def _load(self):
+        """
+        Add the entries stored since the last load (by this or another process) to the index and drop
+        the oldest ones deleted since. The index is only rebuilt when the table was emptied.
+        """
+        with self.load_lock:
+            first_id, max_id = self.conn.execute("SELECT MIN(id), MAX(id) FROM semantic_summaries").fetchone()
+            if self.first_id is not None and (first_id is None or max_id < self.last_id):
+                with self.lock:
+                    self.indexes, self.responses, self.created, self.ids, self.heads = {}, {}, {}, {}, {}
+                self.last_id = 0
+            elif self.first_id is not None and first_id > self.first_id:
+                self._drop_before(first_id)
+            self.first_id = first_id
+
+            version = "%" if self.prompt_version is None else f"%\x1f{self.prompt_version}"
+            rows = self.conn.execute("SELECT id, namespace, vector, response, created_at FROM semantic_summaries "
+                                     "WHERE id > ? AND created_at >= ? AND namespace LIKE ? ORDER BY id",
+                                     (self.last_id, time.time() - self.ttl_s, version)).fetchall()
+            for row_id, namespace, vector, response, created_at in rows:
+                self._add(namespace, row_id, np.frombuffer(vector, dtype=np.float32), response, created_at)
+                self.last_id = row_id
+
+    def search(self, vec: np.ndarray, namespace: str) -> Optional[Tuple[str, float]]:
+        """Return the closest cached response and its similarity, ignoring the threshold"""
+        with self.lock:
+            index = self.indexes.get(namespace)
+            if index is None or not (found := index.search(vec, k=1)):
+                return None
+            idx, score = found[0]
+            if time.time() - self.created[namespace][idx] > self.ttl_s:
+                return None
+            return self.responses[namespace][idx], score
+
+    async def lookup(self, user_query: str, language: str, model: str,
+                     prompt_version: str) -> Tuple[Optional[str], np.ndarray]:
+        """Return (cached response or None, query embedding); reuse the embedding when calling 'put'"""
+        vec = await self.embed(normalize_query(user_query))
+        found = await asyncio.to_thread(self._find, vec, self.namespace(language, model, prompt_version))
+        if found and found[1] >= self.threshold:
+            self.hits += 1
+            return found[0], vec
+        self.misses += 1
+        return None, vec
+
+    def _find(self, vec: np.ndarray, namespace: str) -> Optional[Tuple[str, float]]:
+        self._load()
+        return self.search(vec, namespace)
+
+    async def put(self, user_query: str, language: str, model: str, prompt_version: str, response: str,
+                  vec: np.ndarray):
+        await asyncio.to_thread(self._put, self.namespace(language, model, prompt_version),
+                                normalize_query(user_query), response, np.asarray(vec, dtype=np.float32))
+
+    def _put(self, namespace: str, query: str, response: str, vec: np.ndarray):
+        now = time.time()
+        with self.load_lock:
+            self.conn.execute("INSERT INTO semantic_summaries (namespace, query, vector, response, created_at) "
+                              "VALUES (?, ?, ?, ?, ?)", (namespace, query, vec.tobytes(), response, now))
+
+            # Expire old entries; past the size limit, evict the oldest in one batch
+            self.conn.execute("DELETE FROM semantic_summaries WHERE created_at < ?", (now - self.ttl_s,))
+            if self.conn.execute("SELECT COUNT(*) FROM semantic_summaries").fetchone()[0] > self.max_entries:
+                self.conn.execute("DELETE FROM semantic_summaries WHERE id IN (SELECT id FROM semantic_summaries "
+                                  "ORDER BY id DESC LIMIT -1 OFFSET ?)", (int(self.max_entries * EVICT_TO),))
+        self._load()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses,
+                "entries": sum(len(i) for i in self.indexes.values()),
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "threshold": self.threshold, "max_entries": self.max_entries}
@@ -0,0 +1,176 @@
+"""
+Model tiering: pick the model of each LLM call by stage, question complexity and latency budget.
+
+Tiers are configured smallest first in 'MODEL_TIERS' ("small=gpt-5-mini-2025-08-07:minimal,large=...",
+an optional ':effort' sets the reasoning effort); the last tier is the largest. Consent summaries
+always use the largest tier. A Q&A turn goes to the smallest tier when the question is short and
+neither compares options nor touches a sensitive topic (pregnancy, allergies, medication, children,
+heart, death...), and to the largest otherwise. With 'MODEL_LATENCY_BUDGET_S' set, non-sensitive
+questions also go to the smallest tier while the largest one answers slower than the budget (p95).
+
+An answer of a smaller tier that looks unsure (empty, very short or hedging) is asked again to the
+largest tier. When streaming, the start of the smaller tier's answer is held back ('HeldStream')
+until 'hold_chars' characters can be judged: a confident start is flushed and streamed on, while an
+unsure answer is dropped and the largest tier's answer is streamed instead.
+"""
+import os
+import re
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from .context import count_tokens
+from .intents import normalize
+
+# Questions that always get the largest tier (English and Swedish word starts)
+SENSITIVE = re.compile(r"\b(?:pregnan|gravid|breastfe|amning|ammar|allerg|blood\s+thin|blodförtunn|anticoag|warfarin"
+                       r"|waran|diabet|insulin|heart|hjärt|pacemaker|child|barn|kid|medication|medicine|medicin"
+                       r"|läkemedel|tablet|pill|die|dying|death|dö|död|cancer|tumou?r|epilep|kidney|njur|liver|lever)")
+COMPLEX = re.compile(r"\b(?:why|varför|compare|comparison|jämför|difference|skillnad|versus|vs|instead|istället"
+                     r"|better|bättre|worse|sämre|explain|förklara|what\s+if|tänk\s+om|om\s+jag\s+inte)\b")
+
+# Answers that look unsure
+UNSURE = re.compile(r"\b(?:i\s*'?\s*m\s+not\s+sure|i\s+am\s+not\s+sure|i\s+don\s*'?\s*t\s+know|i\s+do\s+not\s+know"
+                    r"|(?:cannot|can\s*'?\s*t|unable\s+to|not\s+able\s+to)\s+answer|no\s+information"
+                    r"|jag\s+vet\s+inte|jag\s+är\s+osäker|kan\s+inte\s+svara|ingen\s+information)\b")
+
+
+class Tier:
+    """One model tier with its recent latencies and call counts"""
+
+    def __init__(self, name: str, model: str, effort: Optional[str] = None, window: int = 256):
+        self.name = name
+        self.model = model
+        self.effort = effort
+        self.latencies = deque(maxlen=window)
+        self.counts = {"calls": 0, "fallbacks": 0}
+
+    @property
+    def request_args(self) -> Dict[str, Any]:
+        """Extra Responses API arguments of the tier"""
+        return {"reasoning": {"effort": self.effort}} if self.effort else {}
+
+    @property
+    def cache_model(self) -> str:
+        """Model and effort, as keyed in the summary caches"""
+        return f"{self.model}:{self.effort}" if self.effort else self.model
+
+    def p95(self) -> Optional[float]:
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] if ordered else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+        pct = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 1) if ordered else None
+        return {"model": self.model, "effort": self.effort, **self.counts, "p50_ms": pct(0.50), "p95_ms": pct(0.95)}
+
+
+class ModelRouter:
+    """
+    Chooses the tier of each LLM call.
+
+    Args:
+        tiers: Tiers, smallest first.
+        enabled: Whether smaller tiers are used at all (otherwise every call gets the largest).
+        simple_max_tokens: Longest question still considered simple.
+        latency_budget_s: Route non-sensitive questions to the smallest tier while the largest one's
+            p95 latency exceeds this (0: off).
+        min_answer_chars: Shorter answers of a smaller tier count as unsure.
+        hold_chars: Streamed characters of a smaller tier held back until the answer is judged.
+    """
+
+    def __init__(self, tiers: List[Tier], *, enabled: bool = True, simple_max_tokens: int = 24,
+                 latency_budget_s: float = 0.0, min_answer_chars: int = 20, hold_chars: int = 160):
+        self.tiers = tiers
+        self.enabled = enabled and len(tiers) > 1
+        self.simple_max_tokens = simple_max_tokens
+        self.latency_budget_s = latency_budget_s
+        self.min_answer_chars = min_answer_chars
+        self.hold_chars = hold_chars
+
+    @classmethod
+    def from_env(cls, default_model: str) -> "ModelRouter":
+        spec = os.getenv("MODEL_TIERS") or f"small=gpt-5-mini-2025-08-07:minimal,large={default_model}"
+        tiers = []
+        for item in spec.split(","):
+            name, _, model = item.strip().partition("=")
+            model, _, effort = model.partition(":")
+            tiers.append(Tier(name.strip(), model.strip(), effort.strip() or None))
+        return cls(tiers,
+                   enabled=os.getenv("MODEL_TIERING", "1").strip().lower() not in ("0", "false", "no", "off"),
+                   simple_max_tokens=int(os.getenv("MODEL_SIMPLE_MAX_TOKENS", 24)),
+                   latency_budget_s=float(os.getenv("MODEL_LATENCY_BUDGET_S", 0)),
+                   hold_chars=int(os.getenv("MODEL_STREAM_HOLD_CHARS", 160)))
+
+    @property
+    def largest(self) -> Tier:
+        return self.tiers[-1]
+
+    def pick(self, stage: str, text: str = "") -> Tier:
+        """Tier for a call of 'stage' ("summary" or "qa") on input 'text'"""
+        if not self.enabled or stage != "qa":
+            return self.largest
+        normalized = normalize(text)
+        if SENSITIVE.search(normalized):
+            return self.largest
+        if count_tokens(text) <= self.simple_max_tokens and not COMPLEX.search(normalized) and text.count("?") <= 1:
+            return self.tiers[0]
+        p95 = self.largest.p95()
+        if self.latency_budget_s and p95 is not None and p95 > self.latency_budget_s:
+            return self.tiers[0]
+        return self.largest
+
+    def unsure(self, answer: Any) -> bool:
+        """Whether an answer should be asked again to the largest tier"""
+        if not isinstance(answer, str) or len(answer.strip()) < self.min_answer_chars:
+            return True
+        return bool(UNSURE.search(normalize(answer)))
+
+    def observe(self, tier: Tier, seconds: float):
+        tier.counts["calls"] += 1
+        tier.latencies.append(seconds)
+
+    def fallback(self, tier: Tier):
+        """Count an answer of 'tier' asked again to the largest tier"""
+        tier.counts["fallbacks"] += 1
+
+    def hold(self, on_delta: Callable[[str], None]) -> "HeldStream":
+        """Consumer holding back the start of a smaller tier's streamed answer"""
+        return HeldStream(on_delta, self.unsure, self.hold_chars)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "tiers": {t.name: t.snapshot() for t in self.tiers}}
+
+
+class HeldStream:
+    """
+    Streaming consumer forwarding deltas to 'on_delta' once the first 'hold_chars' characters do not
+    look unsure. Until then (or when they do) the deltas are kept, to be flushed with 'release' or
+    dropped for the largest tier's answer.
+    """
+
+    def __init__(self, on_delta: Callable[[str], None], unsure: Callable[[str], bool], hold_chars: int):
+        self.on_delta = on_delta
+        self.unsure = unsure
+        self.hold_chars = hold_chars
+        self.held: List[str] = []
+        self.size = 0
+        self.judged = False
+        self.released = False
+
+    def __call__(self, delta: str):
+        if self.released:
+            self.on_delta(delta)
+            return
+        self.held.append(delta)
+        self.size += len(delta)
+        if not self.judged and self.size >= self.hold_chars:
+            self.judged = True
+            if not self.unsure("".join(self.held)):
+                self.release()
+
+    def release(self):
+        """Flush the held deltas and forward the next ones directly"""
+        self.released = True
+        if self.held:
+            self.on_delta("".join(self.held))
+            self.held = []
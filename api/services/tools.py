@@ -1,22 +1,89 @@
 import os
+import time
 import logging
 import re
 import openai
-from typing import Dict, Any, List
+import numpy as np
+from typing import Dict, Any, List, Tuple, Callable, Optional, AsyncIterator
 from dotenv import load_dotenv
 
+from .cache import SummaryCache
+from .semantic_cache import SemanticCache
+from .health import HealthProber
+from .resilience import Resilience
+from .metrics import (AUDIO_BYTES, COST, TIER_CALLS, TIER_FALLBACKS, TIER_LATENCY, instrument, record_cache,
+                      record_tokens, timed)
+from .usage import UsageMeter, audio_seconds, llm_usage, tts_usage
+from .prompts import QA, SUMMARY
+from .context import ContextBuilder
+from .retrieval import LeafletIndex
+from .tiers import ModelRouter, Tier
+
 # Load environment variables
 load_dotenv()
 
 # Define logger
 logger = logging.getLogger(__name__)
 
+# Summary template version (part of the summary cache keys, so edited prompts are not served stale)
+SUMMARY_PROMPT_VERSION = SUMMARY.version
+
+
+class SummaryStreamParser:
+    """Incremental markdown parser that emits each summary section as soon as its heading closes"""
+
+    header_re = re.compile(r'^(#{1,6})\s*(.+?)\s*$')
+    bullet_re = re.compile(r'^\s*[-*]\s+(.*\S)\s*$', flags=re.MULTILINE)
+
+    def __init__(self):
+        self._pending = ""
+        self._current: str | None = None
+        self._buf: List[str] = []
+
+    def feed(self, delta: str) -> List[Tuple[str, Any]]:
+        """Consume a chunk of text and return the sections closed by it"""
+        self._pending += delta
+        *lines, self._pending = self._pending.split("\n")
+
+        closed = []
+        for line in lines:
+            closed.extend(self._line(line.rstrip("\r")))
+        return closed
+
+    def close(self) -> List[Tuple[str, Any]]:
+        """Flush the remaining text at the end of the stream"""
+        closed = self._line(self._pending.rstrip("\r")) if self._pending else []
+        self._pending = ""
+        return closed + self._flush()
+
+    def _line(self, line: str) -> List[Tuple[str, Any]]:
+        m = self.header_re.match(line)
+        if not m:
+            self._buf.append(line)
+            return []
+
+        closed = self._flush()
+        self._current = m.group(2).strip()
+        return closed
+
+    def _flush(self) -> List[Tuple[str, Any]]:
+        current, raw = self._current, "\n".join(self._buf).strip()
+        self._current, self._buf = None, []
+        if current is None:
+            return []
+        if not raw:
+            return [(current, "")]
+
+        bullets = [m.group(1).strip() for m in self.bullet_re.finditer(raw)]
+        return [(current, bullets if bullets else raw)]
+
 
 class AIService:
     """Service for handling AI model interactions"""
     def __init__(self):
         self.api_key = os.getenv("OPENAI_API_KEY")
         self.default_model = os.getenv("OPENAI_MODEL", "gpt-5-2025-08-07")
+        self.embedding_model = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
 
         if not self.api_key:
             logger.warning("OpenAI API key not found. AI functionality will be limited.")
@@ -24,10 +91,32 @@ class AIService:
             # Initialize OpenAI client
         if self.api_key:
             openai.api_key = self.api_key
-            self.client = openai.OpenAI(api_key=self.api_key)
+            # Retries are handled by 'self.resilience'
+            self.client = openai.AsyncOpenAI(api_key=self.api_key, max_retries=0)
         else:
             self.client = None
 
+        # Initialize summary caches (exact match first, then semantic)
+        self.summary_cache = SummaryCache.from_env()
+        self.semantic_cache = SemanticCache.from_env(embed_remote=self._embed if self.client else None)
+
+        # Provider status, probed in the background (see 'api.services.health')
+        self.health = HealthProber.from_env(self.check_availability if self.client else None)
+
+        # Deadlines, retries and hedging of provider calls (sharing the prober's circuit breaker)
+        self.resilience = Resilience.from_env(self.health.breaker)
+
+        # Model tier of each LLM call (summaries always get the largest)
+        self.models = ModelRouter.from_env(self.default_model)
+
+        # Token, character and audio usage of provider calls (persisted by the API)
+        self.usage = UsageMeter.from_env()
+
+        # Per-section token budgets of the Q&A context
+        self.context = ContextBuilder.from_env()
+
+        # Approved leaflets grounding Q&A answers (None until an index is built)
+        self.retrieval = LeafletIndex.from_env()
 
     async def check_availability(self) -> str:
         """Check if the AI service is available"""
@@ -35,11 +124,8 @@ class AIService:
             return "unavailable"
 
         try:
-            # Simple test call to check API availability
-            _ = self.client.chat.completions.create(
-                model="gpt-5-nano-2025-08-07",
-                messages=[{"role": "user", "content": "Hello"}],
-            )
+            # Metadata lookup of the configured model (no tokens generated)
+            _ = await self.client.models.retrieve(self.default_model)
             return "available"
 
         except Exception as e:
@@ -50,244 +136,101 @@ class AIService:
     def _parse_summary(self, md: str) -> Dict[str, Any]:
         """Parse the summary from AI service"""
 
-        header_re = re.compile(r'^(#{1,6})\s*(.+?)\s*$')
-        sections: Dict[str, Any] = {}
-        current: str | None = None
-        buf: List[str] = []
-
-        def flush():
-            nonlocal buf, current
-            if current is None:
-                buf = []
-                return
-            raw = "\n".join(buf).strip()
-            if not raw:
-                sections[current] = ""
-            else:
-                bullets = [m.group(1).strip()
-                           for m in re.finditer(r'^\s*[-*]\s+(.*\S)\s*$', raw, flags=re.MULTILINE)]
-                sections[current] = bullets if bullets else raw
-            buf = []
-
-        for line in md.splitlines():
-            m = header_re.match(line)
-            if m:
-                flush()
-                current = m.group(2).strip()
-            else:
-                buf.append(line)
-
-        flush()
-        return sections
-
-    def _summary(self, user_query: str, language: str) -> Dict[str, Any]:
-        """Generates patient consent summary"""
+        with timed("parse_summary"):
+            parser = SummaryStreamParser()
+            return dict(parser.feed(md) + parser.close())
 
-        # Create prompts
-        if language == "English":
-            system_prompt = """
-            You are an expert and helpful clinical assistant.
-            Goals:
-            - Always perform a deep understanding to identify the medical procedure from the user’s input.
-            - Write a patient-friendly consent summary at A2/B1 reading level.
-            - Be neutral, clear, and compassionate.
-            - If the procedure cannot be confidently identified, use a generic name (e.g., “Procedure for <procedure 
-            given by user>”) and keep guidance general. Do NOT invent specifics.
-            - **CRITICAL**: **ALWAYS PROPOSE** that the patient asks more questions if needed, and
-            **PROPOSE** clicking **'Save consent'** button if they feel confident with the provided information.
-            
-            Behaviour:
-            1. Greeting-only input (e.g., “Hello”, “Hi”, “Hey”, “Good morning”, “Good evening”):
-                - Manage the conversation as a helpful assistant (e.g., Introduce yourself and ask for a medical
-                procedure to help the patient, etc.).
-                - Do **NOT** produce the consent template.
-                - Invite questions.
-            2. Procedure given or can be inferred:
-                - Output **ONLY** markdown with **EXACTLY** these headings, in this order, with no extra text or code fences 
-                (STRICT and **MANDATORY TO WRITE SOMETHING IN EACH OF THEM**):
-                    # Title
-                    ## Overview
-                    ## Benefits
-                    ## Common risks
-                    ## Rare risks
-                    ## Alternatives
-                    ## Preparation
-                    ## When to seek help
-                    ## More questions or click 'Save consent' button
-                - **CRITICAL**: Under ‘Title’ you must **ALWAYS** include the proper name of the procedure 
-                (e.g., “Laparoscopy”).
-
-            Style:                
-            - Use '-' for bullet lists, except in 'Overview' and 'More questions or click Save consent' sections, which 
-            must be short paragraphs/lines.
-            - Keep lists short and readable (3–6 bullets when possible).
-            - No legal or diagnostic claims; this is general information.
-            - Write **EVERYTHING** in English.
-            
-            Few-shot anchors (do not echo triggers back):
-            - Input: “Hello” → Friendly intro + ask for procedure; no consent template.
-            - Input: “Appendectomy” → Full template with headings above.
-            - Input: “Not sure, maybe knee surgery?” → Use generic title: “Procedure for knee surgery (as described by 
-            you)” + general guidance.
-            """
-
-            user_prompt = f"""
-            Patient query:
-            {user_query}
-
-            Generate the requested markdown."""
-
-        elif language == "Svenska":
-            system_prompt = f"""
-            Du är en expert och hjälpsam klinisk assistent.
-            Mål:
-            - Gör alltid en djupgående analys för att identifiera vilket medicinskt ingrepp användaren beskriver.
-            - Skriv en patientvänlig samtyckessammanfattning på läsnivå A2/B1.
-            - Var neutral, tydlig och medkännande.
-            - Om ingreppet inte kan identifieras med säkerhet, använd ett generiskt namn (t.ex. ”Ingrepp för <ingrepp 
-            angivet av användaren>”) och håll vägledningen allmän. Hitta **inte** på detaljer.
-            - **KRITISKT**: **FÖRESLÅ ALLTID** att patienten ställer fler frågor vid behov, och **FÖRESLÅ** att klicka
-            på knappen **”Spara samtycke”** om patienten känner sig trygg med informationen.
-            
-            Beteende (strikt ordning och prioritet):
-            1. Endast hälsning (t.ex. ”Hej”, ”Hejsan”, ”Hallå”, ”God morgon”, ”God kväll”, ”Tjena”, ”Tja”):
-                - Hantera samtalet som en hjälpsam assistent (t.ex. presentera dig själv och fråga om en medicinsk 
-                procedur för att hjälpa patienten etc.).
-                - Ta **INTE** fram samtyckesmallen.
-                - Uppmuntra frågor.
-            2. Ingrepp anges eller kan tolkas:
-                - Skriv **UTESLUTANDE** markdown med **EXAKT** dessa rubriker, i denna ordning, utan extra text eller kodgränser
-                 (STRIKT och **OBLIGATORISKT ATT SKRIVA NÅGOT I VARJE AV DEM**):
-                    # Titel
-                    ## Översikt
-                    ## Fördelar
-                    ## Vanliga risker
-                    ## Sällsynta risker
-                    ## Alternativ
-                    ## Förberedelser
-                    ## När ska man söka hjälp
-                    ## Fler frågor eller klicka på knappen 'Spara samtycke'
-            
-            - **KRITISKT**: Under ”Titel” måste **ALLTID** ingreppets korrekta namn anges (t.ex. ”Laparoskopi”).
-
-            Stil:
-            - Använd '-' för punktlistor, **utom** i avsnitten 'Översikt' och 'Fler frågor eller klicka på Spara 
-            samtycke'. 
-            Avsnittet 'Översikt' måste vara ett enkelt stycke och 'Fler frågor eller klicka på Spara samtycke' några 
-            rader.
-            - Håll listorna korta och läsbara (3–6 punkter om möjligt).
-            - Inga juridiska eller diagnostiska påståenden; detta är allmän information.
-            - Skriv **ALLT på svenska**.
-            
-            Exempel (ankare – upprepa inte triggarna):
-            - Input: ”Hej” → Vänlig presentation + fråga efter ingrepp; ingen samtycksmall.
-            - Input: ”Kataraktoperation” → Full mall med rubrikerna ovan.
-            - Input: ”Vet inte, något med knät?” → Generisk titel: ”Ingrepp för knä (enligt din beskrivning)” + 
-            allmän vägledning.
-            """
-
-            user_prompt = f"""
-            Patientfråga:
-            {user_query}
-
-            Generera den begärda markeringen.
-            """
+    def _summary_prompts(self, user_query: str, language: str) -> Tuple[str, str]:
+        """Build consent summary prompts (system, user)"""
+        return SUMMARY.render(language, query=user_query)
 
-        else:
-            system_prompt = ""
-            user_prompt = ""
+    @instrument("summary")
+    async def _summary(self, user_query: str, language: str,
+                       on_delta: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Generates patient consent summary"""
 
+        # Serve repeated (or similar) procedures from cache
+        cache_args = (user_query, language, self.models.largest.cache_model, SUMMARY_PROMPT_VERSION)
+        cached, query_vec = None, None
+        with timed("summary_cache"):
+            if self.summary_cache:
+                cached = self.summary_cache.get(*cache_args)
+                record_cache("summary", cached is not None)
+            if cached is None and self.semantic_cache:
+                try:
+                    cached, query_vec = await self.semantic_cache.lookup(*cache_args)
+                except Exception as e:
+                    logger.error(f"Semantic cache lookup failed, treated as a miss: {e!r}")
+                record_cache("semantic_summary", cached is not None)
+        if cached:
+            if on_delta:
+                on_delta(cached)
+            return cached
+
+        # Fail fast while the provider is down
+        self.health.ensure_available()
+
+        # Create prompts
+        with timed("summary_prompts"):
+            system_prompt, user_prompt = self._summary_prompts(user_query, language)
 
         # Call API
-        response = self._call_llm(instructions=system_prompt,
-                                  user_input=user_prompt)
+        response = await self._call_llm(instructions=system_prompt,
+                                        user_input=user_prompt,
+                                        on_delta=on_delta,
+                                        operation="summary",
+                                        cache_key=SUMMARY.cache_key(language))
+
+        # Save to cache (only real consent summaries are matched semantically)
+        if isinstance(response, str) and response:
+            if self.summary_cache:
+                self.summary_cache.put(*cache_args, response)
+            if self.semantic_cache and query_vec is not None and self._parse_summary(response):
+                await self.semantic_cache.put(*cache_args, response, query_vec)
 
         return response
 
-    def _answer_qa(self, question: str, language: str, summary: Dict[str, Any], history: str = ""):
+    @instrument("answer_qa")
+    async def _answer_qa(self, question: str, language: str, summary: Dict[str, Any], history: str = "",
+                         on_delta: Optional[Callable[[str], None]] = None):
         """Answer questions from patient related to the procedure using the history of the conversation"""
 
-        # Create prompts
-        if language == "English":
-            system_prompt = """
-            You are an expert clinical assistant that answers a patient's questions about an upcoming procedure.
-            
-            Goals:
-            - Answer the question clearly and compassionately at A2/B1 reading level.
-            - Stay within the provided consent context; do **NOT** invent facts that are not there.
-            - If the question is ambiguous, ask a brief clarifying question.
-            - If you are uncertain, say so and suggest speaking with a clinician.
-            - If the patient describes urgent red-flag symptoms, advise seeking immediate medical care.
-            - **CRITICAL**: **ALWAYS PROPOSE** the patient to make more questions if needed, and **PROPOSE** to click
-            **'Save consent'** button if is confident with the provided information about the procedure that is taking.
-             
-            Style & format:
-            - Write EVERYTHING in English.
-            - Be concise: 2–6 short sentences, use bullets only if it improves clarity.
-            - Do NOT repeat the consent context verbatim; summarize only what’s needed.
-            - No legal or diagnostic claims; this is general information.
-            You will receive a short conversation recap below; use it only if relevant.
-            """
-
-            context =f"""Title: {summary.get('Title', '')}
-            Overview: {summary.get('Overview', '')}
-            Common risks: {', '.join(summary.get('Common risks', [])[:5])}
-            Rare risks: {', '.join(summary.get('Rare risks', [])[:3])}
-            Alternatives: {', '.join(summary.get('Alternatives', [])[:3])}
-            """
-
-            user_prompt = f"""
-            Consent context (do not repeat verbatim):
-            {context}
-            Short conversation recap:
-            {history or '(none)'}
-            Patient question:
-            {question}
-            """
-
-        elif language == "Svenska":
-            system_prompt = """
-            Du är en klinisk assistent som svarar på en patients frågor om en kommande behandling.
-            Mål:
-            - Svara på frågan tydligt och med empati på läsnivå A2/B1.
-            - Håll dig inom ramen för det angivna samtycket; **INTE** hitta på fakta som inte finns.
-            - Om frågan är tvetydig, ställ en kort förtydligande fråga.
-            - Om du är osäker, säg det och föreslå att patienten talar med en läkare.
-            - Om patienten beskriver akuta varningssymptom, råda patienten att omedelbart söka läkarvård.
-            - **VIKTIGT**: **FÖRESLÅ ALLTID** patienten att ställa fler frågor om det behövs, och **FÖRESLÅ** att klicka
-            på knappen **”Spara samtycke”** om patienten är nöjd med den information som lämnats om ingreppet.
-            
-            Stil och format:
-            - Skriv ALLT på svenska.
-            - Var kortfattad: 2–6 korta meningar, använd punktlistor endast om det förbättrar tydligheten.
-            - Upprepa INTE samtyckeskontexten ordagrant; sammanfatta endast det som behövs.
-            - Inga juridiska eller diagnostiska påståenden; detta är allmän information.
-            Nedan får du en kort sammanfattning av samtalet. Använd den endast om den är relevant.
-            """
-
-            context = f"""Titel: {summary.get('Titel', '')}
-            Översikt: {summary.get('Översikt', '')}
-            Vanliga risker: {', '.join(summary.get('Vanliga risker', [])[:5])}
-            Sällsynta risker: {', '.join(summary.get('Sällsynta risker', [])[:3])}
-            Alternativ: {', '.join(summary.get('Alternativ', [])[:3])}
-            """
-
-            user_prompt = f"""
-            Samtyckeskontext (upprepa inte ordagrant):
-            {context}
-            Kort sammanfattning av samtalet:
-            {history or '(none)'}
-            Patientens fråga:
-            {question}
-            """
-
-        else:
-            system_prompt = ""
-            user_prompt = ""
-
-        # Call API
-        response = self._call_llm(instructions=system_prompt,
-                                  user_input=user_prompt)
+        # Create prompts (static instructions, then session context, then this turn)
+        with timed("qa_prompts"):
+            fields = self.context.fields(summary, language, question)
+            passages = []
+            if self.retrieval is not None:
+                with timed("retrieve"):
+                    passages = self.retrieval.search(f"{fields.get('title', '')} {question}", language)
+            system_prompt, user_prompt = QA.render(language, question=question,
+                                                   passages=self.context.passages(passages) or "(none)",
+                                                   history=self.context.history(history) or "(none)",
+                                                   **fields)
+
+        # Fail fast while the provider is down
+        self.health.ensure_available()
+
+        # Call API (simple questions on a smaller tier, whose streamed start is held until judged;
+        # unsure answers are asked again to the largest)
+        tier = self.models.pick("qa", question)
+        held = self.models.hold(on_delta) if on_delta is not None and tier is not self.models.largest else None
+        response = await self._call_llm(instructions=system_prompt,
+                                        user_input=user_prompt,
+                                        on_delta=held or on_delta,
+                                        operation="qa",
+                                        cache_key=QA.cache_key(language),
+                                        tier=tier)
+        if tier is not self.models.largest and not (held and held.released) and self.models.unsure(response):
+            self.models.fallback(tier)
+            TIER_FALLBACKS.labels("qa", tier.name).inc()
+            response = await self._call_llm(instructions=system_prompt,
+                                            user_input=user_prompt,
+                                            on_delta=on_delta,
+                                            operation="qa",
+                                            cache_key=QA.cache_key(language),
+                                            tier=self.models.largest)
+        elif held is not None:
+            held.release()
 
         return response
 
@@ -307,35 +250,158 @@ class AIService:
 
         return "\n".join(chunks).strip()
 
-    def _call_llm(self, instructions, user_input):
-        """Call Large Language Model"""
+    async def _call_llm(self, instructions, user_input, on_delta: Optional[Callable[[str], None]] = None,
+                        operation: str = "qa", cache_key: Optional[str] = None, tier: Optional[Tier] = None):
+        """
+        Call Large Language Model ('operation' selects the deadline, retry and hedging policy;
+        'cache_key' groups requests sharing a prompt prefix; 'tier' defaults to the largest model)
+        """
+        tier = tier or self.models.largest
+        request_args = {**tier.request_args, **({"prompt_cache_key": cache_key} if cache_key else {})}
+
+        # Stream tokens when a consumer is waiting for them
+        if on_delta is not None:
+            with timed(f"llm:{operation}"):
+                start = time.perf_counter()
+                content = await self._stream_llm(instructions, user_input, on_delta, operation, request_args, tier)
+            self._observe_tier(operation, tier, time.perf_counter() - start)
+            return content
 
         # Call LLM
-        response = self.client.responses.create(
-            model=self.default_model,
-            instructions=instructions,
-            input=user_input,
-        )
+        with timed(f"llm:{operation}"):
+            start = time.perf_counter()
+            response = await self.resilience.call(operation, lambda: self.client.responses.create(
+                model=tier.model,
+                instructions=instructions,
+                input=user_input,
+                **request_args,
+            ))
+        self._observe_tier(operation, tier, time.perf_counter() - start)
+        await self._record_llm_usage(operation, getattr(response, "usage", None), tier)
 
         # Extract content
         content = self._extract_output_text(response) or {}
         return content
 
-    def _transcribe(self, path_recording) -> str:
-        """Call Speech-to-Text model"""
-        audio_file = open(path_recording, "rb")
+    async def _stream_llm(self, instructions, user_input, on_delta: Callable[[str], None],
+                          operation: str = "qa", request_args: Optional[Dict[str, Any]] = None,
+                          tier: Optional[Tier] = None) -> str:
+        """Call Large Language Model forwarding each output token to 'on_delta'"""
+        tier = tier or self.models.largest
+        chunks, usage = [], []
+
+        async def attempt() -> str:
+            # Call LLM
+            stream = await self.client.responses.create(
+                model=tier.model,
+                instructions=instructions,
+                input=user_input,
+                stream=True,
+                **(request_args or {}),
+            )
 
-        # Call API
-        transcription = self.client.audio.transcriptions.create(
-            model="gpt-4o-transcribe",
-            file=audio_file
-        )
+            # Forward content as it arrives
+            async for event in stream:
+                kind = getattr(event, "type", None)
+                if kind == "response.output_text.delta":
+                    chunks.append(event.delta)
+                    on_delta(event.delta)
+                elif kind == "response.completed":
+                    usage.append(getattr(event.response, "usage", None))
 
+            return "".join(chunks).strip()
+
+        # Retry only while nothing has reached the consumer
+        content = await self.resilience.call(operation, attempt, retryable=lambda: not chunks, hedge=False)
+        await self._record_llm_usage(operation, usage[-1] if usage else None, tier)
+        return content
+
+    def _observe_tier(self, operation: str, tier: Tier, seconds: float):
+        self.models.observe(tier, seconds)
+        TIER_CALLS.labels(operation, tier.name).inc()
+        TIER_LATENCY.labels(operation, tier.name).observe(seconds)
+
+    async def _record_llm_usage(self, operation: str, usage, tier: Tier):
+        counts = llm_usage(usage)
+        record_tokens(operation, counts)
+        cost = await self.usage.record(operation, tier.model, tier=tier.name, **counts)
+        if cost:
+            COST.labels(operation, tier.name).inc(cost)
+
+    async def _embed(self, text: str) -> np.ndarray:
+        """Call embedding model (returns a unit vector)"""
+
+        # Call API (an optional cache lookup: its failures do not open the breaker of the LLM calls)
+        with timed("embed"):
+            response = await self.resilience.call("embed", lambda: self.client.embeddings.create(
+                model=self.embedding_model,
+                input=text
+            ), trips_breaker=False)
+        await self.usage.record("embed", self.embedding_model, **llm_usage(getattr(response, "usage", None)))
+
+        vec = np.asarray(response.data[0].embedding, dtype=np.float32)
+        return vec / (np.linalg.norm(vec) or 1.0)
+
+    async def _transcribe(self, path_recording) -> str:
+        """Call Speech-to-Text model"""
+
+        async def attempt():
+            with open(path_recording, "rb") as audio_file:
+                # Call API
+                return await self.client.audio.transcriptions.create(
+                    model="gpt-4o-transcribe",
+                    file=audio_file
+                )
+
+        with timed("stt"):
+            transcription = await self.resilience.call("transcribe", attempt)
+        AUDIO_BYTES.labels("in").inc(os.path.getsize(path_recording))
+
+        # STT is billed by audio duration
+        usage = getattr(transcription, "usage", None)
+        await self.usage.record("transcribe", "gpt-4o-transcribe",
+                                stt_seconds=audio_seconds(path_recording, usage),
+                                input_tokens=getattr(usage, "input_tokens", 0),
+                                output_tokens=getattr(usage, "output_tokens", 0))
         return transcription.text
 
-    def _tts(self, tts_text: str, language: str) -> bytes:
+    async def _tts(self, tts_text: str, language: str, response_format: str = "wav") -> bytes:
         """Call Text-to-Speech model"""
 
+        # Call API
+        request = self._tts_request(tts_text, language, response_format)
+        with timed("tts"):
+            response = await self.resilience.call("tts", lambda: self.client.audio.speech.create(**request))
+        AUDIO_BYTES.labels("out").inc(len(response.content))
+        await self.usage.record("tts", request["model"], **tts_usage(request))
+
+        return response.content
+
+    async def _tts_stream(self, tts_text: str, language: str, response_format: str = "wav",
+                          chunk_size: int = 4096) -> AsyncIterator[bytes]:
+        """Call Text-to-Speech model yielding audio chunks as the provider produces them"""
+
+        # Call API (retried until the response starts; the deadline covers time to first byte)
+        request = self._tts_request(tts_text, language, response_format)
+
+        async def attempt():
+            return await self.client.audio.speech.with_streaming_response.create(**request).__aenter__()
+
+        with timed("tts_first_byte"):
+            response = await self.resilience.call("tts", attempt)
+        await self.usage.record("tts", request["model"], **tts_usage(request))
+        audio_out = AUDIO_BYTES.labels("out")
+        try:
+            with timed("tts_stream"):
+                async for chunk in response.iter_bytes(chunk_size):
+                    audio_out.inc(len(chunk))
+                    yield chunk
+        finally:
+            await response.close()
+
+    def _tts_request(self, tts_text: str, language: str, response_format: str) -> Dict[str, Any]:
+        """Build Text-to-Speech request parameters"""
+
         tts_text = tts_text.replace("'Title':", "'Procedure':")
         instructions ={"English": """You are a compassionate medical assistant speaking to a patient who is preparing for a surgery
                  or procedure. Read the provided input verbatim—do not add or remove words. Deliver in a warm, calm, reassuring,
@@ -365,13 +431,10 @@ class AIService:
                 utfyllnadsljud."""
 
         }
-        # Call API
-        response = self.client.audio.speech.create(
+        return dict(
             model="gpt-4o-mini-tts",
             voice = "ash",
             input = tts_text,
             instructions = instructions[language],
-            response_format = "wav"
+            response_format = response_format
         )
-
-        return response.content
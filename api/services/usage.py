@@ -0,0 +1,176 @@
+"""
+Provider usage and cost accounting.
+
+AIService reports the usage of every provider call (LLM input, cached input, output and reasoning
+tokens, embedding tokens, TTS characters, STT seconds) to a UsageMeter. The meter tags it with the
+session being served ('CURRENT_SESSION', set by the API per request), prices it and hands it to a
+sink; the API writes it as a 'usage' record into the audit log, so it is indexed by session and
+archived like every other record. 'aggregate' sums records per session, day, operation or model.
+
+Prices are estimates in USD (per 1M tokens or characters, per minute of audio) and can be overridden
+with a JSON file in 'USAGE_PRICES'. Batch API calls are billed at 'BATCH_PRICE_FACTOR' of the rates.
+Text-to-Speech is billed on text input and audio output tokens; raw audio responses carry no usage,
+so 'tts_usage' estimates them (text tokens counted locally, audio tokens from the spoken words at
+the pace the TTS instructions ask for).
+"""
+import os
+import json
+import wave
+import logging
+import contextvars
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+from .context import count_tokens
+
+# Define logger
+logger = logging.getLogger(__name__)
+
+# Session served by the current request (set by the API, read when usage is recorded)
+CURRENT_SESSION: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_session", default=None)
+
+COUNTERS = ("input_tokens", "cached_input_tokens", "output_tokens", "reasoning_tokens", "tts_characters",
+            "stt_seconds")
+
+# USD per 1M tokens / 1M characters, per audio minute
+DEFAULT_PRICES = {
+    "gpt-5-2025-08-07": {"input_tokens": 1.25, "cached_input_tokens": 0.125, "output_tokens": 10.0},
+    "gpt-5-mini-2025-08-07": {"input_tokens": 0.25, "cached_input_tokens": 0.025, "output_tokens": 2.0},
+    "gpt-5-nano-2025-08-07": {"input_tokens": 0.05, "cached_input_tokens": 0.005, "output_tokens": 0.4},
+    "text-embedding-3-small": {"input_tokens": 0.02},
+    "gpt-4o-mini-tts": {"input_tokens": 0.60, "output_tokens": 12.0},
+    "gpt-4o-transcribe": {"stt_minutes": 0.006},
+}
+
+# Share of the regular price billed for Batch API calls
+BATCH_PRICE_FACTOR = 0.5
+
+# Speech pace of the TTS instructions and audio output tokens per minute of gpt-4o-mini-tts ($0.015/min)
+TTS_WORDS_PER_MINUTE = 140
+TTS_AUDIO_TOKENS_PER_MINUTE = 1250
+
+
+def _field(obj: Any, name: str) -> Any:
+    return obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+
+
+def llm_usage(usage: Any) -> Dict[str, int]:
+    """Counters of a Responses API (or embeddings) 'usage' object, or of its JSON form in batch output"""
+    if usage is None:
+        return {}
+    input_details = _field(usage, "input_tokens_details")
+    output_details = _field(usage, "output_tokens_details")
+    return {"input_tokens": _field(usage, "input_tokens") or _field(usage, "prompt_tokens") or 0,
+            "cached_input_tokens": (_field(input_details, "cached_tokens") if input_details else 0) or 0,
+            "output_tokens": _field(usage, "output_tokens") or 0,
+            "reasoning_tokens": (_field(output_details, "reasoning_tokens") if output_details else 0) or 0}
+
+
+def tts_usage(request: Dict[str, Any]) -> Dict[str, float]:
+    """Estimated counters of one Text-to-Speech request (text and instructions in, audio out)"""
+    text = request.get("input", "")
+    minutes = len(text.split()) / TTS_WORDS_PER_MINUTE
+    return {"input_tokens": count_tokens(text) + count_tokens(request.get("instructions") or ""),
+            "output_tokens": round(minutes * TTS_AUDIO_TOKENS_PER_MINUTE), "tts_characters": len(text)}
+
+
+def audio_seconds(path: str, usage: Any = None) -> Optional[float]:
+    """Duration of an audio file, from the transcription usage or else the WAV header"""
+    if getattr(usage, "type", None) == "duration":
+        return float(usage.seconds)
+    try:
+        with wave.open(path, "rb") as f:
+            return f.getnframes() / float(f.getframerate())
+    except (wave.Error, EOFError, OSError):
+        return None
+
+
+class UsageMeter:
+    """
+    Prices provider usage and forwards it to 'sink' (an async callable taking kind and payload).
+
+    Args:
+        prices: USD rates per model (see DEFAULT_PRICES).
+    """
+
+    def __init__(self, prices: Optional[Dict[str, Dict[str, float]]] = None):
+        self.prices = prices if prices is not None else DEFAULT_PRICES
+        self.sink: Optional[Callable[[str, Dict[str, Any]], Awaitable[None]]] = None
+
+    @classmethod
+    def from_env(cls) -> "UsageMeter":
+        path = os.getenv("USAGE_PRICES")
+        if not path:
+            return cls()
+        with open(path, encoding="utf-8") as f:
+            return cls({**DEFAULT_PRICES, **json.load(f)})
+
+    def cost(self, model: str, counts: Dict[str, float], batch: bool = False) -> Optional[float]:
+        """Estimated USD cost (None for models without a price)"""
+        rates = self.prices.get(model)
+        if rates is None:
+            return None
+        uncached = counts.get("input_tokens", 0) - counts.get("cached_input_tokens", 0)
+        cost = (uncached * rates.get("input_tokens", 0)
+                + counts.get("cached_input_tokens", 0) * rates.get("cached_input_tokens", rates.get("input_tokens", 0))
+                + counts.get("output_tokens", 0) * rates.get("output_tokens", 0)
+                + counts.get("tts_characters", 0) * rates.get("tts_characters", 0)) / 1e6
+        cost += counts.get("stt_seconds", 0) / 60 * rates.get("stt_minutes", 0)
+        return round(cost * (BATCH_PRICE_FACTOR if batch else 1.0), 8)
+
+    async def record(self, operation: str, model: str, tier: Optional[str] = None, batch: bool = False,
+                     **counts: float) -> Optional[float]:
+        """
+        Record the usage of one provider call (reasoning tokens are part of output tokens) and return
+        its estimated cost
+        """
+        counts = {k: v for k, v in counts.items() if v}
+        record = {"session_id": CURRENT_SESSION.get(), "operation": operation, "model": model, **counts,
+                  "cost_usd": self.cost(model, counts, batch)}
+        if tier:
+            record["tier"] = tier
+        if batch:
+            record["batch"] = True
+        if counts.get("input_tokens"):
+            record["cached_input_ratio"] = round(counts.get("cached_input_tokens", 0) / counts["input_tokens"], 4)
+        if self.sink is not None:
+            try:
+                await self.sink("usage", record)
+            except Exception as e:
+                logger.error(f"Failed to record usage: {e}")
+        return record["cost_usd"]
+
+
+def aggregate(records: Iterable[Dict[str, Any]], group_by: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Sum usage records overall and per 'group_by' ("session", "day", "operation", "model" or "tier"). Days are
+    listed in order, other groups by cost, highest first, so runaway sessions come out on top.
+    """
+    def empty():
+        return {"calls": 0, **{c: 0 for c in COUNTERS}, "cost_usd": 0.0}
+
+    def add(totals, record):
+        totals["calls"] += 1
+        for c in COUNTERS:
+            totals[c] += record.get(c) or 0
+        totals["cost_usd"] += record.get("cost_usd") or 0.0
+
+    key = {"session": lambda r: r.get("session_id"), "day": lambda r: r["ts"][:10],
+           "operation": lambda r: r.get("operation"), "model": lambda r: r.get("model"),
+           "tier": lambda r: r.get("tier")}.get(group_by)
+
+    total, groups = empty(), {}
+    for record in records:
+        add(total, record)
+        if key:
+            k = key(record)
+            add(groups.setdefault(k, empty()), record)
+
+    def rounded(totals):
+        totals["cost_usd"] = round(totals["cost_usd"], 6)
+        totals["stt_seconds"] = round(totals["stt_seconds"], 3)
+        totals["cached_input_ratio"] = (round(totals["cached_input_tokens"] / totals["input_tokens"], 4)
+                                        if totals["input_tokens"] else None)
+        return totals
+
+    ordered = sorted(groups.items(), key=lambda kv: kv[0] if group_by == "day" else -kv[1]["cost_usd"])
+    return {"total": rounded(total), "groups": [{"key": k, **rounded(v)} for k, v in ordered]}
@@ -1,4 +1,5 @@
 import os
+from json import loads
 import streamlit as st
 import requests
 
@@ -15,6 +16,23 @@ def api_post(path:str, json=None, **kwargs):
     return st.session_state.http.post(url, json=json, timeout=kwargs.pop("timeout", 90), **kwargs)
 
 
+def api_stream(path:str, json=None, **kwargs):
+    """Iterate over the Server-Sent Events of a streaming endpoint as (event, data) tuples."""
+    url = f"{BACKEND_URL}{path}"
+    with st.session_state.http.post(url, json=json, stream=True, timeout=kwargs.pop("timeout", 90), **kwargs) as r:
+        r.raise_for_status()
+        event, data = "message", []
+        for line in r.iter_lines(decode_unicode=True):
+            if not line:
+                if data:
+                    yield event, loads("\n".join(data))
+                event, data = "message", []
+            elif line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                data.append(line[len("data:"):].strip())
+
+
 def check_backend() -> None:
     try:
         r = api_get("/health")
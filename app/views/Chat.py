@@ -13,7 +13,7 @@ from streamlit_drawable_canvas import st_canvas
 #    sys.path.insert(0, project_root)
 
 # Import functions
-from utils.ui_helpers import api_post
+from utils.ui_helpers import api_get, api_post, api_stream
 from utils.i18n import t
 
 # Load environment variables
@@ -35,14 +35,25 @@ def process_text(text_input: str, type: str):
             "stage": "",
             "language": st.session_state.language
         }
-        response = api_post("/chat", json=payload)
-        response.raise_for_status()
 
-        # Extract response
-        data = response.json()
-        answer = data.get("answer", "").strip()
-        summary = data.get("summary")
-        stage = data.get("stage")
+        # Render the answer progressively while it streams
+        with st.chat_message("assistant"):
+            placeholder = st.empty()
+            sections, answer, summary, stage = {}, "", None, None
+            for event, data in api_stream("/chat/stream", json=payload):
+                if event == "section":
+                    sections[data["name"]] = data["value"]
+                    with placeholder.container():
+                        render_consent_summary(sections, partial=True)
+                elif event == "delta" and not sections:
+                    answer += data["text"]
+                    placeholder.markdown(answer)
+                elif event == "done":
+                    answer = (data.get("answer") or "").strip()
+                    summary = data.get("summary")
+                    stage = data.get("stage")
+                elif event == "error":
+                    raise RuntimeError(data.get("detail"))
 
         if stage == "summary":
             assistant_message = summary
@@ -115,13 +126,18 @@ def generate_tts(session_id: str, text_input: str, stage: str, language: str) ->
         "session_id": session_id,
         "text_input": text_input,
         "stage": stage,
-        "language": language
+        "language": language,
+        "format": "mp3"
     }
-    r = api_post("/tts", json=payload)
+    r = api_post("/audio", json=payload)
     r.raise_for_status()
 
+    # Download audio by handle
+    audio = api_get(f"/audio/{r.json()['handle']}")
+    audio.raise_for_status()
+
     # Return response content
-    return r.content  # Audio bytes
+    return audio.content  # Audio bytes
 
 
 def create_signature_space(id: str) -> bool:
@@ -192,11 +208,15 @@ def create_signature_space(id: str) -> bool:
         return False
 
 
-def render_consent_summary(sections: dict):
+def render_consent_summary(sections: dict, partial: bool = False):
     """
     Function that renders consent summary.
+    While streaming ('partial'), sections not received yet are left blank instead of reported as missing.
     """
 
+    def _get(key: str, not_found: str):
+        return sections.get(t(key), "" if partial else t(not_found))
+
     def _md_list(value):
         if isinstance(value, list):
             return "\n".join(f"- {item}" for item in value) if value else ""
@@ -204,20 +224,20 @@ def render_consent_summary(sections: dict):
 
     # Main space
     with st.container(border=False):
-        st.markdown(f"#### {t('procedure_label')}: {sections.get(t('title'), t('procedure_not_found'))}")#####
+        st.markdown(f"#### {t('procedure_label')}: {_get('title', 'procedure_not_found')}")#####
         st.markdown("<br>", unsafe_allow_html=True)
-        st.markdown(_md_list(sections.get(t('overview'), t("procedure_not_found"))))
+        st.markdown(_md_list(_get('overview', "procedure_not_found")))
         st.markdown("<br>", unsafe_allow_html=True)
 
         # Two columns to make it more compact
         col1, col2 = st.columns(2, vertical_alignment="top")
         with col1:
             st.markdown(f"**✅ {t('benefits')}**")
-            st.markdown(_md_list(sections.get(t('benefits'), t("benefits_not_found"))))
+            st.markdown(_md_list(_get('benefits', "benefits_not_found")))
 
         with col2:
             st.markdown(f"**🔄 {t('alternatives')}**")
-            st.markdown(_md_list(sections.get(t('alternatives'), t("alternatives_not_found"))))
+            st.markdown(_md_list(_get('alternatives', "alternatives_not_found")))
 
         st.markdown("<br>", unsafe_allow_html=True)
 
@@ -225,11 +245,11 @@ def render_consent_summary(sections: dict):
         col1, col2 = st.columns(2, vertical_alignment="top")
         with col1:
             st.markdown(f"**⚠️ {t('common_risks')}**")
-            st.markdown(_md_list(sections.get(t('common_risks'), t("common_risks_not_found"))))
+            st.markdown(_md_list(_get('common_risks', "common_risks_not_found")))
 
         with col2:
             st.markdown(f"**❗ {t('rare_risks')}**")
-            st.markdown(_md_list(sections.get(t('rare_risks'), t("rare_risks_not_found"))))
+            st.markdown(_md_list(_get('rare_risks', "rare_risks_not_found")))
 
         st.markdown("<br>", unsafe_allow_html=True)
 
@@ -237,11 +257,11 @@ def render_consent_summary(sections: dict):
         col1, col2 = st.columns(2, vertical_alignment="top")
         with col1:
             st.markdown(f"**🧰 {t('preparation')}**")
-            st.markdown(_md_list(sections.get(t('preparation'), t("preparation_not_found"))))
+            st.markdown(_md_list(_get('preparation', "preparation_not_found")))
 
         with col2:
             st.markdown(f"**🚑 {t('seek_help')}**")
-            st.markdown(_md_list(sections.get(t('seek_help'), t("seek_help_not_found"))))
+            st.markdown(_md_list(_get('seek_help', "seek_help_not_found")))
 
         # Last paragraph
         if sections.get(f"{t('more_questions')}"):
@@ -297,17 +317,17 @@ with (st.container(border=False, height=450)):
             if msg["role"] == "assistant" and msg["type"] == "audio":
                 if msg["id"] not in st.session_state.tts_played:
                     with st.spinner("🎙️" + t("spinner_tts")):
-                        audio_bytes = generate_tts(session_id = msg["id"],
+                        audio_bytes = generate_tts(session_id = st.session_state.session_id,
                                                    text_input = str(msg["content"]),
                                                    stage = msg["stage"],
                                                    language = st.session_state.language)
                     st.markdown("<br>", unsafe_allow_html=True)
-                    st.audio(audio_bytes, format="audio/wav", autoplay=True)
+                    st.audio(audio_bytes, format="audio/mpeg", autoplay=True)
                     st.session_state.tts_played[msg["id"]] = audio_bytes
 
                 else:
                     st.markdown("<br>", unsafe_allow_html=True)
-                    st.audio(st.session_state.tts_played[msg["id"]], format="audio/wav", autoplay=False)
+                    st.audio(st.session_state.tts_played[msg["id"]], format="audio/mpeg", autoplay=False)
 
             # Consent checkbox
             if (msg["role"] == "assistant" and msg["stage"] == "summary" or msg["stage"] == "qa") \
@@ -0,0 +1,57 @@
+"""
+Archive closed days of the audit logs in 'data/logs' as compressed Parquet.
+
+Every '<day>.jsonl' whose UTC day ended more than '--grace-hours' ago (and at least '--older-than-days'
+days old) is converted to 'data/logs/archive/<day>.parquet' and removed from the live logs and their
+index. '/logs' and 'query_logs.py' keep returning archived records. Reports the size reduction.
+
+Usage:
+    python archive_logs.py --older-than-days 7
+    python archive_logs.py --dry-run
+"""
+import argparse
+from datetime import timedelta
+
+from api.services.cache import DATA_DIR
+from api.services.log_index import LogIndex
+from api.services.log_archive import LogArchive
+
+
+# Main
+def run():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--older-than-days", type=int, default=1, help="Minimum age of the days to archive")
+    parser.add_argument("--grace-hours", type=float, default=1.0, help="Wait after midnight for late records")
+    parser.add_argument("--keep-source", action="store_true", help="Keep the JSONL files after archiving")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the days that would be archived")
+    parser.add_argument("--log-dir", default=str(DATA_DIR / "logs"))
+    args = parser.parse_args()
+
+    archive = LogArchive.from_env(args.log_dir)
+    index = LogIndex.from_env(args.log_dir)
+    days = archive.closed_days(timedelta(days=max(0, args.older_than_days - 1), hours=args.grace_hours))
+    if args.dry_run:
+        print("\n".join(days) if days else "Nothing to archive.")
+        return
+
+    total_in = total_out = records = 0
+    for day in days:
+        stats = archive.archive(day, keep_source=args.keep_source)
+        if not stats["source_kept"]:
+            index.forget(day)
+        total_in, total_out = total_in + stats["jsonl_bytes"], total_out + stats["parquet_bytes"]
+        records += stats["records"]
+        rejected = f", {stats['rejected']} rejected" if stats["rejected"] else ""
+        print(f"{day}: {stats['records']:,} records, {stats['jsonl_bytes'] / 1e6:.2f} MB -> "
+              f"{stats['parquet_bytes'] / 1e6:.2f} MB ({stats['jsonl_bytes'] / max(stats['parquet_bytes'], 1):.1f}x) "
+              f"in {stats['seconds']:.2f}s{rejected}", flush=True)
+
+    if days:
+        print(f"\n{len(days)} days, {records:,} records: {total_in / 1e6:.1f} MB -> {total_out / 1e6:.1f} MB "
+              f"({total_in / max(total_out, 1):.1f}x smaller)")
+    else:
+        print("Nothing to archive.")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,81 @@
+"""
+Benchmark: process memory (RSS) while 10k sessions go through a checkpointed graph.
+
+Each session runs two turns of a stand-in graph whose state grows like the consent agent
+(messages + summary). Compare:
+    python benchmarks/checkpointer_rss.py --backend memory
+    python benchmarks/checkpointer_rss.py --backend sqlite
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import resource
+import tempfile
+from pathlib import Path
+from typing import TypedDict, Annotated, List, Dict
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from langgraph.graph import StateGraph, START, END
+from langgraph.graph.message import add_messages
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
+
+
+class State(TypedDict, total=False):
+    messages: Annotated[List[BaseMessage], add_messages]
+    user_text: str
+    summary: Dict[str, object]
+
+
+def rss_mb() -> float:
+    """Current resident set size (falls back to peak RSS outside Linux)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def reply(state: State) -> State:
+    summary = {"Title": "Appendectomy", "Common risks": ["Pain " * 40] * 6, "Overview": "x" * 2000}
+    return {"messages": [HumanMessage(content=state["user_text"]), AIMessage(content=str(summary))],
+            "summary": summary}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="sqlite")
+    parser.add_argument("--sessions", type=int, default=10_000)
+    parser.add_argument("--report-every", type=int, default=1_000)
+    args = parser.parse_args()
+
+    os.environ["CHECKPOINTER"] = args.backend
+    os.environ.setdefault("CHECKPOINT_PATH", str(Path(tempfile.mkdtemp()) / "bench.sqlite"))
+    from api.services.checkpoint import make_checkpointer
+
+    workflow = StateGraph(State)
+    workflow.add_node("Reply", reply)
+    workflow.add_edge(START, "Reply")
+    workflow.add_edge("Reply", END)
+    graph = workflow.compile(checkpointer=make_checkpointer())
+
+    print(f"backend={args.backend} sessions={args.sessions}")
+    print(f"{'sessions':>9} {'rss_mb':>8} {'elapsed_s':>10}")
+    start, baseline = time.perf_counter(), rss_mb()
+    for i in range(1, args.sessions + 1):
+        config = {"configurable": {"thread_id": f"session-{i}"}}
+        await graph.ainvoke({"user_text": "appendectomy"}, config=config)
+        await graph.ainvoke({"user_text": "will it hurt?"}, config=config)
+        if i % args.report_every == 0:
+            print(f"{i:>9} {rss_mb():>8.1f} {time.perf_counter() - start:>10.1f}")
+    print(f"RSS growth: {rss_mb() - baseline:.1f} MB")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
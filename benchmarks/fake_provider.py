@@ -0,0 +1,345 @@
+"""
+Local stand-in for the OpenAI API, for testing and load testing without network access.
+
+Implements the subset of endpoints the backend uses: '/v1/responses' (plain and streamed), speech
+synthesis and transcription, embeddings, file upload and download, Batch jobs over '/v1/responses'
+and the model lookup used as health probe. Summaries are templated markdown with the section headings
+'_parse_summary' expects, answers are a few sentences, speech is silent WAV whose length follows the
+text. State is kept in memory.
+
+Provider calls (responses, speech, transcription, embeddings) wait a latency drawn from the
+configured distribution, streams add a delay per token, and a share of calls can fail with a chosen
+status code (429 responses carry Retry-After).
+
+    python benchmarks/fake_provider.py --port 9000 --batch-delay 2
+    OPENAI_BASE_URL=http://127.0.0.1:9000/v1 OPENAI_API_KEY=fake python prewarm.py catalog.json --batch
+    python benchmarks/fake_provider.py --latency 0.8 --latency-dist lognormal --latency-sigma 0.5 --error-rate 0.02
+"""
+import io
+import os
+import json
+import time
+import uuid
+import wave
+import random
+import asyncio
+import argparse
+from collections import deque
+
+import uvicorn
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+SECTIONS = {
+    "English": ["Title", "Overview", "Benefits", "Common risks", "Rare risks", "Alternatives", "Preparation",
+                "When to seek help", "More questions or click 'Save consent' button"],
+    "Svenska": ["Titel", "Översikt", "Fördelar", "Vanliga risker", "Sällsynta risker", "Alternativ",
+                "Förberedelser", "När ska man söka hjälp", "Fler frågor eller klicka på knappen 'Spara samtycke'"],
+}
+
+app = FastAPI(title="Fake provider")
+app.state.batch_delay_s = 2.0
+app.state.fail_marker = "FAIL"
+app.state.latency_s = 0.0
+app.state.latency_dist = "const"
+app.state.latency_sigma = 0.5
+app.state.token_interval_s = 0.0
+app.state.error_rate = 0.0
+app.state.error_status = 500
+app.state.retry_after_s = 1.0
+app.state.transcript = "Will it hurt?"
+app.state.cache_min_tokens = 1024
+FILES: dict = {}
+BATCHES: dict = {}
+PROMPTS: deque = deque(maxlen=256)
+
+
+# Audio produced by the fake speech endpoint
+SAMPLE_RATE = 24000
+CHARS_PER_SECOND = 15
+
+
+# Helpers definition
+def sample_latency() -> float:
+    """Provider latency drawn from the configured distribution ('latency_s' is its median)"""
+    median, sigma = app.state.latency_s, app.state.latency_sigma
+    if median <= 0:
+        return 0.0
+    if app.state.latency_dist == "uniform":
+        return random.uniform(median * (1 - sigma), median * (1 + sigma))
+    if app.state.latency_dist == "lognormal":
+        return random.lognormvariate(0, sigma) * median
+    return median
+
+
+def injected_error():
+    """Error response for the configured share of provider calls, else None"""
+    if random.random() >= app.state.error_rate:
+        return None
+    status = app.state.error_status
+    headers = {"retry-after": str(app.state.retry_after_s)} if status == 429 else {}
+    return JSONResponse({"error": {"message": "Injected failure", "type": "fake_error", "code": None}},
+                        status_code=status, headers=headers)
+
+
+def answer_text(user_input: str) -> str:
+    """A short answer to a '_answer_qa' prompt"""
+    question = user_input.strip().splitlines()[-1].strip() if user_input.strip() else ""
+    return (f"Thank you for asking about '{question}'. This is general information about your procedure. "
+            "Most patients recover well, and your care team will explain what to expect. "
+            "Feel free to ask more questions, or click 'Save consent' if you feel confident.")
+
+
+def output_text(user_input: str, instructions: str) -> str:
+    if "Patient question:" in user_input or "Patientens fråga:" in user_input:
+        return answer_text(user_input)
+    return summary_markdown(user_input, instructions)
+
+
+def silent_wav(seconds: float) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(b"\x00\x00" * int(SAMPLE_RATE * seconds))
+    return buffer.getvalue()
+
+
+def summary_markdown(user_input: str, instructions: str) -> str:
+    """Templated consent summary for the procedure in a '_summary' user prompt"""
+    language = "Svenska" if "Patientfråga" in user_input else "English"
+    lines = [line.strip() for line in user_input.splitlines() if line.strip()]
+    procedure = lines[1] if len(lines) > 1 else "Procedure"
+    title, *sections = SECTIONS[language]
+    lines = [f"# {title}", procedure]
+    for section in sections:
+        lines += [f"## {section}", f"- {section} of {procedure} (1)", f"- {section} of {procedure} (2)"]
+    return "\n".join(lines)
+
+
+def cached_tokens(prompt: str) -> int:
+    """
+    Simulated prompt caching: the longest prefix shared with a recent prompt, counted (like the
+    provider) only from 'cache_min_tokens' on and in steps of 128 tokens (4 characters per token).
+    """
+    shared = 0
+    for previous in PROMPTS:
+        n = len(os.path.commonprefix([previous, prompt]))
+        shared = max(shared, n)
+    PROMPTS.append(prompt)
+    tokens = shared // 4
+    return tokens // 128 * 128 if tokens >= app.state.cache_min_tokens else 0
+
+
+def response_body(model: str, instructions: str, user_input: str, text: str = None) -> dict:
+    text = text if text is not None else output_text(user_input, instructions)
+    cached = cached_tokens((instructions or "") + user_input)
+    return {
+        "id": f"resp_{uuid.uuid4().hex}", "object": "response", "created_at": int(time.time()),
+        "status": "completed", "model": model,
+        "output": [{"id": f"msg_{uuid.uuid4().hex}", "type": "message", "role": "assistant", "status": "completed",
+                    "content": [{"type": "output_text", "text": text, "annotations": []}]}],
+        "usage": {"input_tokens": len((instructions or "") + user_input) // 4,
+                  "input_tokens_details": {"cached_tokens": cached},
+                  "output_tokens": len(text) // 4, "output_tokens_details": {"reasoning_tokens": 0},
+                  "total_tokens": (len((instructions or "") + user_input) + len(text)) // 4},
+    }
+
+
+def file_object(file_id: str) -> dict:
+    f = FILES[file_id]
+    return {"id": file_id, "object": "file", "bytes": len(f["content"]), "created_at": f["created_at"],
+            "filename": f["filename"], "purpose": f["purpose"], "status": "processed"}
+
+
+def store_file(content: bytes, filename: str, purpose: str) -> str:
+    file_id = f"file-{uuid.uuid4().hex}"
+    FILES[file_id] = {"content": content, "filename": filename, "purpose": purpose, "created_at": int(time.time())}
+    return file_id
+
+
+def run_batch(batch: dict):
+    """Execute every request of the batch input file and attach output/error files"""
+    outputs, errors = [], []
+    for line in FILES[batch["input_file_id"]]["content"].decode("utf-8").splitlines():
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        body = request["body"]
+        record = {"id": f"batch_req_{uuid.uuid4().hex}", "custom_id": request["custom_id"]}
+        if app.state.fail_marker and app.state.fail_marker in body.get("input", ""):
+            errors.append({**record, "response": {"status_code": 500, "request_id": uuid.uuid4().hex,
+                                                  "body": {"error": {"message": "Injected failure"}}},
+                           "error": None})
+        else:
+            outputs.append({**record, "response": {"status_code": 200, "request_id": uuid.uuid4().hex,
+                                                   "body": response_body(body["model"], body.get("instructions"),
+                                                                         body["input"])},
+                            "error": None})
+
+    def dump(records):
+        return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records).encode("utf-8")
+
+    batch["output_file_id"] = store_file(dump(outputs), "batch_output.jsonl", "batch_output") if outputs else None
+    batch["error_file_id"] = store_file(dump(errors), "batch_errors.jsonl", "batch_output") if errors else None
+    batch["request_counts"] = {"total": len(outputs) + len(errors), "completed": len(outputs), "failed": len(errors)}
+    batch["status"], batch["completed_at"] = "completed", int(time.time())
+
+
+# Endpoints
+@app.post("/v1/files")
+async def upload_file(file: UploadFile = File(...), purpose: str = Form(...)):
+    return file_object(store_file(await file.read(), file.filename, purpose))
+
+
+@app.get("/v1/files/{file_id}")
+def get_file(file_id: str):
+    if file_id not in FILES:
+        raise HTTPException(status_code=404, detail="No such file")
+    return file_object(file_id)
+
+
+@app.get("/v1/files/{file_id}/content")
+def get_file_content(file_id: str):
+    if file_id not in FILES:
+        raise HTTPException(status_code=404, detail="No such file")
+    return PlainTextResponse(FILES[file_id]["content"].decode("utf-8"), media_type="application/jsonl")
+
+
+@app.post("/v1/batches")
+def create_batch(payload: dict):
+    if payload.get("input_file_id") not in FILES:
+        raise HTTPException(status_code=400, detail="Unknown input_file_id")
+    batch_id = f"batch_{uuid.uuid4().hex}"
+    BATCHES[batch_id] = {
+        "id": batch_id, "object": "batch", "endpoint": payload["endpoint"], "errors": None,
+        "input_file_id": payload["input_file_id"], "completion_window": payload["completion_window"],
+        "status": "in_progress", "output_file_id": None, "error_file_id": None,
+        "created_at": int(time.time()), "metadata": payload.get("metadata"),
+        "request_counts": {"total": 0, "completed": 0, "failed": 0},
+    }
+    return BATCHES[batch_id]
+
+
+@app.get("/v1/batches/{batch_id}")
+def get_batch(batch_id: str):
+    batch = BATCHES.get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="No such batch")
+    if batch["status"] == "in_progress" and time.time() - batch["created_at"] >= app.state.batch_delay_s:
+        run_batch(batch)
+    return batch
+
+
+@app.post("/v1/responses")
+async def create_response(payload: dict):
+    await asyncio.sleep(sample_latency())
+    if (error := injected_error()) is not None:
+        return error
+
+    instructions, user_input = payload.get("instructions"), payload.get("input", "")
+    text = output_text(user_input, instructions)
+    deltas = [text[i:i + 16] for i in range(0, len(text), 16)]
+    body = response_body(payload.get("model", "fake"), instructions, user_input, text)
+    if not payload.get("stream"):
+        await asyncio.sleep(app.state.token_interval_s * len(deltas))
+        return body
+
+    async def events():
+        def sse(event: dict) -> str:
+            return f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+        item_id = body["output"][0]["id"]
+        yield sse({"type": "response.created", "sequence_number": 0,
+                   "response": {**body, "status": "in_progress", "output": []}})
+        for n, delta in enumerate(deltas, start=1):
+            await asyncio.sleep(app.state.token_interval_s)
+            yield sse({"type": "response.output_text.delta", "sequence_number": n, "item_id": item_id,
+                       "output_index": 0, "content_index": 0, "delta": delta, "logprobs": []})
+        yield sse({"type": "response.completed", "sequence_number": len(deltas) + 1, "response": body})
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.post("/v1/audio/speech")
+async def create_speech(payload: dict):
+    await asyncio.sleep(sample_latency())
+    if (error := injected_error()) is not None:
+        return error
+
+    audio = silent_wav(len(payload.get("input", "")) / CHARS_PER_SECOND)
+
+    async def chunks():
+        for i in range(0, len(audio), 16384):
+            yield audio[i:i + 16384]
+
+    return StreamingResponse(chunks(), media_type="audio/wav")
+
+
+@app.post("/v1/audio/transcriptions")
+async def create_transcription(file: UploadFile = File(...), model: str = Form(...)):
+    data = await file.read()
+    await asyncio.sleep(sample_latency())
+    if (error := injected_error()) is not None:
+        return error
+    try:
+        with wave.open(io.BytesIO(data), "rb") as f:
+            seconds = f.getnframes() / float(f.getframerate())
+    except (wave.Error, EOFError):
+        seconds = len(data) / 32000
+    return {"text": app.state.transcript, "usage": {"type": "duration", "seconds": round(seconds, 2)}}
+
+
+@app.post("/v1/embeddings")
+async def create_embedding(payload: dict):
+    await asyncio.sleep(sample_latency())
+    if (error := injected_error()) is not None:
+        return error
+    text = payload["input"] if isinstance(payload["input"], str) else " ".join(payload["input"])
+    rng = random.Random(text.lower())
+    return {"object": "list", "model": payload.get("model", "fake"),
+            "data": [{"object": "embedding", "index": 0, "embedding": [rng.gauss(0, 1) for _ in range(256)]}],
+            "usage": {"prompt_tokens": len(text) // 4, "total_tokens": len(text) // 4}}
+
+
+@app.get("/v1/models/{model}")
+def get_model(model: str):
+    return {"id": model, "object": "model", "created": 0, "owned_by": "fake"}
+
+
+# Main
+def run():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--batch-delay", type=float, default=2.0, help="Seconds before a batch job completes")
+    parser.add_argument("--fail-marker", default="FAIL", help="Requests whose input contains this fail (empty: never)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Median seconds added to every provider call")
+    parser.add_argument("--latency-dist", choices=["const", "uniform", "lognormal"], default="const")
+    parser.add_argument("--latency-sigma", type=float, default=0.5,
+                        help="Lognormal sigma, or relative half-width of the uniform distribution")
+    parser.add_argument("--token-interval", type=float, default=0.0, help="Seconds per streamed text delta")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of provider calls that fail")
+    parser.add_argument("--error-status", type=int, default=500, help="Status code of injected failures")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After (s) sent with injected 429s")
+    parser.add_argument("--transcript", default="Will it hurt?", help="Text returned by every transcription")
+    parser.add_argument("--cache-min-tokens", type=int, default=1024, help="Shortest prefix reported as cached")
+    args = parser.parse_args()
+
+    app.state.batch_delay_s = args.batch_delay
+    app.state.fail_marker = args.fail_marker
+    app.state.latency_s = args.latency
+    app.state.latency_dist = args.latency_dist
+    app.state.latency_sigma = args.latency_sigma
+    app.state.token_interval_s = args.token_interval
+    app.state.error_rate = args.error_rate
+    app.state.error_status = args.error_status
+    app.state.retry_after_s = args.retry_after
+    app.state.transcript = args.transcript
+    app.state.cache_min_tokens = args.cache_min_tokens
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,117 @@
+"""
+Evaluate the router's intent fast path over recorded chat sessions.
+
+The corpus is JSONL with one {"session", "language", "text", "intent"} record per turn, where 'intent'
+is the expected fast path ("greeting", "thanks", "consent") or null for input the LLM must handle.
+The script reports precision and recall of the lexicon (and of the optional embedding model), inputs
+wrongly kept away from the LLM, and the classification latency. It then replays the sessions through
+the graph against 'fake_provider.py' with the fast path off and on and counts the provider calls.
+
+    python benchmarks/intent_fast_path.py
+    python benchmarks/intent_fast_path.py --corpus sessions.jsonl --skip-replay
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from multiworker_load import stop, wait_ready
+from api.services.intents import INTENTS, IntentClassifier
+
+
+def load_corpus(path: Path) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def evaluate(classifier: IntentClassifier, corpus: list) -> dict:
+    counts = defaultdict(lambda: {"tp": 0, "fp": 0, "fn": 0})
+    wrong_fast = []
+    start = time.perf_counter()
+    predictions = [classifier.classify(r["text"]) for r in corpus]
+    us = (time.perf_counter() - start) / len(corpus) * 1e6
+    for record, predicted in zip(corpus, predictions):
+        expected = record["intent"]
+        if predicted == expected:
+            if expected:
+                counts[expected]["tp"] += 1
+            continue
+        if predicted:
+            counts[predicted]["fp"] += 1
+            if expected is None:
+                wrong_fast.append(record["text"])
+        if expected:
+            counts[expected]["fn"] += 1
+    return {"intents": {i: {"precision": c["tp"] / max(1, c["tp"] + c["fp"]), "recall": c["tp"] / max(1, c["tp"] + c["fn"])}
+                        for i, c in ((i, counts[i]) for i in INTENTS)},
+            "wrong_fast": wrong_fast, "us_per_input": us}
+
+
+async def replay(corpus: list, fast_path: bool) -> dict:
+    """Provider calls (summary and Q&A) of the corpus sessions through the graph"""
+    from api.services import ai_service as graph_module
+
+    graph_module.intents.enabled = fast_path
+    graph_module.ai_service.resilience.operations.clear()
+    for record in corpus:
+        await graph_module.GRAPH.ainvoke({"user_text": record["text"], "language": record["language"]},
+                                         config={"configurable": {"thread_id": f"{fast_path}-{record['session']}"}})
+    operations = graph_module.ai_service.resilience.stats()["operations"]
+    return {op: operations[op]["calls"] for op in ("summary", "qa") if op in operations}
+
+
+# Main
+def run():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", type=Path, default=Path(__file__).parent / "data" / "chat_sessions.jsonl")
+    parser.add_argument("--threshold", type=float, default=0.8, help="Embedding model similarity threshold")
+    parser.add_argument("--skip-replay", action="store_true", help="Only evaluate the classifier")
+    parser.add_argument("--provider-port", type=int, default=9300)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    print(f"{len(corpus)} inputs, {sum(r['intent'] is not None for r in corpus)} expected on the fast path\n")
+    for name, classifier in (("lexicon", IntentClassifier()),
+                             ("lexicon+model", IntentClassifier(model=True, threshold=args.threshold))):
+        result = evaluate(classifier, corpus)
+        scores = "  ".join(f"{i} P={s['precision']:.2f} R={s['recall']:.2f}" for i, s in result["intents"].items())
+        print(f"{name:<14} {scores}  {result['us_per_input']:.1f} µs/input")
+        for text in result["wrong_fast"]:
+            print(f"{'':<14} wrongly fast-pathed: {text!r}")
+
+    if args.skip_replay:
+        return
+
+    # Replay against the fake provider (summary cache off, so every LLM-routed turn is a provider call)
+    tmp = tempfile.mkdtemp(prefix="intents-")
+    os.environ.update(OPENAI_API_KEY="fake", OPENAI_BASE_URL=f"http://127.0.0.1:{args.provider_port}/v1",
+                      CHECKPOINTER="memory", SUMMARY_CACHE="0", SEMANTIC_CACHE="0", RETRIEVAL="0",
+                      CACHE_PATH=f"{tmp}/cache.sqlite", LOG_DIR=f"{tmp}/logs")
+    provider = subprocess.Popen([sys.executable, str(ROOT / "benchmarks" / "fake_provider.py"),
+                                 "--port", str(args.provider_port), "--latency", "0.01"],
+                                cwd=ROOT, start_new_session=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(f"http://127.0.0.1:{args.provider_port}/v1/models/fake")
+        off = asyncio.run(replay(corpus, fast_path=False))
+        on = asyncio.run(replay(corpus, fast_path=True))
+    finally:
+        stop(provider)
+
+    total_off, total_on = sum(off.values()), sum(on.values())
+    print(f"\nProvider calls without fast path: {total_off} {off}")
+    print(f"Provider calls with fast path:    {total_on} {on}")
+    print(f"Reduction: {total_off - total_on} calls ({(total_off - total_on) / max(1, total_off):.0%})")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,276 @@
+"""
+Load test of the backend against the local fake provider.
+
+Starts 'benchmarks/fake_provider.py' (latency distribution, streaming speed and error rate as given)
+and 'api.api:app' on fresh data files, then runs virtual users through realistic consent sessions:
+each user opens a session with a procedure ('/chat' -> summary) and then picks follow-up actions by
+weight (Q&A over '/chat' or '/chat/stream', speech of the last answer over '/tts', a recorded question
+over '/transcribe') until it captures consent ('/consent') and starts over. Procedures are drawn from a
+small catalog, so summary cache hits occur as they would in a clinic.
+
+Reports per endpoint p50/p95/p99 latency, throughput and errors, plus the peak RSS of the server
+processes. '--json' saves the report; '--baseline' compares with a saved one and exits with status 1
+when throughput or any p95 regresses by more than '--max-regression'.
+
+    python benchmarks/load_test.py --users 32 --duration 30 --latency 0.5 --latency-dist lognormal
+    python benchmarks/load_test.py --json baseline.json
+    python benchmarks/load_test.py --baseline baseline.json --max-regression 0.2
+"""
+import io
+import os
+import sys
+import json
+import time
+import uuid
+import wave
+import random
+import asyncio
+import argparse
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+from collections import defaultdict
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from multiworker_load import ROOT, stop, wait_ready
+
+PROCEDURES = ["Appendectomy", "Cataract surgery", "Knee arthroscopy", "Hip replacement", "Colonoscopy",
+              "Tonsillectomy", "Hernia repair", "Gallbladder removal", "Carpal tunnel release", "Caesarean section",
+              "Coronary angiography", "Tooth extraction", "Skin biopsy", "Varicose vein surgery", "Gastroscopy"]
+QUESTIONS = ["Will it hurt?", "How long is the recovery?", "Can I eat before the procedure?",
+             "What are the risks?", "When can I go back to work?", "Is there an alternative?"]
+
+
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight)
+    unknown = set(mix) - {"qa", "stream", "tts", "transcribe", "consent"}
+    if unknown:
+        raise argparse.ArgumentTypeError(f"Unknown actions: {', '.join(sorted(unknown))}")
+    return mix
+
+
+def recording(seconds: float = 3.0) -> bytes:
+    """A short silent WAV standing in for a recorded question"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(b"\x00\x00" * int(16000 * seconds))
+    return buffer.getvalue()
+
+
+def tree_rss_mb(pid: int) -> float:
+    """Resident memory of a process and its descendants (Linux /proc)"""
+    children = defaultdict(list)
+    for entry in Path("/proc").iterdir():
+        if entry.name.isdigit():
+            try:
+                stat = (entry / "stat").read_text()
+                children[int(stat.rsplit(")", 1)[1].split()[1])].append(int(entry.name))
+            except (OSError, IndexError, ValueError):
+                pass
+    total, todo = 0, [pid]
+    while todo:
+        current = todo.pop()
+        todo += children.get(current, [])
+        try:
+            for line in Path(f"/proc/{current}/status").read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    total += int(line.split()[1])
+        except OSError:
+            pass
+    return total / 1024
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def timed(self, endpoint: str, request):
+        start = time.perf_counter()
+        try:
+            response = await request
+            response.raise_for_status()
+        except httpx.HTTPError:
+            self.errors[endpoint] += 1
+            return None
+        self.latencies[endpoint].append(time.perf_counter() - start)
+        return response
+
+
+async def stream_chat(client: httpx.AsyncClient, payload: dict) -> httpx.Response:
+    """'/chat/stream' until its 'done' event (an 'error' event counts as a failed request)"""
+    async with client.stream("POST", "/chat/stream", json=payload) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if line == "event: error":
+                raise httpx.HTTPError("error event")
+    return response
+
+
+async def user(client: httpx.AsyncClient, deadline: float, stats: Stats, mix: dict, audio: bytes,
+               rng: random.Random):
+    actions, weights = list(mix), list(mix.values())
+    while time.time() < deadline:
+        session_id = str(uuid.uuid4())
+        base = {"session_id": session_id, "language": "English"}
+        r = await stats.timed("/chat (summary)", client.post("/chat", json={
+            **base, "text_input": rng.choice(PROCEDURES), "stage": "summary"}))
+        if r is None:
+            continue
+        answer = r.json()["answer"]
+
+        while time.time() < deadline:
+            action = rng.choices(actions, weights)[0]
+            if action == "qa":
+                r = await stats.timed("/chat (qa)", client.post("/chat", json={
+                    **base, "text_input": rng.choice(QUESTIONS), "stage": "qa"}))
+                answer = r.json()["answer"] if r is not None else answer
+            elif action == "stream":
+                await stats.timed("/chat/stream", stream_chat(client, {
+                    **base, "text_input": rng.choice(QUESTIONS), "stage": "qa"}))
+            elif action == "tts":
+                await stats.timed("/tts", client.post("/tts", json={**base, "text_input": answer, "stage": "qa"}))
+            elif action == "transcribe":
+                await stats.timed("/transcribe", client.post("/transcribe", data={"session_id": session_id},
+                                                             files={"file": ("question.wav", audio, "audio/wav")}))
+            else:
+                await stats.timed("/consent", client.post("/consent", json={
+                    "patient_name": "Load Test", "session_id": session_id, "method": "typed",
+                    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")}))
+                break
+
+
+async def drive(base_url: str, args) -> tuple:
+    stats = Stats()
+    audio = recording()
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        start = time.perf_counter()
+        deadline = time.time() + args.duration
+        await asyncio.gather(*(user(client, deadline, stats, args.mix, audio, random.Random(args.seed + i))
+                               for i in range(args.users)))
+        elapsed = time.perf_counter() - start
+    return stats, elapsed
+
+
+def report(stats: Stats, elapsed: float, rss: dict, args) -> dict:
+    endpoints = {}
+    for endpoint in sorted(set(stats.latencies) | set(stats.errors)):
+        latencies = np.array(stats.latencies[endpoint]) * 1000
+        pct = lambda q: round(float(np.percentile(latencies, q)), 1) if len(latencies) else None
+        endpoints[endpoint] = {"requests": len(latencies), "errors": stats.errors[endpoint],
+                               "rps": round(len(latencies) / elapsed, 2),
+                               "p50_ms": pct(50), "p95_ms": pct(95), "p99_ms": pct(99)}
+    total = sum(e["requests"] for e in endpoints.values())
+    return {"config": {k: v for k, v in vars(args).items() if k not in ("json", "baseline")},
+            "elapsed_s": round(elapsed, 2), "throughput_rps": round(total / elapsed, 2),
+            "errors": sum(e["errors"] for e in endpoints.values()), "endpoints": endpoints, **rss}
+
+
+def print_report(result: dict):
+    print(f"{'endpoint':<18} {'requests':>8} {'errors':>6} {'req/s':>7} {'p50_ms':>8} {'p95_ms':>8} {'p99_ms':>8}")
+    for name, e in result["endpoints"].items():
+        print(f"{name:<18} {e['requests']:>8} {e['errors']:>6} {e['rps']:>7.2f} {e['p50_ms'] or 0:>8.1f} "
+              f"{e['p95_ms'] or 0:>8.1f} {e['p99_ms'] or 0:>8.1f}")
+    print(f"throughput={result['throughput_rps']} req/s errors={result['errors']} "
+          f"rss_start={result['rss_start_mb']:.0f}MB rss_peak={result['rss_peak_mb']:.0f}MB "
+          f"rss_end={result['rss_end_mb']:.0f}MB")
+
+
+def regressions(result: dict, baseline: dict, tolerance: float) -> list:
+    found = []
+    if result["throughput_rps"] < baseline["throughput_rps"] * (1 - tolerance):
+        found.append(f"throughput {baseline['throughput_rps']} -> {result['throughput_rps']} req/s")
+    for name, old in baseline["endpoints"].items():
+        new = result["endpoints"].get(name)
+        if new and old["p95_ms"] and new["p95_ms"] and new["p95_ms"] > old["p95_ms"] * (1 + tolerance):
+            found.append(f"{name} p95 {old['p95_ms']} -> {new['p95_ms']} ms")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=16, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of load")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("qa=4,stream=2,tts=2,transcribe=1,consent=1"),
+                        help="Weights of the follow-up actions (qa, stream, tts, transcribe, consent)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.2, help="Median fake provider latency (s)")
+    parser.add_argument("--latency-dist", choices=["const", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--token-interval", type=float, default=0.002, help="Seconds per streamed text delta")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--provider-port", type=int, default=8766)
+    parser.add_argument("--json", help="Write the report to this file")
+    parser.add_argument("--baseline", help="Report to compare with")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Tolerated relative regression")
+    args = parser.parse_args()
+
+    provider = subprocess.Popen([sys.executable, str(ROOT / "benchmarks" / "fake_provider.py"),
+                                 "--port", str(args.provider_port), "--latency", str(args.latency),
+                                 "--latency-dist", args.latency_dist, "--latency-sigma", str(args.latency_sigma),
+                                 "--token-interval", str(args.token_interval), "--error-rate", str(args.error_rate),
+                                 "--error-status", str(args.error_status), "--retry-after", "0.2"],
+                                cwd=str(ROOT), start_new_session=True)
+    try:
+        wait_ready(f"http://127.0.0.1:{args.provider_port}/docs")
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {**os.environ, "OPENAI_API_KEY": "fake",
+                   "OPENAI_BASE_URL": f"http://127.0.0.1:{args.provider_port}/v1",
+                   "CHECKPOINTER": "sqlite", "CHECKPOINT_PATH": f"{tmp}/checkpoints.sqlite",
+                   "CACHE_PATH": f"{tmp}/cache.sqlite", "LOG_DIR": f"{tmp}/logs"}
+            api = subprocess.Popen([sys.executable, "-m", "uvicorn", "api.api:app", "--port", str(args.port),
+                                    "--workers", str(args.workers), "--log-level", "warning"],
+                                   cwd=str(ROOT), env=env, start_new_session=True)
+            try:
+                wait_ready(f"http://127.0.0.1:{args.port}/health")
+
+                # Sample server memory while the load runs
+                rss = {"rss_start_mb": tree_rss_mb(api.pid), "rss_peak_mb": 0.0}
+                done = threading.Event()
+
+                def sample():
+                    while not done.wait(0.5):
+                        rss["rss_peak_mb"] = max(rss["rss_peak_mb"], tree_rss_mb(api.pid))
+                sampler = threading.Thread(target=sample, daemon=True)
+                sampler.start()
+
+                stats, elapsed = asyncio.run(drive(f"http://127.0.0.1:{args.port}", args))
+                done.set()
+                sampler.join()
+                rss["rss_end_mb"] = tree_rss_mb(api.pid)
+                rss["rss_peak_mb"] = max(rss["rss_peak_mb"], rss["rss_end_mb"])
+            finally:
+                stop(api)
+    finally:
+        stop(provider)
+
+    result = report(stats, elapsed, rss, args)
+    print(f"cpus={os.cpu_count()} users={args.users} workers={args.workers} duration={args.duration}s "
+          f"latency={args.latency}s ({args.latency_dist}) error_rate={args.error_rate}")
+    print_report(result)
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2))
+
+    if args.baseline:
+        found = regressions(result, json.loads(Path(args.baseline).read_text()), args.max_regression)
+        for line in found:
+            print(f"REGRESSION: {line}")
+        sys.exit(1 if found else 0)
+
+
+if __name__ == "__main__":
+    main()
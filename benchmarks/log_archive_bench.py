@@ -0,0 +1,88 @@
+"""
+Benchmark the Parquet log archive against the live JSONL files.
+
+Generates synthetic daily logs, archives them and reports the size reduction together with scan
+times for a full read, a session lookup, a kind filter and a one hour time range over JSONL (full
+scan), the live index and the archive.
+
+    python benchmarks/log_archive_bench.py --records 1000000 --days 10
+"""
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+from datetime import datetime, timedelta
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from api.services.log_index import LogIndex
+from api.services.log_archive import LogArchive, iter_logs
+from log_index_bench import generate
+
+
+def scan_jsonl(log_dir: Path, match) -> int:
+    found = 0
+    for path in sorted(log_dir.glob("*.jsonl")):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                found += match(json.loads(line))
+    return found
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=10)
+    parser.add_argument("--sessions", type=int, default=50_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        live_dir, archived_dir = Path(tmp) / "live", Path(tmp) / "archived"
+        live_dir.mkdir()
+        generate(live_dir, args.records, args.days, args.sessions)
+        shutil.copytree(live_dir, archived_dir)
+
+        # Archive every day of the copy
+        archive = LogArchive(archived_dir)
+        size_in = sum(p.stat().st_size for p in archived_dir.glob("*.jsonl"))
+        _, archive_s = timed(lambda: [archive.archive(day) for day in archive.closed_days()])
+        size_out = sum(p.stat().st_size for p in archive.archive_dir.glob("*.parquet"))
+        print(f"archived {args.records:,} records in {archive_s:.1f}s: {size_in / 1e6:.0f} MB -> "
+              f"{size_out / 1e6:.1f} MB ({size_in / size_out:.1f}x smaller)")
+
+        live = LogIndex(live_dir)
+        live.refresh()
+        empty = LogIndex(archived_dir)
+        last = json.loads((live_dir / f"{live.days()[-1]}.jsonl").read_text(encoding="utf-8").splitlines()[-1])
+        session_id = last["session_id"]
+        since = datetime.fromisoformat(last["ts"]) - timedelta(hours=1)
+
+        cases = [
+            ("full read", lambda r: True, {}),
+            ("session", lambda r: r["session_id"] == session_id, {"session_id": session_id}),
+            ("consents", lambda r: r["kind"] == "consent_captured", {"kind": "consent_captured"}),
+            ("1h range", lambda r: since <= datetime.fromisoformat(r["ts"]) <= since + timedelta(hours=1),
+             {"since": since, "until": since + timedelta(hours=1)}),
+        ]
+        print(f"{'query':<10} {'records':>9} {'jsonl scan':>11} {'live index':>11} {'archive':>9}")
+        for name, match, filters in cases:
+            expected, scan_s = timed(lambda: scan_jsonl(live_dir, match))
+            indexed, index_s = timed(lambda: sum(1 for _ in iter_logs(live, **filters)))
+            archived, parquet_s = timed(lambda: sum(1 for _ in iter_logs(empty, archive, **filters)))
+            assert expected == indexed == archived, (name, expected, indexed, archived)
+            print(f"{name:<10} {expected:>9,} {scan_s * 1000:>9.0f}ms {index_s * 1000:>9.0f}ms "
+                  f"{parquet_s * 1000:>7.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
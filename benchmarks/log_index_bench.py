@@ -0,0 +1,114 @@
+"""
+Benchmark the audit log index against a full scan of the JSONL files.
+
+Generates synthetic daily logs (chat turns and consents spread over many sessions), then reports
+index build throughput, incremental refresh cost after an append, and the latency of session and
+time-range queries compared with grepping every file.
+
+    python benchmarks/log_index_bench.py --records 2000000 --days 30
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from api.services.log_index import LogIndex
+
+
+def generate(log_dir: Path, records: int, days: int, sessions: int) -> list:
+    """Write 'records' log lines over 'days' files; return the session ids used"""
+    rng = random.Random(0)
+    session_ids = [f"{rng.getrandbits(128):032x}" for _ in range(sessions)]
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    per_day = records // days
+    for d in range(days):
+        day = start + timedelta(days=d)
+        with open(log_dir / f"{day.date()}.jsonl", "w", encoding="utf-8") as f:
+            for i in range(per_day):
+                ts = (day + timedelta(seconds=86400 * i / per_day)).isoformat()
+                session_id = rng.choice(session_ids)
+                if rng.random() < 0.05:
+                    record = {"kind": "consent_captured", "ts": ts, "patient_name": "example",
+                              "session_id": session_id, "method": "voice", "timestamp": ts}
+                else:
+                    record = {"kind": "audit_log", "ts": ts, "session_id": session_id,
+                              "user_text": "Will it hurt?", "answer": "Some discomfort is expected. " * 8}
+                f.write(json.dumps(record) + "\n")
+    return session_ids
+
+
+def full_scan(log_dir: Path, session_id: str) -> int:
+    """Baseline: read every file and match the session"""
+    needle = f'"session_id": "{session_id}"'
+    found = 0
+    for path in sorted(log_dir.glob("*.jsonl")):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if needle in line and json.loads(line)["session_id"] == session_id:
+                    found += 1
+    return found
+
+
+def timed(fn, repeat: int = 1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--sessions", type=int, default=50_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_dir = Path(tmp)
+        _, gen_s = timed(lambda: generate(log_dir, args.records, args.days, args.sessions))
+        size = sum(p.stat().st_size for p in log_dir.glob("*.jsonl"))
+        print(f"generated {args.records:,} records in {args.days} files ({size / 1e6:.0f} MB) in {gen_s:.1f}s")
+
+        index = LogIndex(log_dir)
+        added, build_s = timed(index.rebuild)
+        print(f"index build:        {added:,} records in {build_s:.1f}s ({added / build_s:,.0f} records/s)")
+
+        # Incremental refresh after appending to the newest file
+        newest = log_dir / f"{index.days()[-1]}.jsonl"
+        last = json.loads(newest.read_text(encoding="utf-8").splitlines()[-1])
+        with open(newest, "a", encoding="utf-8") as f:
+            for _ in range(1000):
+                f.write(json.dumps(last) + "\n")
+        added, refresh_s = timed(lambda: index.refresh([newest.stem]))
+        print(f"incremental refresh: {added:,} records in {refresh_s * 1000:.1f}ms")
+
+        # Session lookup
+        session_id = last["session_id"]
+        found, index_s = timed(lambda: sum(1 for _ in index.query(session_id=session_id)), repeat=20)
+        scanned, scan_s = timed(lambda: full_scan(log_dir, session_id))
+        assert found == scanned, (found, scanned)
+        print(f"session query:      {found} records in {index_s * 1000:.2f}ms (full scan {scan_s * 1000:.0f}ms, "
+              f"{scan_s / index_s:,.0f}x)")
+
+        # One hour time range
+        since = datetime.fromisoformat(last["ts"]) - timedelta(hours=1)
+        found, range_s = timed(lambda: sum(1 for _ in index.query(since=since, until=since + timedelta(hours=1))),
+                               repeat=5)
+        print(f"1h time range:      {found:,} records in {range_s * 1000:.1f}ms")
+
+        found, kind_s = timed(lambda: sum(1 for _ in index.query(kind="consent_captured", since=since - timedelta(days=1))))
+        print(f"consents, 25h:      {found:,} records in {kind_s * 1000:.1f}ms")
+
+        index_size = sum(p.stat().st_size for p in log_dir.glob("index.sqlite*"))
+        print(f"index size:         {index_size / 1e6:.0f} MB ({index_size / size:.1%} of the logs)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Load test of the backend with 1..N uvicorn workers sharing one checkpoint store.
+
+Starts the local fake provider and, for every worker count, 'api.api:app' with '--workers N' on
+fresh SQLite files. Virtual users open a session with a procedure ('/chat' -> summary) and ask a
+follow-up question in the same session ('/chat' -> Q&A). Requests are spread over the workers by
+the kernel, so a follow-up answered as Q&A proves the session was found regardless of which worker
+served the first turn. Reports throughput, latency and the scaling relative to one worker.
+
+    python benchmarks/multiworker_load.py --workers 1 2 4 --users 64 --duration 20
+"""
+import os
+import sys
+import time
+import uuid
+import signal
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def wait_ready(url: str, timeout_s: float = 30.0):
+    deadline = time.time() + timeout_s
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not become ready")
+
+
+def stop(process: subprocess.Popen):
+    if process.poll() is None:
+        os.killpg(os.getpgid(process.pid), signal.SIGTERM)
+        process.wait(timeout=15)
+
+
+async def user(client: httpx.AsyncClient, deadline: float, stats: dict):
+    while time.time() < deadline:
+        session_id = str(uuid.uuid4())
+        turns = [(f"Procedure {session_id[:8]}", "summary"), ("Will it hurt?", "qa")]
+        for text, expected in turns:
+            start = time.perf_counter()
+            try:
+                r = await client.post("/chat", json={"session_id": session_id, "text_input": text,
+                                                     "stage": expected, "language": "English"})
+                r.raise_for_status()
+                stage = r.json()["stage"]
+            except (httpx.HTTPError, KeyError, ValueError):
+                stats["errors"] += 1
+                break
+            stats["latencies"].append(time.perf_counter() - start)
+            if stage != expected:
+                stats["wrong_stage"] += 1
+
+
+async def drive(base_url: str, users: int, duration: float) -> dict:
+    stats = {"latencies": [], "errors": 0, "wrong_stage": 0}
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=0)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(user(client, time.time() + duration, stats) for _ in range(users)))
+        stats["elapsed"] = time.perf_counter() - start
+    return stats
+
+
+def run_workers(workers: int, args, provider_url: str) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "OPENAI_API_KEY": "fake", "OPENAI_BASE_URL": provider_url,
+               "CHECKPOINTER": "sqlite", "CHECKPOINT_PATH": f"{tmp}/checkpoints.sqlite",
+               "CACHE_PATH": f"{tmp}/cache.sqlite", "LOG_DIR": f"{tmp}/logs", "SUMMARY_CACHE": "0"}
+        api = subprocess.Popen([sys.executable, "-m", "uvicorn", "api.api:app", "--port", str(args.port),
+                                "--workers", str(workers), "--log-level", "warning"],
+                               cwd=str(ROOT), env=env, start_new_session=True)
+        try:
+            wait_ready(f"http://127.0.0.1:{args.port}/health")
+            return asyncio.run(drive(f"http://127.0.0.1:{args.port}", args.users, args.duration))
+        finally:
+            stop(api)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--users", type=int, default=32, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds per worker count")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake provider latency per call (s)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--provider-port", type=int, default=8766)
+    args = parser.parse_args()
+
+    provider = subprocess.Popen([sys.executable, str(ROOT / "benchmarks" / "fake_provider.py"),
+                                 "--port", str(args.provider_port), "--latency", str(args.latency)],
+                                cwd=str(ROOT), start_new_session=True)
+    try:
+        wait_ready(f"http://127.0.0.1:{args.provider_port}/docs")
+        print(f"cpus={os.cpu_count()} users={args.users} duration={args.duration}s provider_latency={args.latency}s")
+        print(f"{'workers':>7} {'req/s':>8} {'scaling':>7} {'p50_ms':>7} {'p95_ms':>7} {'errors':>6} {'wrong_stage':>11}")
+        baseline = None
+        for workers in args.workers:
+            stats = run_workers(workers, args, f"http://127.0.0.1:{args.provider_port}/v1")
+            latencies = np.array(stats["latencies"]) * 1000
+            throughput = len(latencies) / stats["elapsed"]
+            baseline = baseline or throughput
+            print(f"{workers:>7} {throughput:>8.1f} {throughput / baseline:>6.2f}x "
+                  f"{np.percentile(latencies, 50):>7.0f} {np.percentile(latencies, 95):>7.0f} "
+                  f"{stats['errors']:>6} {stats['wrong_stage']:>11}", flush=True)
+    finally:
+        stop(provider)
+
+
+if __name__ == "__main__":
+    main()
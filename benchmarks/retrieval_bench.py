@@ -0,0 +1,121 @@
+"""
+Retrieval benchmark for the leaflet index over a synthetic leaflet corpus.
+
+Generates '--leaflets' leaflets (random procedure names and sections of pseudo-words), builds the
+index with BM25 only and with hybrid ranking, and replays queries made of the procedure name and a
+few words of a target chunk. Reports build time, index size, open time, recall@1, recall@k, MRR and
+query latency percentiles.
+
+    python benchmarks/retrieval_bench.py
+    python benchmarks/retrieval_bench.py --leaflets 5000 --queries 2000 --top-k 5
+    python benchmarks/retrieval_bench.py --source data/leaflets   # only latency, on real leaflets
+"""
+import sys
+import time
+import random
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from api.services.retrieval import LeafletIndex, build_index
+
+SECTIONS = ("Before the procedure", "During the procedure", "Common risks", "Rare risks", "Recovery",
+            "Alternatives")
+SYLLABLES = ("ka", "lo", "mi", "tra", "sen", "vol", "rik", "pa", "dum", "est", "or", "gli", "bet", "nu", "fas")
+
+
+def word(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def make_corpus(root: Path, leaflets: int, seed: int) -> list:
+    """Write the leaflets and return the (procedure, section, words) of each section"""
+    rng = random.Random(seed)
+    vocabulary = [word(rng) for _ in range(5000)]
+    sections = []
+    for n in range(leaflets):
+        procedure = f"{word(rng)} {word(rng)}"
+        language = "English" if n % 2 == 0 else "Svenska"
+        lines = [f"# {procedure}", ""]
+        for section in SECTIONS:
+            words = rng.sample(vocabulary, 40)
+            sections.append((procedure, section, language, words))
+            lines += [f"## {section}", "", " ".join(words[:20]) + ".", " ".join(words[20:]) + ".", ""]
+        path = root / language / f"leaflet-{n:05d}.md"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("\n".join(lines), encoding="utf-8")
+    return sections
+
+
+def evaluate(index: LeafletIndex, sections: list, queries: int, top_k: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    latencies, hits1, hits_k, rr = [], 0, 0, 0.0
+    for _ in range(queries):
+        procedure, section, language, words = rng.choice(sections)
+        query = f"what about {procedure} and {' '.join(rng.sample(words, 3))}?"
+        start = time.perf_counter()
+        passages = index.search(query, language, top_k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        ranks = [i for i, p in enumerate(passages) if p["title"] == procedure and p["text"].startswith(section)]
+        if ranks:
+            hits1 += ranks[0] == 0
+            hits_k += 1
+            rr += 1 / (ranks[0] + 1)
+    lat = np.percentile(latencies, [50, 95, 99])
+    return {"recall@1": hits1 / queries, f"recall@{top_k}": hits_k / queries, "mrr": rr / queries,
+            "p50_ms": lat[0], "p95_ms": lat[1], "p99_ms": lat[2]}
+
+
+def latency_only(index: LeafletIndex, queries: int, top_k: int) -> dict:
+    words = [w for i in range(min(len(index), 200)) for w in index.text(i).split()[:8]]
+    rng = random.Random(0)
+    latencies = []
+    for _ in range(queries):
+        start = time.perf_counter()
+        index.search(" ".join(rng.sample(words, min(6, len(words)))), None, top_k)
+        latencies.append((time.perf_counter() - start) * 1000)
+    lat = np.percentile(latencies, [50, 95, 99])
+    return {"p50_ms": lat[0], "p95_ms": lat[1], "p99_ms": lat[2]}
+
+
+# Main
+def run():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leaflets", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--embedding-weight", type=float, default=0.1, help="Weight of the embedding ranking")
+    parser.add_argument("--source", type=Path, help="Benchmark an existing leaflet directory instead")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        source, sections = args.source, None
+        if source is None:
+            source = tmp / "leaflets"
+            sections = make_corpus(source, args.leaflets, args.seed)
+
+        print(f"{'ranking':<8} {'build s':>8} {'MB':>6} {'open ms':>8} {'R@1':>6} {'R@k':>6} {'MRR':>6} "
+              f"{'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7}")
+        for ranking in ("bm25", "hybrid"):
+            stats = build_index(source, tmp / ranking, embeddings=ranking == "hybrid")
+            start = time.perf_counter()
+            index = LeafletIndex(tmp / ranking, budget_ms=1000, embedding_weight=args.embedding_weight)
+            open_ms = (time.perf_counter() - start) * 1000
+            result = (evaluate(index, sections, args.queries, args.top_k, args.seed) if sections
+                      else latency_only(index, args.queries, args.top_k))
+            quality = (f"{result['recall@1']:>6.3f} {result[f'recall@{args.top_k}']:>6.3f} {result['mrr']:>6.3f}"
+                       if sections else f"{'-':>6} {'-':>6} {'-':>6}")
+            print(f"{ranking:<8} {stats['seconds']:>8.2f} {stats['bytes'] / 1e6:>6.2f} {open_ms:>8.2f} {quality} "
+                  f"{result['p50_ms']:>7.3f} {result['p95_ms']:>7.3f} {result['p99_ms']:>7.3f}")
+        print(f"\n{stats['leaflets']} leaflets, {stats['chunks']} chunks, {args.queries} queries, top-k {args.top_k}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,97 @@
+"""
+Offline evaluation of the semantic summary cache over a recorded query corpus.
+
+The corpus is JSONL with one {"query", "language", "procedure"} record per line, where 'procedure'
+is a canonical label used as ground truth. Queries are replayed in order: a miss "generates" the
+summary (stores the label), a hit is correct when the cached label matches. For each threshold the
+script reports hit rate, false-hit rate and lookup latency.
+
+    python benchmarks/semantic_cache_eval.py
+    python benchmarks/semantic_cache_eval.py --embedder openai --thresholds 0.8 0.85 0.9
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from api.services.cache import normalize_query
+from api.services.semantic_cache import SemanticCache, hashing_embedding
+
+NAMESPACE = ("eval-model", "eval")
+
+
+async def evaluate(corpus, embed, threshold: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SemanticCache(Path(tmp) / "eval.sqlite", embed, threshold=threshold)
+        hits = false_hits = 0
+        latencies = []
+        for record in corpus:
+            start = time.perf_counter()
+            cached, vec = await cache.lookup(record["query"], record["language"], *NAMESPACE)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+            if cached is None:
+                await cache.put(record["query"], record["language"], *NAMESPACE, record["procedure"], vec)
+            else:
+                hits += 1
+                false_hits += cached != record["procedure"]
+        cache.conn.close()
+
+    # Best possible hit rate: every repeat of an already seen procedure
+    ideal = len(corpus) - len({(r["language"], r["procedure"]) for r in corpus})
+    return {"threshold": threshold, "queries": len(corpus), "hits": hits, "ideal_hits": ideal,
+            "hit_rate": hits / len(corpus), "false_hit_rate": false_hits / max(hits, 1),
+            "p50_ms": float(np.percentile(latencies, 50)), "p95_ms": float(np.percentile(latencies, 95))}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=str(ROOT / "benchmarks" / "data" / "procedure_queries.jsonl"))
+    parser.add_argument("--embedder", choices=["hashing", "openai"], default="hashing")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.5, 0.6, 0.7, 0.8, 0.9])
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as f:
+        corpus = [json.loads(line) for line in f if line.strip()]
+
+    if args.embedder == "openai":
+        from api.services.tools import AIService
+        service = AIService()
+        if not service.client:
+            sys.exit("OPENAI_API_KEY is required for the 'openai' embedder.")
+        embed = service._embed
+    else:
+        async def embed(text: str) -> np.ndarray:
+            return hashing_embedding(text)
+
+    # Embed each query once and replay from memory so thresholds are compared on the same vectors
+    vectors, embed_ms = {}, []
+    for record in corpus:
+        text = normalize_query(record["query"])
+        if text not in vectors:
+            start = time.perf_counter()
+            vectors[text] = await embed(text)
+            embed_ms.append((time.perf_counter() - start) * 1000)
+
+    async def replay(text: str) -> np.ndarray:
+        return vectors[text] if text in vectors else await embed(text)
+
+    print(f"corpus={args.corpus} queries={len(corpus)} embedder={args.embedder} "
+          f"embed_p50_ms={np.percentile(embed_ms, 50):.3f}")
+    print(f"{'threshold':>9} {'hit_rate':>8} {'hits':>5} {'ideal':>5} {'false_hit':>9} {'p50_ms':>7} {'p95_ms':>7}")
+    for threshold in args.thresholds:
+        r = await evaluate(corpus, replay, threshold)
+        print(f"{r['threshold']:>9.2f} {r['hit_rate']:>8.2%} {r['hits']:>5} {r['ideal_hits']:>5} "
+              f"{r['false_hit_rate']:>9.2%} {r['p50_ms']:>7.3f} {r['p95_ms']:>7.3f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,56 @@
+"""
+Build the local retrieval index of approved procedure leaflets used to ground Q&A answers.
+
+Leaflets are Markdown or text files, one directory per language:
+
+    data/leaflets/English/knee-arthroscopy.md
+    data/leaflets/Svenska/knaartroskopi.md
+
+The index is written to a new directory and swapped in when complete; restart the API to load it.
+
+Usage:
+    python build_leaflet_index.py
+    python build_leaflet_index.py path/to/leaflets --embeddings --chunk-tokens 150
+    python build_leaflet_index.py --query "Can I drive after knee arthroscopy?" --language English
+"""
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+from api.services.cache import DATA_DIR
+from api.services.retrieval import LeafletIndex, build_index
+
+
+# Main
+def run():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", type=Path, nargs="?", default=DATA_DIR / "leaflets", help="Leaflet directory")
+    parser.add_argument("--out", type=Path, default=Path(os.getenv("RETRIEVAL_INDEX", str(DATA_DIR / "leaflets_index"))))
+    parser.add_argument("--chunk-tokens", type=int, default=120, help="Approximate tokens per chunk")
+    parser.add_argument("--embeddings", action="store_true", help="Also store local embeddings (hybrid ranking)")
+    parser.add_argument("--query", help="Only search the existing index and print the passages")
+    parser.add_argument("--language", choices=["English", "Svenska"])
+    parser.add_argument("--top-k", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.query:
+        index = LeafletIndex(args.out, top_k=args.top_k)
+        start = time.perf_counter()
+        passages = index.search(args.query, args.language)
+        print(f"{len(passages)} passages in {(time.perf_counter() - start) * 1000:.2f} ms")
+        for p in passages:
+            print(f"\n[{p['score']:.2f}] {p['title']} ({p['source']})\n{p['text']}")
+        return
+
+    try:
+        stats = build_index(args.source, args.out, chunk_tokens=args.chunk_tokens, embeddings=args.embeddings)
+    except (OSError, ValueError) as e:
+        sys.exit(str(e))
+    print(f"{stats['leaflets']} leaflets -> {stats['chunks']} chunks, {stats['terms']:,} terms, "
+          f"{stats['bytes'] / 1e6:.2f} MB in {stats['seconds']:.2f}s: {args.out}")
+
+
+if __name__ == "__main__":
+    run()
@@ -1,4 +1,4 @@
-import os, sys, time, signal, subprocess, webbrowser
+import os, sys, time, shutil, signal, subprocess, webbrowser
 from pathlib import Path
 from urllib.request import urlopen, Request
 from urllib.error import URLError, HTTPError
@@ -70,6 +70,20 @@ def run():
     env.setdefault("PORT_BACKEND", "8000")
     env.setdefault("PORT_FRONTEND", "8501")
 
+    # Define backend workers (session state must then live in a store shared by all processes)
+    env.setdefault("API_WORKERS", "1")
+    workers = max(1, int(env["API_WORKERS"]))
+    if workers > 1 and env.get("CHECKPOINTER", "sqlite").strip().lower() == "memory":
+        print("CHECKPOINTER=memory keeps sessions inside one process; use 'sqlite' with API_WORKERS > 1.")
+        sys.exit(1)
+
+    # Aggregate Prometheus metrics over workers (per-process files in a directory emptied at start)
+    if workers > 1 and not env.get("PROMETHEUS_MULTIPROC_DIR"):
+        metrics_dir = ROOT / "data" / "metrics"
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        metrics_dir.mkdir(parents=True)
+        env["PROMETHEUS_MULTIPROC_DIR"] = str(metrics_dir)
+
     # Define URLs
     backend_url = f"http://127.0.0.1:{env['PORT_BACKEND']}"
     frontend_url_127 = f"http://127.0.0.1:{env['PORT_FRONTEND']}"
@@ -83,6 +97,7 @@ def run():
     uvicorn_cmd = [
         sys.executable, "-m", "uvicorn", API_APP,
         "--host", "127.0.0.1", "--port", env["PORT_BACKEND"],
+        "--workers", str(workers),
     ]
 
     # 2) Frontend (Streamlit)
@@ -0,0 +1,157 @@
+"""
+Pre-warm consent summaries and their audio for a catalog of procedures.
+
+Runs the summary generation, parsing and Text-to-Speech for every procedure x language in bounded
+parallel batches and stores the results in the same caches '/chat', '/tts' and '/audio' read from,
+so the first patient of the day never waits on a cold generation.
+
+Catalog formats:
+    - JSON: {"languages": ["English", "Svenska"], "procedures": ["Appendectomy", ...]}
+    - Text: one procedure per line (languages taken from --languages)
+
+With --batch, summaries missing from the cache are generated in one provider Batch API job (cheaper,
+completes within 24h) and ingested into the summary cache; audio is then synthesized as usual.
+
+Provider usage (batch jobs included) is written to the audit log like the API does, so it shows up
+in '/usage'.
+
+Usage:
+    python prewarm.py catalog.json --concurrency 4
+    python prewarm.py catalog.json --batch --poll-interval 60
+    python prewarm.py catalog.json --batch --resume batch_abc123
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+from api.services.tools import AIService
+from api.services.batch import SummaryBatch
+from api.services.blobs import BlobStore
+from api.services.cache import AudioCache, DATA_DIR
+from api.services.audit_log import AuditLogWriter
+from api.services.log_index import LogIndex
+
+
+# Helpers definition
+def load_catalog(path: Path, languages: list) -> list:
+    """Return the (procedure, language) pairs of a catalog file."""
+    text = path.read_text(encoding="utf-8")
+    if path.suffix.lower() == ".json":
+        catalog = json.loads(text)
+        procedures = catalog["procedures"]
+        languages = catalog.get("languages", languages)
+    else:
+        procedures = [line.strip() for line in text.splitlines() if line.strip() and not line.startswith("#")]
+    return [(procedure, language) for procedure in procedures for language in languages]
+
+
+async def prewarm_one(service: AIService, audio_store: BlobStore, audio_cache, procedure: str, language: str,
+                      audio_format: str) -> dict:
+    """Generate (or confirm cached) summary and audio for one procedure."""
+    result = {"procedure": procedure, "language": language, "ok": False}
+    start = time.perf_counter()
+    try:
+        # Summary (stored in the summary cache by AIService)
+        response = await service._summary(user_query=procedure, language=language)
+        summary = service._parse_summary(response)
+        if not summary:
+            raise ValueError("Response is not a consent summary.")
+
+        # Audio of the summary as the chat view requests it
+        if audio_cache is not None:
+            key = AudioCache.key(service._tts_request(str(summary), language, audio_format))
+            if audio_cache.get(key) is None:
+                handle, size = await audio_store.put_stream(
+                    service._tts_stream(str(summary), language, response_format=audio_format), audio_format)
+                audio_cache.put(key, handle, size)
+
+        result["ok"] = True
+
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+async def prewarm(pairs: list, concurrency: int, audio_format: str, with_audio: bool,
+                  batch: bool = False, poll_interval: float = 30.0, resume: str = None) -> list:
+    service = AIService()
+    if not service.client:
+        sys.exit("OPENAI_API_KEY is required to pre-warm the caches.")
+    if service.summary_cache is None:
+        sys.exit("SUMMARY_CACHE is disabled: pre-warmed summaries would not be served.")
+
+    # Usage records go to the audit log read by '/usage'
+    log_dir = Path(os.getenv("LOG_DIR") or DATA_DIR / "logs").resolve()
+    log_dir.mkdir(parents=True, exist_ok=True)
+    audit_log = AuditLogWriter.from_env(log_dir, index=LogIndex.from_env(log_dir))
+    audit_log.start()
+    service.usage.sink = audit_log.log
+    try:
+        return await _prewarm(service, pairs, concurrency, audio_format, with_audio, batch, poll_interval, resume)
+    finally:
+        await audit_log.stop()
+
+
+async def _prewarm(service: AIService, pairs: list, concurrency: int, audio_format: str, with_audio: bool,
+                   batch: bool, poll_interval: float, resume: str) -> list:
+    # Batch mode: fill the summary cache in one job, then only the failures are retried below
+    if batch:
+        results = await SummaryBatch(service, poll_interval_s=poll_interval).run(pairs, batch_id=resume)
+        failed = [r for r in results if not r["ok"]]
+        for r in failed:
+            print(f"[  batch ] {r['language']:<8} {r['procedure']}: FAILED ({r['error']})", flush=True)
+        print(f"Batch: {len(results) - len(failed)}/{len(results)} summaries stored", flush=True)
+
+    audio_store = BlobStore(DATA_DIR / "audio")
+    audio_cache = AudioCache.from_env(audio_store) if with_audio else None
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(procedure: str, language: str) -> dict:
+        async with semaphore:
+            result = await prewarm_one(service, audio_store, audio_cache, procedure, language, audio_format)
+            status = "ok" if result["ok"] else f"FAILED ({result['error']})"
+            print(f"[{result['seconds']:>7.2f}s] {language:<8} {procedure}: {status}", flush=True)
+            return result
+
+    return await asyncio.gather(*(bounded(p, l) for p, l in pairs))
+
+
+# Main
+def run():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("catalog", type=Path, help="Catalog file (.json or one procedure per line)")
+    parser.add_argument("--languages", nargs="+", default=["English", "Svenska"])
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum provider calls in flight")
+    parser.add_argument("--audio-format", default="mp3", choices=["wav", "mp3", "opus", "aac", "flac", "pcm"])
+    parser.add_argument("--no-audio", action="store_true", help="Only pre-warm summaries")
+    parser.add_argument("--batch", action="store_true", help="Generate summaries through the provider Batch API")
+    parser.add_argument("--poll-interval", type=float, default=30.0, help="Seconds between batch status checks")
+    parser.add_argument("--resume", metavar="BATCH_ID", help="Ingest an already submitted batch (implies --batch)")
+    parser.add_argument("--report", type=Path, help="Write per-item results as JSON")
+    args = parser.parse_args()
+
+    pairs = load_catalog(args.catalog, args.languages)
+    start = time.perf_counter()
+    results = asyncio.run(prewarm(pairs, max(1, args.concurrency), args.audio_format, not args.no_audio,
+                                  batch=args.batch or bool(args.resume), poll_interval=args.poll_interval,
+                                  resume=args.resume))
+    elapsed = time.perf_counter() - start
+
+    # Report
+    failures = [r for r in results if not r["ok"]]
+    print(f"\n{len(results) - len(failures)}/{len(results)} pre-warmed in {elapsed:.1f}s "
+          f"({len(results) / elapsed if elapsed else 0:.2f} items/s), {len(failures)} failed")
+    if args.report:
+        args.report.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,50 @@
+"""
+Query the audit/consent logs in 'data/logs' through their sidecar index.
+
+Matching records are printed as JSON lines in append order, from live and archived days alike. The
+index is caught up with the log files before every query; '--rebuild' builds it again from scratch.
+
+Usage:
+    python query_logs.py --session f1d81f4b-8830-4e14-b53b-db5dc64f36af
+    python query_logs.py --kind consent_captured --since 2025-08-28 --until 2025-08-29T12:00
+    python query_logs.py --stats
+"""
+import sys
+import json
+import argparse
+from datetime import datetime
+
+from api.services.cache import DATA_DIR
+from api.services.log_index import LogIndex
+from api.services.log_archive import LogArchive, iter_logs
+
+
+# Main
+def run():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--session", help="session_id to match")
+    parser.add_argument("--kind", help="Record kind (audit_log, consent_captured, ...)")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="ISO date/time (UTC if no offset)")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="ISO date/time (UTC if no offset)")
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--log-dir", default=str(DATA_DIR / "logs"))
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the index before querying")
+    parser.add_argument("--stats", action="store_true", help="Print index statistics and exit")
+    args = parser.parse_args()
+
+    index = LogIndex.from_env(args.log_dir)
+    if args.rebuild:
+        print(f"Indexed {index.rebuild()} records", file=sys.stderr)
+    if args.stats:
+        index.refresh()
+        print(json.dumps(index.stats()))
+        return
+
+    archive = LogArchive.from_env(args.log_dir)
+    for record in iter_logs(index, archive, session_id=args.session, kind=args.kind, since=args.since,
+                            until=args.until, limit=args.limit):
+        sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    run()